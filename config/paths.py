@@ -20,4 +20,9 @@ UTILS_DIR = ROOT_DIR.joinpath('utils')
 # 测试用例
 CASES_DIR = ROOT_DIR.joinpath('cases')
 
-REPORTS_DIR = ROOT_DIR.joinpath('reports')
\ No newline at end of file
+TESTS_DIR = ROOT_DIR.joinpath('tests')
+
+REPORTS_DIR = ROOT_DIR.joinpath('reports')
+
+# 运行时缓存（历史耗时、用例解析缓存等）
+CACHE_DIR = ROOT_DIR.joinpath('.cache')
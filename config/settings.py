@@ -1,6 +1,7 @@
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from typing import Literal
 from pydantic import Field, field_validator
+from functools import lru_cache
 import os
 from urllib.parse import quote_plus
 
@@ -15,6 +16,25 @@ class Settings(BaseSettings):
 
     PASSWORD: str
 
+    # token 有效期（秒）, 仅在 token 不是 JWT 或没有 exp 字段时使用
+    TOKEN_TTL: int = Field(default=3600)
+
+    # token 距过期不足该秒数时提前刷新, 不超过 token 有效期的 20%
+    TOKEN_REFRESH_MARGIN: int = Field(default=60)
+
+    # HTTP 连接池: 缓存的 host 连接池数量, 以及每个 host 保持的连接数（多线程共用 session 时需不小于并发线程数）
+    HTTP_POOL_CONNECTIONS: int = Field(default=10)
+    HTTP_POOL_MAXSIZE: int = Field(default=20)
+
+    # 重试: 默认策略的重试次数与退避时间（秒）, 全局重试预算为 RETRY_BUDGET_MIN + 请求数 * RETRY_BUDGET_RATIO
+    RETRY_MAX: int = Field(default=3)
+    RETRY_BACKOFF_FACTOR: float = Field(default=0.5)
+    RETRY_BACKOFF_MAX: float = Field(default=5.0)
+    RETRY_BUDGET_RATIO: float = Field(default=0.2)
+    RETRY_BUDGET_MIN: int = Field(default=10)
+    # 熔断: 接口连续失败次数达到阈值后熔断, 冷却时间（秒）后放行探测请求
+    CIRCUIT_FAILURE_THRESHOLD: int = Field(default=5)
+    CIRCUIT_RECOVERY_TIMEOUT: float = Field(default=30)
 
     # 数据库
     MYSQL_HOST: str
@@ -23,9 +43,22 @@ class Settings(BaseSettings):
     MYSQL_PASSWORD: str
     MYSQL_POOL_SIZE: int
     MYSQL_MAX_OVERFLOW: int
+    # 取出连接时先 ping, 失效连接自动重连
+    MYSQL_POOL_PRE_PING: bool = Field(default=True)
+    # 连接使用多少次后重建, 0 表示不限制
+    MYSQL_POOL_RECYCLE_USES: int = Field(default=0)
+    # 只读查询缓存的过期时间（秒）与最大条数, 需在 MySQLClient(cache=True) 时才生效
+    MYSQL_QUERY_CACHE_TTL: float = Field(default=300)
+    MYSQL_QUERY_CACHE_SIZE: int = Field(default=1024)
 
     # Notifier - 以飞书为例
     FEISHU_WEBHOOK_URL: str
+    # 是否在会话结束时推送测试报告, 通过 main.py 执行时默认开启, 直接执行 pytest（如框架自身的单元测试）时不推送
+    NOTIFY_ENABLED: bool = Field(default=False)
+    # 推送: 单次请求超时与失败重试次数（秒）, 会话结束时最多等待 NOTIFY_FLUSH_TIMEOUT 秒, 未送达的通知保存到 outbox 下次执行时重发
+    NOTIFY_TIMEOUT: float = Field(default=5)
+    NOTIFY_MAX_RETRIES: int = Field(default=3)
+    NOTIFY_FLUSH_TIMEOUT: float = Field(default=10)
 
 
     # def __init__(self, **data):
@@ -74,7 +107,29 @@ class Settings(BaseSettings):
             print(f'配置文件 {env_file} 未找到, 将尝试从环境变量读取')
             env_file = None
         
-        # 动态设置 model_config 的 env_file
-        self.model_config['env_file'] = env_file
+        # 按实例指定 env_file, 不修改类共享的 model_config
+        super().__init__(_env_file=env_file, **data)
+
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """进程内共享的配置, 首次调用时读取 .env.<APP_ENV>, 之后直接返回缓存的实例"""
+    return Settings()
+
+
+def reload_settings() -> Settings:
+    """重新读取配置（如切换 APP_ENV 或修改了 .env 文件后）, 之后 get_settings() 返回新的实例"""
+    get_settings.cache_clear()
+    return get_settings()
+
+
+class SharedSettings:
+    """以类属性的形式引用共享配置, 首次访问时才加载, reload_settings() 后自动指向新的实例
+
+    Example:
+        class APIClient:
+            settings = SharedSettings()
+    """
 
-        super().__init__(**data)
+    def __get__(self, obj, owner=None) -> Settings:
+        return get_settings()
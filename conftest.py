@@ -1,36 +1,176 @@
+import dataclasses
+import inspect
+import os
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
 import pytest
 
-from config.settings import Settings
-from core.api_client import APIClient
-from core.mysql_client import MySQLClient
-from utils.notifier import Notifier
+from core.scheduler import CASE_MARKER, CONCURRENT_MARKER, ScheduleError, plan
+from utils.durations import load_durations, sort_by_duration
+from utils.history import CaseResult, HistoryStore
+from utils.metrics import JsonLinesSink, PrometheusSink, metrics
+from utils.logger import hot_log, logger
+from utils.report_stream import ReportWriter, render_html
+
+# 配置、HTTP 客户端与数据库客户端（pydantic-settings、requests、httpx、pymysql、DBUtils）在 fixture 中按需导入,
+# 不需要这些依赖的用例不承担导入开销, 并行执行时每个 worker 的启动时间也随之缩短
+
+
+def _loaded(module: str):
+    """已导入的模块, 未导入时返回 None（本进程没有用到, 不为了会话结束时的统计而导入）"""
+    return sys.modules.get(module)
+
+
+@pytest.fixture(scope='session')
+def cassette(request):
+    """会话级别的 cassette, 未指定 --cassette-mode 时为 None"""
+    mode = request.config.getoption('--cassette-mode')
+    if not mode:
+        yield None
+        return
+
+    from config.settings import get_settings
+    from core.cassette import Cassette
+    from utils.data_factory import factory
+
+    path = request.config.getoption('--cassette') or f'cassettes/{get_settings().APP_ENV}.jsonl'
+    # 录制时保存渲染用例模板的种子, 回放时检查种子一致
+    cassette = Cassette(path, mode, seed=factory.seed)
+    yield cassette
+    cassette.close()
 
-settings = Settings()
 
 @pytest.fixture(scope='session')
-def unauthorized_client():
+def unauthorized_client(cassette):
     """无认证的通用客户端"""
-    return APIClient()
+    from core.api_client import APIClient
+    return APIClient(cassette=cassette)
 
 
 @pytest.fixture(scope='session')
-def authorized_client(api_client):
+def authorized_client(cassette):
     """
-    带认证的通用客户端
+    带认证的通用客户端, token 由 token_manager 缓存, 多个 worker 共用同一次登录
     """
-    resp = api_client.request('POST', f'login', json={
-        'username': settings.USERNAME,
-        'password': settings.PASSWORD
-    })
-    assert resp.status_code == 200
+    from core.api_client import APIClient
 
-    token = resp.json()['data']['token']
+    api_client = APIClient(cassette=cassette)
+    api_client.authorize()
+    return api_client
 
-    assert token, '创建带认证的客户端失败, 未获取到 token'
 
-    api_client.set_token(token)
+# 会话级别的事件循环, 首次使用时创建, 会话结束时关闭
+_runner = None
 
-    return api_client
+
+def _event_loop_runner():
+    global _runner
+    if _runner is None:
+        import asyncio
+        _runner = asyncio.Runner()
+    return _runner
+
+
+@pytest.fixture(scope='session')
+def event_loop_runner():
+    """会话级别的事件循环, 异步客户端与 `async def` 用例共用同一个循环"""
+    return _event_loop_runner()
+
+
+@pytest.fixture(scope='session')
+def async_client(event_loop_runner):
+    """无认证的异步客户端, 整个会话共享一个连接池"""
+    from core.async_api_client import AsyncAPIClient
+
+    client = AsyncAPIClient()
+    yield client
+    event_loop_runner.run(client.aclose())
+
+
+# 并发执行的 async ddt 用例: 测试函数 -> 待执行的用例, 以及已随同一批执行完成的用例结果（nodeid -> 异常, 通过时为 None）
+_concurrent_batches = {}
+_concurrent_results = {}
+
+# 用例中可能抛出的 pytest 结果异常（跳过、失败）, 随结果保存, 执行到对应用例时重新抛出
+_OUTCOMES = (Exception, pytest.skip.Exception, pytest.fail.Exception, pytest.xfail.Exception)
+
+
+def _run_concurrently(items, funcargs, limit):
+    """在会话事件循环中并发执行同一测试函数的多条用例, 最多 limit 条同时执行"""
+    import asyncio
+
+    async def run_one(item, semaphore):
+        params = inspect.signature(item.obj).parameters
+        kwargs = {**funcargs, **{name: value for name, value in item.callspec.params.items() if name in params}}
+        async with semaphore:
+            try:
+                await item.obj(**kwargs)
+            except _OUTCOMES as e:
+                return e
+        return None
+
+    async def run_all():
+        semaphore = asyncio.Semaphore(limit)
+        errors = await asyncio.gather(*(run_one(item, semaphore) for item in items))
+        return {item.nodeid: error for item, error in zip(items, errors)}
+
+    return _event_loop_runner().run(run_all())
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_pyfunc_call(pyfuncitem):
+    """在会话事件循环中执行 `async def` 定义的测试用例
+
+    默认每个用例（包括 ddt 的每条数据）依次执行, 用例内部可通过 `client.gather(...)` 同时等待多个请求;
+    `@ddt(..., concurrency=N)` 的用例在执行第一条时同一函数的全部用例一起并发执行, 结果在执行到各用例时报告
+    """
+    if not inspect.iscoroutinefunction(pyfuncitem.obj):
+        return None
+
+    params = inspect.signature(pyfuncitem.obj).parameters
+    funcargs = {name: value for name, value in pyfuncitem.funcargs.items() if name in params}
+
+    if pyfuncitem.nodeid in _concurrent_results:
+        error = _concurrent_results.pop(pyfuncitem.nodeid)
+    elif pyfuncitem in _concurrent_batches.get(_case_scope(pyfuncitem), ()):
+        batch = _concurrent_batches.pop(_case_scope(pyfuncitem))
+        limit = pyfuncitem.get_closest_marker(CONCURRENT_MARKER).args[0]
+        _concurrent_results.update(_run_concurrently(batch, funcargs, limit))
+        error = _concurrent_results.pop(pyfuncitem.nodeid)
+    else:
+        _event_loop_runner().run(pyfuncitem.obj(**funcargs))
+        return True
+
+    if error is not None:
+        raise error
+    return True
+
+
+def pytest_collection_finish(session):
+    """登记并发执行的 async ddt 用例, 按测试函数分批
+
+    同一批用例共用第一条用例的 fixture（除用例数据外）, 因此只应使用会话级别的 fixture;
+    声明了 depends_on/uses 或带有 skip/xfail 标记的用例不参与并发, 仍单独执行
+    """
+    config = session.config
+    # 并行执行时只有 --dist loadgroup 能保证同一函数的用例分配到同一个 worker
+    if is_xdist_worker(config) and not getattr(config.option, 'loadgroup', False):
+        return
+
+    batches = {}
+    for item in session.items:
+        if item.get_closest_marker(CONCURRENT_MARKER) is None or not inspect.iscoroutinefunction(item.obj):
+            continue
+        node = _case_node(item)
+        if node and (node.depends_on or node.uses):
+            continue
+        if any(item.get_closest_marker(name) for name in ('skip', 'skipif', 'xfail')):
+            continue
+        batches.setdefault(_case_scope(item), []).append(item)
+    _concurrent_batches.update({scope: items for scope, items in batches.items() if len(items) > 1})
 
 
 
@@ -40,22 +180,198 @@ def authorized_client(api_client):
 def db():
     """函数级别的 fixture, 每个测试用例获取一个独立的数据库连接
     """
+    from core.mysql_client import MySQLClient
+
     with MySQLClient() as client:
         yield client
 
+
+@pytest.fixture(scope='session', autouse=True)
+def seed_data():
+    """用例文件中 seed 声明的前置数据, 每个会话（并行执行时每个 worker）按表批量写入一次
+
+    没有用例声明 seed 时不连接数据库
+    """
+    from utils.data_factory import factory
+
+    seeds = factory.take_seeds()
+    if not seeds:
+        return
+    from core.mysql_client import MySQLClient
+
+    with MySQLClient() as client, client.transaction():
+        for table, rows in seeds.items():
+            client.bulk_insert(table, rows, ignore=True)
+
+
+# 本次运行各用例的结果与耗时 (setup + call + teardown), 仅在主进程中汇总写入历史记录
+_results = {}
+_session_start = time.time()
+
+# 并行执行时各 worker 回传的连接池统计
+_worker_pool_stats = []
+
+# 流式报告（--report-jsonl）, 仅在主进程中写入
+_report_writer = None
+
+# 测试报告推送, 仅在主进程中发送
+_notifier = None
+
+
+def is_xdist_worker(config) -> bool:
+    """是否为 pytest-xdist 的 worker 进程"""
+    return hasattr(config, 'workerinput')
+
+
+# 声明了调度元数据的用例: nodeid -> (测试函数, 用例 id), 以及各用例是否通过
+_case_ids = {}
+_case_passed = {}
+
+
+def _case_scope(item) -> str:
+    """用例所属的测试函数: nodeid 去掉参数部分"""
+    return item.nodeid.split('[', 1)[0]
+
+
+def _case_node(item):
+    """用例的调度元数据, 用例 id 限定在所属的测试函数内（同一个用例文件可被多个测试函数加载）"""
+    marker = item.get_closest_marker(CASE_MARKER)
+    if marker is None:
+        return None
+    return dataclasses.replace(marker.args[0], scope=_case_scope(item))
+
+
+def pytest_runtest_logreport(report):
+    if _report_writer is not None:
+        _report_writer.on_report(report)
+
+    result = _results.get(report.nodeid)
+    if result is None:
+        result = _results[report.nodeid] = CaseResult(nodeid=report.nodeid, outcome='passed', duration=0.0)
+    result.duration += report.duration
+    if report.failed:
+        result.outcome = 'failed'
+    elif report.skipped and result.outcome == 'passed':
+        result.outcome = 'skipped'
+    for name, value in report.user_properties:
+        if name == 'case_title':
+            result.title = value
+
+    key = _case_ids.get(report.nodeid)
+    if key is not None and (report.failed or report.skipped):
+        _case_passed[key] = False
+    elif key is not None and report.when == 'call':
+        _case_passed.setdefault(key, True)
+
+
+def pytest_runtest_setup(item):
+    # 记录用例标题, 随测试报告回传主进程写入历史记录（按需加载的用例不读取内容）
+    callspec = getattr(item, 'callspec', None)
+    case = callspec.params.get('case') if callspec else None
+    if isinstance(case, dict) and case.get('title'):
+        item.user_properties.append(('case_title', case['title']))
+
+    # 依赖的用例未通过时跳过
+    node = _case_node(item)
+    if node is None:
+        return
+    _case_ids[item.nodeid] = (node.scope, node.case_id)
+    for dep in node.depends_on:
+        if _case_passed.get((node.scope, dep)) is False:
+            pytest.skip(f'依赖的用例未通过: {dep}')
+
+
+def pytest_runtest_teardown(item):
+    # 释放按需加载的用例内容, 避免执行过程中内存随用例数增长
+    callspec = getattr(item, 'callspec', None)
+    if callspec is None:
+        return
+    from utils.data_loader import LazyCase
+    for value in callspec.params.values():
+        if isinstance(value, LazyCase):
+            value.release()
+
+
 def pytest_sessionfinish(session, exitstatus):
     """测试结束后操作
     """
+    # 关闭会话事件循环
+    if _runner is not None:
+        _runner.close()
+
     # 关闭 MySQL 连接池
-    MySQLClient.close_pool()
+    mysql_client = _loaded('core.mysql_client')
+    if mysql_client:
+        mysql_client.MySQLClient.close_pool()
+
+    # 写入历史执行记录, 供趋势分析以及下次并行执行时均衡分配用例
+    if not is_xdist_worker(session.config):
+        if _results:
+            try:
+                from config.settings import get_settings
+                HistoryStore().record_run(get_settings().APP_ENV, _results.values(), metrics.histogram.endpoints,
+                                          started_at=_session_start)
+            except sqlite3.Error as e:
+                logger.warning(f'历史执行记录写入失败: {e}')
+        # 流式报告: 写完最后一个用例后生成 HTML 页面
+        if _report_writer is not None:
+            _report_writer.close()
+            logger.info(f'测试报告: {render_html(_report_writer.path)}')
+    else:
+        # worker 的接口耗时与连接池统计随 workeroutput 回传主进程汇总
+        session.config.workeroutput['metrics'] = metrics.histogram.export()
+        if mysql_client:
+            session.config.workeroutput['mysql_pool'] = mysql_client.MySQLClient.pool_stats().to_dict()
+
+    metrics.close()
+    # perf 日志模式下汇总输出高频日志的计数
+    hot_log.flush()
+
+    # 熔断与重试预算耗尽情况
+    resilience = _loaded('core.resilience')
+    for line in (resilience.resilience.summary_lines() if resilience else []):
+        logger.warning(line)
 
 
-def pytest_collection_modifyitems(items):
+@pytest.hookimpl(optionalhook=True)
+def pytest_testnodedown(node, error):
+    """xdist worker 结束时合并其接口耗时统计"""
+    workeroutput = getattr(node, 'workeroutput', {})
+    if workeroutput.get('metrics'):
+        metrics.histogram.merge(workeroutput['metrics'])
+    if workeroutput.get('mysql_pool'):
+        _worker_pool_stats.append(workeroutput['mysql_pool'])
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_collection_modifyitems(config, items):
     # 测试用例 ID 字符转义处理
     for item in items:  
         item.name = item.name.encode("utf-8").decode("unicode-escape")  
         item._nodeid = item._nodeid.encode("utf-8").decode("unicode-escape")
 
+    # 并行执行时按历史耗时从长到短排序, 由 xdist 依次分发给空闲的 worker
+    if os.getenv('PYTEST_XDIST_WORKER'):
+        items[:] = sort_by_duration(items, load_durations())
+
+    # 按用例声明的 depends_on/uses 调整顺序, 有关联的用例归为同一个 xdist_group（--dist loadgroup 时分配到同一个 worker）
+    nodes = [_case_node(item) for item in items]
+    if any(nodes):
+        try:
+            schedule = plan(nodes)
+        except ScheduleError as e:
+            raise pytest.UsageError(str(e))
+        for i, deps in schedule.missing.items():
+            logger.warning(f'{items[i].nodeid} 依赖的用例未被收集: {", ".join(deps)}')
+        for i, name in schedule.groups.items():
+            items[i].add_marker(pytest.mark.xdist_group(name))
+        items[:] = [items[i] for i in schedule.order]
+
+    # 并发执行的用例分配到同一个 worker（--dist loadgroup）
+    for item in items:
+        if item.get_closest_marker(CONCURRENT_MARKER) and not item.get_closest_marker('xdist_group'):
+            item.add_marker(pytest.mark.xdist_group(f'concurrent:{_case_scope(item)}'))
+
 
 def pytest_addoption(parser):
     """注册自定义命令行选项"""
@@ -65,6 +381,59 @@ def pytest_addoption(parser):
         default='',
         help='HTML 报告的实际路径（用于通知推送）'
     )
+    parser.addoption(
+        '--report-jsonl',
+        action='store',
+        default='',
+        help='流式报告路径: 每个用例结束时追加一行 JSON, 结束后生成同名的 .html 页面'
+    )
+    parser.addoption(
+        '--cassette-mode',
+        action='store',
+        default='',
+        choices=['', 'record', 'replay'],
+        help='HTTP 录制/回放模式: record 录制真实请求, replay 离线回放录制结果'
+    )
+    parser.addoption(
+        '--cassette',
+        action='store',
+        default='',
+        help='cassette 文件路径 (默认: cassettes/<APP_ENV>.jsonl)'
+    )
+    parser.addoption(
+        '--metrics-jsonl',
+        action='store',
+        default='',
+        help='逐条记录请求耗时的 JSON Lines 文件路径'
+    )
+    parser.addoption(
+        '--metrics-prom',
+        action='store',
+        default='',
+        help='接口耗时直方图的 Prometheus 文本格式输出路径'
+    )
+
+
+def pytest_configure(config):
+    """注册用例标记, 按命令行选项注册请求耗时 sink 和流式报告"""
+    config.addinivalue_line('markers', f'{CASE_MARKER}(meta): 用例调度元数据（id/depends_on/uses）, 由 core.ddt 自动添加')
+    config.addinivalue_line('markers', f'{CONCURRENT_MARKER}(limit): 同一测试函数的 async 用例并发执行, 由 core.ddt 的 concurrency 参数添加')
+
+    global _report_writer
+    if config.getoption('--report-jsonl') and not is_xdist_worker(config):
+        _report_writer = ReportWriter(config.getoption('--report-jsonl'))
+
+    if config.getoption('--metrics-jsonl'):
+        metrics.add_sink(JsonLinesSink(config.getoption('--metrics-jsonl')))
+
+    if config.getoption('--metrics-prom'):
+        path = Path(config.getoption('--metrics-prom'))
+        worker = os.getenv('PYTEST_XDIST_WORKER')
+        if worker:
+            # 并行执行时每个 worker 单独输出一个文件
+            metrics.add_sink(PrometheusSink(path.with_name(f'{path.stem}_{worker}{path.suffix}'), labels={'worker': worker}))
+        else:
+            metrics.add_sink(PrometheusSink(path))
 
 
 @pytest.hookimpl(trylast=True)
@@ -73,7 +442,12 @@ def pytest_terminal_summary(terminalreporter, exitstatus, config):
     pytest 执行结束后自动触发
     - 收集测试统计
     - 发送通知
+
+    并行执行时各 worker 的结果已由 xdist 汇总到主进程, 只在主进程中发送一次通知
     """
+    if is_xdist_worker(config):
+        return
+
     # 获取统计信息
     stats = terminalreporter.stats
     total = sum(len(stats.get(key, [])) for key in ['passed', 'failed', 'error', 'skipped'])
@@ -86,9 +460,53 @@ def pytest_terminal_summary(terminalreporter, exitstatus, config):
         'skipped': len(stats.get('skipped', [])),
     }
 
+    # 各接口耗时百分位
+    lines = metrics.summary_lines()
+    if lines:
+        terminalreporter.write_sep('-', '接口耗时统计')
+        for line in lines:
+            terminalreporter.write_line(line)
+
+    # 数据库连接池统计（本进程与各 worker）
+    pool_stats = None
+    if _loaded('core.mysql_pool') or _worker_pool_stats:
+        from core.mysql_pool import MySQLPoolManager, PoolStats
+        pool_stats = MySQLPoolManager.stats()
+        for stats in _worker_pool_stats:
+            pool_stats.merge(PoolStats(**stats))
+    if pool_stats and pool_stats.checkouts:
+        terminalreporter.write_sep('-', '数据库连接池统计')
+        terminalreporter.write_line(
+            f'获取连接 {pool_stats.checkouts} 次 | 平均等待 {pool_stats.wait_time / pool_stats.checkouts * 1000:.1f}ms'
+            f' | 最长等待 {pool_stats.max_wait_time * 1000:.1f}ms | 连接耗尽 {pool_stats.exhausted} 次'
+            f' | 峰值占用 {pool_stats.peak_in_use}'
+        )
+
+    # 历史趋势: 最慢用例、耗时回归与不稳定用例
+    try:
+        from config.settings import get_settings
+        trends = HistoryStore(env=get_settings().APP_ENV).summary_lines()
+    except sqlite3.Error as e:
+        logger.warning(f'历史执行记录读取失败: {e}')
+        trends = []
+    if trends:
+        terminalreporter.write_sep('-', '历史趋势')
+        for line in trends:
+            terminalreporter.write_line(line)
+
     # 从 config 中获取动态报告路径
     report_path = config.getoption("--report-path")
 
-    # 发送通知
-    notifier = Notifier()
-    notifier.send_report(summary, report_path=report_path)
\ No newline at end of file
+    # 发送通知（后台推送, 在 pytest_unconfigure 中等待完成）, 仅在开启 NOTIFY_ENABLED 时推送
+    if not get_settings().NOTIFY_ENABLED:
+        return
+    from utils.notifier import Notifier
+    global _notifier
+    _notifier = Notifier()
+    _notifier.send_report(summary, report_path=report_path, trends=trends)
+
+
+def pytest_unconfigure(config):
+    # 等待通知推送完成, 超时或失败的通知保存到 outbox, 下次执行时重发
+    if _notifier is not None:
+        _notifier.flush()
\ No newline at end of file
@@ -0,0 +1,93 @@
+import socket
+import threading
+import time
+from typing import Optional
+
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import ConnectTimeoutError, NewConnectionError
+from urllib3.util.connection import allowed_gai_family
+
+# 连接阶段耗时, 按线程记录, 由 APIClient 在每次请求前重置、请求后读取
+_phases = threading.local()
+
+
+def reset_phases() -> None:
+    _phases.dns = None
+    _phases.connect = None
+    _phases.tls = None
+
+
+def get_phases() -> tuple[Optional[float], Optional[float], Optional[float]]:
+    """返回本线程最近一次请求的 (DNS 解析耗时, TCP 建连耗时, TLS 握手耗时), 复用连接时均为 None"""
+    return getattr(_phases, 'dns', None), getattr(_phases, 'connect', None), getattr(_phases, 'tls', None)
+
+
+class _TimedConnectionMixin:
+    """先单独解析域名并计时, 再逐个地址建连, 使 connect 不包含 DNS 耗时"""
+
+    def _new_conn(self):
+        host = self._dns_host
+        start = time.perf_counter()
+        try:
+            addresses = socket.getaddrinfo(host.strip('[]'), self.port, allowed_gai_family(), socket.SOCK_STREAM)
+        except (socket.gaierror, UnicodeError):
+            # 解析失败交给 urllib3 处理, 保持原有的异常类型
+            addresses = []
+        _phases.dns = time.perf_counter() - start
+
+        if not addresses:
+            start = time.perf_counter()
+            sock = super()._new_conn()
+            _phases.connect = time.perf_counter() - start
+            return sock
+
+        # 与 urllib3 一致, 依次尝试解析到的地址, 直到建连成功; 传入 IP 时 urllib3 不再解析域名
+        error = None
+        start = time.perf_counter()
+        for *_, address in addresses:
+            self._dns_host = address[0]
+            try:
+                sock = super()._new_conn()
+            except (ConnectTimeoutError, NewConnectionError) as e:
+                error = e
+                continue
+            finally:
+                self._dns_host = host
+            _phases.connect = time.perf_counter() - start
+            return sock
+        raise error
+
+
+class TimedHTTPConnection(_TimedConnectionMixin, HTTPConnection):
+    pass
+
+
+class TimedHTTPSConnection(_TimedConnectionMixin, HTTPSConnection):
+
+    def connect(self):
+        start = time.perf_counter()
+        super().connect()
+        # connect 包含解析、建连和 TLS 握手, 减去前两者即为握手耗时
+        _phases.tls = (time.perf_counter() - start - (getattr(_phases, 'dns', None) or 0.0)
+                       - (getattr(_phases, 'connect', None) or 0.0))
+
+
+class TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+
+class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+
+class TimedHTTPAdapter(HTTPAdapter):
+    """记录 DNS 解析、建连与 TLS 握手耗时的适配器"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': TimedHTTPConnectionPool,
+            'https': TimedHTTPSConnectionPool,
+        }
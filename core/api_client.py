@@ -1,21 +1,33 @@
+import time
+from dataclasses import replace
 from typing import Any, Dict, Optional, Union
 from requests import Session
-from config.settings import Settings
-from urllib3.util.retry import Retry
-from requests.adapters import HTTPAdapter
+from config.settings import SharedSettings
+from urllib3.util.request import ACCEPT_ENCODING
 import requests
+from requests.exceptions import ConnectionError, Timeout
 
+from core.adapters import TimedHTTPAdapter, get_phases, reset_phases
+from core.cassette import Cassette, CassetteAdapter
+from core.paginator import Paginator
+from core.resilience import CircuitOpenError, RetryPolicy, resilience
+from core.token_manager import LOGIN_ENDPOINT, token_manager
 from utils.logger import logger
+from utils.metrics import RequestTiming, endpoint_key, metrics
 
 class APIClient:
 
-    settings = Settings()
+    settings = SharedSettings()
 
     def __init__(self,
                  base_url: Optional[str] = None,
                  extra_header: Optional[Dict[str, str]] = None,
                  timeout: int = 10,
-                 max_retries: int = 3,
+                 max_retries: Optional[int] = None,
+                 retry_policies: Optional[Dict[str, RetryPolicy]] = None,
+                 cassette: Optional[Cassette] = None,
+                 pool_connections: Optional[int] = None,
+                 pool_maxsize: Optional[int] = None,
                  ):
         
         # 优先使用实例化时显式传入的 base_url
@@ -27,30 +39,53 @@ class APIClient:
         self.session.headers.update({
             'Content-Type': 'application/json',
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/143.0.0.0 Safari/537.36',
+            # 声明支持的压缩格式: gzip/deflate, 以及已安装 brotli、zstd 时的 br/zstd
+            'Accept-Encoding': ACCEPT_ENCODING,
             **(extra_header or {})
         })
 
         self.timeout = timeout
 
 
-        # 重试策略
-        retry_strategy = Retry(
-            total=max_retries,
-            backoff_factor=1,
-            status_forcelist=[429, 500, 502, 503, 504],
-            allowed_methods=['HEAD', 'GET', 'OPTIONS', 'POST', 'PUT', 'DELETE']
-        )
+        # 重试策略: 由 request 按接口策略重试（默认只重试幂等方法）, 受全局重试预算与熔断器约束
+        # max_retries 覆盖默认策略的重试次数, retry_policies 按 `METHOD /path` 匹配接口单独配置
+        self.default_retry_policy = (resilience.default_policy if max_retries is None
+                                     else replace(resilience.default_policy, max_retries=max_retries))
+        self.retry_policies = retry_policies or {}
 
 
-        # 配置适配器
-        adapter = HTTPAdapter(max_retries=retry_strategy)
-        self.session.mount('http://', adapter)
-        self.session.mount('https://', adapter)
+        # 配置适配器, 同时记录建连与 TLS 握手耗时
+        self.adapter = TimedHTTPAdapter(
+            pool_connections=pool_connections or self.settings.HTTP_POOL_CONNECTIONS,
+            pool_maxsize=pool_maxsize or self.settings.HTTP_POOL_MAXSIZE,
+            max_retries=0,
+        )
+        self.session.mount('http://', self.adapter)
+        self.session.mount('https://', self.adapter)
+
+        # 录制/回放
+        self.cassette: Optional[Cassette] = None
+        if cassette:
+            self.use_cassette(cassette)
 
 
         # token
         self.token: Optional[str] = None
 
+        # 通过 authorize 登录的账号, 请求前自动从 token_manager 刷新 token
+        self._credentials: Optional[tuple] = None
+
+
+    def use_cassette(self, cassette: Cassette) -> None:
+        """启用请求录制或回放
+
+        Args:
+            cassette (Cassette): record 模式下记录所有请求与响应, replay 模式下直接返回录制的响应
+        """
+        self.cassette = cassette
+        adapter = CassetteAdapter(self.adapter, cassette)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
 
 
     def set_token(self, token: str) -> None:
@@ -69,7 +104,23 @@ class APIClient:
         """清除 token
         """
         self.token = None
+        self._credentials = None
         self.session.headers.pop('Authorization', None)
+
+
+    def authorize(self, username: Optional[str] = None, password: Optional[str] = None) -> None:
+        """登录并设置 token, token 由 token_manager 统一缓存和刷新
+
+        之后每次请求前都会检查 token 是否即将过期, 过期前自动刷新;
+        录制模式下忽略已缓存的 token 重新登录, 保证登录请求写入 cassette, 回放时不依赖本地缓存
+
+        Args:
+            username (str, optional): 用户名, 默认使用配置中的 USERNAME
+            password (str, optional): 密码, 默认使用配置中的 PASSWORD
+        """
+        recording = self.cassette is not None and self.cassette.mode == 'record'
+        self.set_token(token_manager.get_token(self, username, password, force=recording))
+        self._credentials = (username, password)
     
 
     def request(self, 
@@ -85,6 +136,12 @@ class APIClient:
                 ) -> requests.Response:
         full_url = self.base_url.rstrip('/') + '/' + endpoint.lstrip('/')
 
+        # 刷新即将过期的 token（命中缓存时只是一次字典查询）
+        if self._credentials and endpoint.strip('/') != LOGIN_ENDPOINT:
+            token = token_manager.get_token(self, *self._credentials)
+            if token != self.token:
+                self.set_token(token)
+
         # 处理请求数据
         req_kwargs = {
             'params': params,
@@ -98,14 +155,105 @@ class APIClient:
         req_kwargs = {k : v for k, v in req_kwargs.items() if v is not None }
 
         # 发送请求
-        try:
-            response = self.session.request(method=method, url=full_url, **req_kwargs)
-        except Exception as e:
-            logger.error(f'{method} 请求失败: {e}')
-            raise e
+        # 重试策略与熔断按 `METHOD /path` 匹配, 与耗时统计一致（路径中的 id 已模板化）
+        key = endpoint_key(method, endpoint)
+        policy = self.retry_policy_for(key)
+        breaker = resilience.breaker(key)
+        resilience.budget.deposit()
+
+        start = time.perf_counter()
+        attempt = 0
+        while True:
+            reset_phases()
+            try:
+                # 熔断时直接抛出 CircuitOpenError, 不发送请求
+                breaker.before_request()
+                response = self.session.request(method=method, url=full_url, **req_kwargs)
+            except Exception as e:
+                # 熔断拒绝的请求未发送; 其它异常都要更新熔断器, 否则半开状态下探测名额不会释放
+                if isinstance(e, (ConnectionError, Timeout)):
+                    breaker.record_failure()
+                elif not isinstance(e, CircuitOpenError):
+                    breaker.release()
+                if self._should_retry(policy, method, attempt, e):
+                    time.sleep(policy.backoff(attempt))
+                    attempt += 1
+                    continue
+
+                dns, connect, tls = get_phases()
+                metrics.record(RequestTiming(method=method, endpoint=endpoint, status_code=None,
+                                             total=time.perf_counter() - start, dns=dns, connect=connect, tls=tls,
+                                             retries=attempt, error=str(e)))
+                logger.error(f'{method} 请求失败: {e}')
+                raise e
+
+            if response.status_code >= 500:
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+
+            if response.status_code in policy.status_forcelist and self._should_retry(policy, method, attempt):
+                wait = policy.backoff(attempt, response.headers.get('Retry-After'))
+                logger.warning(f'{key} 响应 {response.status_code}, {wait:.2f}s 后第 {attempt + 1} 次重试')
+                response.close()
+                time.sleep(wait)
+                attempt += 1
+                continue
+            break
+
+        self._record_timing(method, endpoint, response, time.perf_counter() - start, attempt,
+                            streamed=bool(req_kwargs.get('stream')))
 
- 
         return response
+
+
+    def retry_policy_for(self, key: str) -> RetryPolicy:
+        """接口的重试策略, 优先使用实例的 retry_policies, 其次为全局注册的策略"""
+        policy = resilience.policy_for(key, self.retry_policies)
+        return self.default_retry_policy if policy is resilience.default_policy else policy
+
+
+    @staticmethod
+    def _should_retry(policy: RetryPolicy, method: str, attempt: int, error: Optional[Exception] = None) -> bool:
+        """是否还能重试: 方法允许重试、未达到重试次数、全局重试预算充足; 熔断与非网络异常不重试"""
+        if error is not None and (isinstance(error, CircuitOpenError)
+                                  or not isinstance(error, (ConnectionError, Timeout))):
+            return False
+        return policy.allows(method) and attempt < policy.max_retries and resilience.budget.withdraw()
+
+
+    @staticmethod
+    def _record_timing(method: str, endpoint: str, response: requests.Response, total: float, retries: int = 0,
+                       streamed: bool = False) -> None:
+        """记录请求耗时（包括重试）, 流式响应不读取响应体, 使用 Content-Length 作为响应大小"""
+        dns, connect, tls = get_phases()
+        body = response.request.body or b''
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+
+        # response_bytes 为解压后的大小, wire_bytes 为实际传输的（压缩后的）大小
+        content_length = int(response.headers.get('Content-Length') or 0)
+        if not streamed:
+            response_bytes = len(response.content or b'')
+            tell = getattr(response.raw, 'tell', None)
+            wire_bytes = tell() if tell else content_length
+        else:
+            response_bytes = wire_bytes = content_length
+
+        metrics.record(RequestTiming(
+            method=method,
+            endpoint=endpoint,
+            status_code=response.status_code,
+            total=total,
+            ttfb=response.elapsed.total_seconds(),
+            dns=dns,
+            connect=connect,
+            tls=tls,
+            retries=retries,
+            request_bytes=len(body),
+            response_bytes=response_bytes,
+            wire_bytes=wire_bytes,
+        ))
     
     
     # 快捷请求方法
@@ -133,6 +281,18 @@ class APIClient:
         return self.request('OPTIONS', endpoint, **kwargs)
 
 
+    def paginate(self, endpoint: str, **kwargs) -> Paginator:
+        """分页接口迭代器, 逐条产出所有分页中的数据, 同时在后台预取后续页
+
+        参数见 core.paginator.Paginator
+
+        Example:
+            for user in client.paginate('/users', page_size=500, prefetch=4):
+                ...
+        """
+        return Paginator(self, endpoint, **kwargs)
+
+
 # 快捷客户端方法，用于某些特殊场景
 def unauthorized_client():
     """无认证的通用客户端"""
@@ -144,16 +304,5 @@ def authorized_client():
     带认证的通用客户端
     """
     api_client = unauthorized_client()
-    resp = api_client.request('POST', f'login', json={
-        'username': Settings().USERNAME,
-        'password': Settings().PASSWORD
-    })
-    assert resp.status_code == 200
-
-    token = resp.json()['data']['token']
-
-    assert token, '创建带认证的客户端失败, 未获取到 token'
-
-    api_client.set_token(token)
-
+    api_client.authorize()
     return api_client
\ No newline at end of file
@@ -0,0 +1,182 @@
+import asyncio
+from typing import Any, Awaitable, Dict, Iterable, List, Optional, Union
+from urllib.parse import urlsplit
+
+import httpx
+
+from config.settings import SharedSettings
+from utils.logger import logger
+
+
+class AsyncAPIClient:
+    """基于 asyncio 的 HTTP 客户端, 与 `APIClient` 保持相同的调用方式
+
+    - 底层为 httpx.AsyncClient, 所有请求共享同一个有界连接池
+    - 额外对每个 host 的并发请求数做限制, 避免并发执行用例时压垮单个服务
+    - 返回的 httpx.Response 同样提供 `status_code`、`json()`, 可直接配合 `utils.assertions` 使用
+
+    用法：
+        async with AsyncAPIClient() as client:
+            resp = await client.post('/register', json={...})
+    """
+
+    settings = SharedSettings()
+
+    def __init__(self,
+                 base_url: Optional[str] = None,
+                 extra_header: Optional[Dict[str, str]] = None,
+                 timeout: int = 10,
+                 max_retries: int = 3,
+                 max_connections: int = 100,
+                 max_connections_per_host: int = 20,
+                 transport: Optional[httpx.AsyncBaseTransport] = None,
+                 ):
+
+        # 优先使用实例化时显式传入的 base_url
+        self.base_url = base_url or self.settings.API_BASE_URL
+
+        self.timeout = timeout
+
+        self.max_connections_per_host = max_connections_per_host
+
+        # 连接池上限, 超出后请求在池内排队等待
+        limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+        )
+
+        # httpx 的 retries 仅对连接失败重试, 与同步客户端的状态码重试不同
+        transport = transport or httpx.AsyncHTTPTransport(limits=limits, retries=max_retries)
+
+        self.client = httpx.AsyncClient(
+            headers={
+                'Content-Type': 'application/json',
+                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/143.0.0.0 Safari/537.36',
+                **(extra_header or {})
+            },
+            limits=limits,
+            transport=transport,
+        )
+
+        # 每个 host 一个信号量, 惰性创建
+        self._host_semaphores: Dict[str, asyncio.Semaphore] = {}
+
+        # token
+        self.token: Optional[str] = None
+
+
+    async def __aenter__(self):
+        return self
+
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.aclose()
+
+
+    async def aclose(self) -> None:
+        """关闭客户端, 释放连接池中的所有连接
+        """
+        await self.client.aclose()
+
+
+    def set_token(self, token: str) -> None:
+        """为请求头添加 token
+
+        Args:
+            token (str): 默认 Bearer Token
+        """
+        self.token = token
+        self.client.headers.update({
+            'Authorization': f'Bearer {token}'
+        })
+
+
+    def clear_token(self) -> None:
+        """清除 token
+        """
+        self.token = None
+        self.client.headers.pop('Authorization', None)
+
+
+    def _host_semaphore(self, url: str) -> asyncio.Semaphore:
+        host = urlsplit(url).netloc
+        semaphore = self._host_semaphores.get(host)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.max_connections_per_host)
+            self._host_semaphores[host] = semaphore
+        return semaphore
+
+
+    async def request(self,
+                      method: str,
+                      endpoint: str,
+                      *,
+                      params: Optional[Dict[str, Any]] = None,
+                      data: Optional[Union[Dict[str, Any], str]] = None,
+                      json: Optional[Dict[str, Any]] = None,
+                      headers: Optional[Dict[str, str]] = None,
+                      timeout: Optional[int] = None,
+                      **kwargs,
+                      ) -> httpx.Response:
+        full_url = self.base_url.rstrip('/') + '/' + endpoint.lstrip('/')
+
+        # 处理请求数据, httpx 中字符串请求体使用 content 参数
+        req_kwargs = {
+            'params': params,
+            'json': json,
+            'headers': headers,
+            'timeout': timeout or self.timeout,
+            **kwargs,
+        }
+        if isinstance(data, (str, bytes)):
+            req_kwargs['content'] = data
+        else:
+            req_kwargs['data'] = data
+        # 移除 None 值
+        req_kwargs = {k : v for k, v in req_kwargs.items() if v is not None }
+
+        # 发送请求
+        try:
+            async with self._host_semaphore(full_url):
+                response = await self.client.request(method=method, url=full_url, **req_kwargs)
+        except Exception as e:
+            logger.error(f'{method} 请求失败: {e}')
+            raise e
+
+        return response
+
+
+    # 快捷请求方法
+    async def get(self, endpoint: str, **kwargs) -> httpx.Response:
+        return await self.request('GET', endpoint, **kwargs)
+
+
+    async def post(self, endpoint: str, **kwargs) -> httpx.Response:
+        return await self.request('POST', endpoint, **kwargs)
+
+
+    async def put(self, endpoint: str, **kwargs) -> httpx.Response:
+        return await self.request('PUT', endpoint, **kwargs)
+
+
+    async def delete(self, endpoint: str, **kwargs) -> httpx.Response:
+        return await self.request('DELETE', endpoint, **kwargs)
+
+
+    async def patch(self, endpoint: str, **kwargs) -> httpx.Response:
+        return await self.request('PATCH', endpoint, **kwargs)
+
+
+    async def options(self, endpoint: str, **kwargs) -> httpx.Response:
+        return await self.request('OPTIONS', endpoint, **kwargs)
+
+
+    @staticmethod
+    async def gather(requests: Iterable[Awaitable[httpx.Response]],
+                     return_exceptions: bool = False) -> List[Union[httpx.Response, BaseException]]:
+        """并发等待多个请求, 结果顺序与传入顺序一致
+
+        Example:
+            >>> resps = await client.gather(client.post('/register', json=case['data']) for case in cases)
+        """
+        return await asyncio.gather(*requests, return_exceptions=return_exceptions)
@@ -0,0 +1,205 @@
+import base64
+import hashlib
+import json
+import threading
+from datetime import timedelta
+from pathlib import Path
+from typing import Dict, List, Literal, Optional, Union
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+from utils.file_lock import FileLock
+from utils.logger import logger
+
+CassetteMode = Literal['record', 'replay']
+
+# 响应体以解码后的内容保存, 这些头部回放时不再适用
+_SKIPPED_HEADERS = {'content-encoding', 'transfer-encoding', 'content-length', 'connection'}
+
+
+class CassetteMissError(Exception):
+    """回放模式下请求在 cassette 中没有匹配的记录"""
+
+
+def _normalize_url(url: str) -> str:
+    parts = urlsplit(url)
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((parts.scheme, parts.netloc.lower(), parts.path, query, ''))
+
+
+def _normalize_body(body: Union[bytes, str, None]) -> bytes:
+    if body is None:
+        return b''
+    if isinstance(body, str):
+        body = body.encode('utf-8')
+    # JSON 请求体按键排序后比较, 不受字段顺序和空白影响
+    try:
+        return json.dumps(json.loads(body), sort_keys=True, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+    except ValueError:
+        return body
+
+
+def seed_path(path: Union[str, Path]) -> Path:
+    """cassette 录制时的 DATA_SEED 保存在同名的 .seed 文件中"""
+    path = Path(path)
+    return path.with_name(path.name + '.seed')
+
+
+def load_seed(path: Union[str, Path]) -> Optional[int]:
+    """cassette 录制时的 DATA_SEED, 没有记录时返回 None"""
+    try:
+        return int(seed_path(path).read_text(encoding='utf-8').strip())
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def request_key(request: requests.PreparedRequest) -> str:
+    """请求的匹配键: 方法 + 规范化 URL + 规范化请求体"""
+    digest = hashlib.sha1()
+    digest.update(request.method.upper().encode())
+    digest.update(b' ')
+    digest.update(_normalize_url(request.url).encode())
+    digest.update(b'\n')
+    digest.update(_normalize_body(request.body))
+    return digest.hexdigest()
+
+
+class Cassette:
+    """HTTP 请求录制与回放
+
+    - record: 正常发送请求, 并将请求/响应逐行追加写入 cassette 文件（JSON Lines）
+    - replay: 启动时将 cassette 文件读入内存哈希索引, 直接返回录制的响应, 不发起任何网络请求
+
+    相同请求录制多次时按录制顺序依次回放, 超出后重复最后一次的响应。
+    多个 worker 进程录制到同一个文件时通过文件锁逐行追加, 记录不会交错。
+    重新录制前请删除旧的 cassette 文件。
+
+    请求体中的 `{{ unique.xxx }}` 由 DATA_SEED 生成并参与匹配, 传入 seed 时录制模式将其保存到 .seed 文件,
+    回放模式检查与录制时的种子一致, 不一致时所有请求都无法匹配。
+    """
+
+    def __init__(self, path: Union[str, Path], mode: CassetteMode, seed: Optional[int] = None):
+        if mode not in ('record', 'replay'):
+            raise ValueError(f'不支持的 cassette 模式: {mode}, 仅支持 record, replay')
+
+        self.path = Path(path)
+        self.mode = mode
+        self._index: Dict[str, List[dict]] = {}
+        self._cursor: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._file_lock = FileLock(self.path.with_name(self.path.name + '.lock'))
+        self._file = None
+
+        if mode == 'replay':
+            self._check_seed(seed)
+            self._load()
+        else:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.path, 'a', encoding='utf-8')
+            if seed is not None:
+                self._save_seed(seed)
+
+
+    def _check_seed(self, seed: Optional[int]) -> None:
+        recorded = load_seed(self.path)
+        if seed is None or recorded is None:
+            return
+        if seed != recorded:
+            raise ValueError(f'cassette 录制时的 DATA_SEED 为 {recorded}, 当前为 {seed}, 请使用 --seed {recorded} 回放')
+
+
+    def _save_seed(self, seed: int) -> None:
+        path = seed_path(self.path)
+        with self._file_lock:
+            recorded = load_seed(self.path)
+            if recorded == seed:
+                return
+            if recorded is not None and self.path.stat().st_size:
+                logger.warning(f'cassette 中已有以 DATA_SEED={recorded} 录制的记录, 回放时将无法匹配, 请删除 {self.path} 后重新录制')
+            path.write_text(f'{seed}\n', encoding='utf-8')
+
+
+    def _load(self) -> None:
+        if not self.path.exists():
+            raise FileNotFoundError(f'cassette 文件不存在: {self.path}, 请先以 record 模式录制')
+
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    self._index.setdefault(record['key'], []).append(record)
+
+        logger.info(f'加载 cassette: {self.path} —— {sum(len(v) for v in self._index.values())} 条记录')
+
+
+    def record(self, request: requests.PreparedRequest, response: requests.Response) -> None:
+        record = {
+            'key': request_key(request),
+            'method': request.method,
+            'url': request.url,
+            'status': response.status_code,
+            'reason': response.reason,
+            'headers': {k: v for k, v in response.headers.items() if k.lower() not in _SKIPPED_HEADERS},
+            'body': base64.b64encode(response.content).decode('ascii'),
+        }
+        line = json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n'
+        # 较大的记录会分多次写入, 持有文件锁直到写完, 避免与其它 worker 的记录交错
+        with self._lock, self._file_lock:
+            self._file.write(line)
+            self._file.flush()
+
+
+    def play(self, request: requests.PreparedRequest) -> requests.Response:
+        key = request_key(request)
+        records = self._index.get(key)
+        if not records:
+            raise CassetteMissError(
+                f'cassette 中没有匹配的请求: {request.method} {request.url} ({self.path})\n'
+                f'请求体: {_normalize_body(request.body)[:500]!r}'
+            )
+
+        with self._lock:
+            cursor = self._cursor.get(key, 0)
+            self._cursor[key] = cursor + 1
+        record = records[min(cursor, len(records) - 1)]
+
+        response = requests.Response()
+        response.status_code = record['status']
+        response.reason = record['reason']
+        response.headers = CaseInsensitiveDict(record['headers'])
+        response._content = base64.b64decode(record['body'])
+        response._content_consumed = True
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+        response.url = request.url
+        response.request = request
+        response.elapsed = timedelta(0)
+        return response
+
+
+    def close(self) -> None:
+        if self._file:
+            self._file.close()
+            self._file = None
+
+
+class CassetteAdapter(BaseAdapter):
+    """挂载到 Session 上的适配器, 录制模式下包装真实的适配器, 回放模式下不访问网络"""
+
+    def __init__(self, adapter: HTTPAdapter, cassette: Cassette):
+        super().__init__()
+        self.adapter = adapter
+        self.cassette = cassette
+
+    def send(self, request, **kwargs):
+        if self.cassette.mode == 'replay':
+            return self.cassette.play(request)
+
+        response = self.adapter.send(request, **kwargs)
+        self.cassette.record(request, response)
+        return response
+
+    def close(self):
+        self.adapter.close()
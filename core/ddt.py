@@ -1,9 +1,13 @@
+import inspect
+
 import pytest
 
-from utils.data_loader import load_test_data
+from core.scheduler import CASE_MARKER, CONCURRENT_MARKER, case_meta
+from utils.data_factory import factory
+from utils.data_loader import LazyCase, index_test_data, load_test_data
 
 
-def ddt(file_name: str):
+def ddt(file_name: str, lazy: bool = False, concurrency: int = 0):
     """
     数据驱动装饰器, 配合 pytest 参数化使用
 
@@ -12,20 +16,70 @@ def ddt(file_name: str):
         def test_register_user(self, case):
             ...
 
+        # 用例中声明 depends_on/uses 时, 按依赖顺序执行, 占用同一资源的用例串行执行（见 core/scheduler.py）
+        # - title: "登录成功"
+        #   id: login_gustavo
+        #   depends_on: [register_gustavo]
+        #   uses: ["user:gustavo"]
+
+        # 用例中的 `{{ unique.email }}` 等模板在加载时渲染为唯一值, seed 声明的前置数据在会话开始时批量写入（见 utils/data_factory.py）
+        # - title: "创建用户 - 邮箱已存在"
+        #   seed:
+        #     t_user_info: [{name: "{{ unique.username.gustavo }}", email: "{{ unique.email.gustavo }}"}]
+        #   data:
+        #     email: "{{ unique.email.gustavo }}"
+
+        # async 用例并发执行, 最多 10 条同时执行（只使用会话级别的 fixture, 见 conftest.py 的 pytest_collection_finish）
+        @ddt('test_login.json', concurrency=10)
+        async def test_login(case, async_client):
+            ...
+
+        # 超大用例文件（.jsonl 或多文档 YAML）按需加载
+        @ddt('test_user_bulk.jsonl', lazy=True)
+        def test_register_user_bulk(self, case):
+            ...
+
     Args:
         file_name (str): 数据文件名, 不要路径
+        lazy (bool): 是否按需加载. 开启后参数化中只保存每条用例的偏移量,
+            用例内容在执行时才读取, 用例 id 固定为 `case_<序号>`, 不支持 depends_on/uses/seed
+        concurrency (int): 大于 0 时 `async def` 用例并发执行的最大数量, 同一函数的全部用例在执行第一条时一起执行;
+            声明了 depends_on/uses 的用例仍按顺序单独执行
     """
-    test_cases = load_test_data(file_name)
+    def decorator(func):
+        # 测试函数作为用例键的一部分, 多个测试函数加载同一个用例文件时生成不同的唯一值
+        scope = f'{func.__module__}.{func.__qualname__}'
+        func = _parametrize(file_name, lazy, scope)(func)
+        if concurrency > 0 and inspect.iscoroutinefunction(func):
+            func = getattr(pytest.mark, CONCURRENT_MARKER)(concurrency)(func)
+        return func
+
+    return decorator
+
 
-    # 测试用例 id
-    ids = []
+def _parametrize(file_name: str, lazy: bool, scope: str):
+    if lazy:
+        return pytest.mark.parametrize(
+            argnames='case',
+            argvalues=[LazyCase(file_name, offset, i, scope) for i, offset in enumerate(index_test_data(file_name))],
+            ids=lambda case: f'case_{case.index + 1}'
+        )
+
+    test_cases = load_test_data(file_name, scope=scope)
+
+    params = []
     for i, case in enumerate(test_cases):
         # 以测试用例 title 作为 id, 如果为空, 则使用索引作为 id
         case_id = case.get('title') or f'case_{i+1}'
-        ids.append(case_id)
-    
+        # 调度元数据记录在 case 标记上, 由 conftest 在收集完成后统一排序和分组
+        meta = case_meta(case)
+        marks = [getattr(pytest.mark, CASE_MARKER)(meta)] if meta else []
+        # 前置数据在收集时登记, 会话开始时统一写入
+        if case.get('seed'):
+            factory.add_seed(case['seed'])
+        params.append(pytest.param(case, id=case_id, marks=marks))
+
     return pytest.mark.parametrize(
         argnames='case',
-        argvalues=test_cases,
-        ids=ids
-    )
\ No newline at end of file
+        argvalues=params,
+    )
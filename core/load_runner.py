@@ -0,0 +1,208 @@
+import asyncio
+import itertools
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from core.async_api_client import AsyncAPIClient
+from utils.data_factory import DataFactory
+from utils.logger import logger
+from utils.metrics import LatencyHistogram
+
+# 不带请求体的方法, 用例中的 data 作为查询参数发送
+QUERY_METHODS = frozenset({'GET', 'DELETE', 'HEAD', 'OPTIONS'})
+
+
+@dataclass
+class CaseLoadStats:
+    """单条用例的压测统计"""
+    latency: LatencyHistogram = field(default_factory=LatencyHistogram)
+    # 请求异常（超时、连接失败等）
+    errors: int = 0
+    # 响应状态码与 expected.status_code 不一致
+    mismatches: int = 0
+
+    @property
+    def failures(self) -> int:
+        return self.errors + self.mismatches
+
+
+class LoadRunner:
+    """使用数据驱动用例进行压测
+
+    - 指定 rps 时为开放模型: 按固定间隔安排请求, 不等待前一个请求返回;
+      耗时从计划发送时间开始计算, 服务端变慢导致的排队时间也计入耗时, 避免协调遗漏（coordinated omission）
+    - 未指定 rps 时为封闭模型: concurrency 个并发循环发送请求
+    - 每个响应都会校验 expected.status_code
+
+    用例中可通过 `request` 字段覆盖请求方法和接口, 否则使用统一的 method/endpoint;
+    GET/DELETE 等方法的 data（或 params）作为查询参数发送, 其余方法作为 JSON 请求体;
+    传入 factory 时用例为未渲染的原始用例, 每次请求渲染一次 `{{ unique.xxx }}`, 每个请求得到新的唯一值:
+
+    ```yaml
+    - title: "创建用户 - 成功"
+      request:
+        method: POST
+        endpoint: /register
+      data: {...}
+      expected:
+        status_code: 201
+    ```
+    """
+
+    def __init__(self,
+                 cases: List[Dict[str, Any]],
+                 method: str = 'POST',
+                 endpoint: Optional[str] = None,
+                 rps: Optional[float] = None,
+                 concurrency: int = 10,
+                 duration: float = 60,
+                 max_in_flight: int = 1000,
+                 client: Optional[AsyncAPIClient] = None,
+                 factory: Optional[DataFactory] = None,
+                 ):
+        if not cases:
+            raise ValueError('压测用例为空')
+        if endpoint is None and any('endpoint' not in case.get('request', {}) for case in cases):
+            raise ValueError('未指定接口: 请通过 endpoint 参数或用例中的 request.endpoint 指定')
+
+        self.cases = cases
+        self.method = method
+        self.endpoint = endpoint
+        self.rps = rps
+        self.concurrency = concurrency
+        self.duration = duration
+        self.factory = factory
+        self.client = client or AsyncAPIClient(max_connections=max_in_flight,
+                                               max_connections_per_host=max_in_flight)
+        # 开放模型下同时在途的请求数上限, 超出时新请求排队（排队时间计入耗时）
+        self._in_flight = asyncio.Semaphore(max_in_flight)
+        self.stats: Dict[str, CaseLoadStats] = {}
+        self.elapsed = 0.0
+
+
+    def _case_title(self, index: int) -> str:
+        return self.cases[index].get('title') or f'case_{index + 1}'
+
+
+    def _case(self, index: int, seq: int) -> Dict[str, Any]:
+        case = self.cases[index]
+        if self.factory is None:
+            return case
+        # 以请求序号作为用例键, 每个请求的唯一值都不同
+        return self.factory.render(case, f'load|{index}#{seq}')
+
+
+    async def _send(self, index: int, seq: int, intended_start: float) -> None:
+        case = self._case(index, seq)
+        request = case.get('request', {})
+        stats = self.stats.setdefault(self._case_title(index), CaseLoadStats())
+
+        method = request.get('method', self.method).upper()
+        if method in QUERY_METHODS:
+            kwargs = {'params': case.get('params', case.get('data'))}
+        else:
+            kwargs = {'params': case.get('params'), 'json': case.get('data')}
+
+        try:
+            async with self._in_flight:
+                resp = await self.client.request(method, request.get('endpoint', self.endpoint), **kwargs)
+        except Exception:
+            stats.errors += 1
+            stats.latency.add(time.perf_counter() - intended_start)
+            return
+
+        stats.latency.add(time.perf_counter() - intended_start)
+
+        expected_status = case.get('expected', {}).get('status_code')
+        if expected_status is not None and resp.status_code != expected_status:
+            stats.mismatches += 1
+
+
+    async def _run_open(self, start: float) -> None:
+        interval = 1 / self.rps
+        tasks = set()
+        i = 0
+        while True:
+            intended_start = start + i * interval
+            if intended_start - start >= self.duration:
+                break
+            delay = intended_start - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+            task = asyncio.create_task(self._send(i % len(self.cases), i, intended_start))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+            i += 1
+
+        if tasks:
+            await asyncio.gather(*tasks)
+
+
+    async def _run_closed(self, start: float) -> None:
+        counter = itertools.count()
+
+        async def worker():
+            while time.perf_counter() - start < self.duration:
+                seq = next(counter)
+                await self._send(seq % len(self.cases), seq, time.perf_counter())
+
+        await asyncio.gather(*(worker() for _ in range(self.concurrency)))
+
+
+    async def run(self) -> Dict[str, CaseLoadStats]:
+        mode = f'开放模型 {self.rps} rps' if self.rps else f'封闭模型 {self.concurrency} 并发'
+        logger.info(f'开始压测 | {mode} | 持续 {self.duration}s | 用例数: {len(self.cases)}')
+
+        start = time.perf_counter()
+        try:
+            if self.rps:
+                await self._run_open(start)
+            else:
+                await self._run_closed(start)
+        finally:
+            self.elapsed = time.perf_counter() - start
+            await self.client.aclose()
+
+        return self.stats
+
+
+    def report_lines(self) -> List[str]:
+        """按用例输出吞吐量、错误率和耗时百分位"""
+        width = max([len(title) for title in self.stats] + [5])
+        lines = [f'{"title":<{width}}  {"count":>7}  {"rps":>8}  {"err%":>6}  {"p50(ms)":>8}  {"p95(ms)":>8}  {"p99(ms)":>8}']
+        for title, stats in self.stats.items():
+            latency = stats.latency
+            lines.append(
+                f'{title:<{width}}  {latency.count:>7}  {latency.count / (self.elapsed or 1):>8.1f}  '
+                f'{stats.failures / (latency.count or 1) * 100:>6.2f}  '
+                f'{latency.percentile(50) * 1000:>8.1f}  {latency.percentile(95) * 1000:>8.1f}  {latency.percentile(99) * 1000:>8.1f}'
+            )
+        return lines
+
+
+def run_load_test(cases: List[Dict[str, Any]], token: Optional[str] = None, **kwargs) -> int:
+    """执行压测并输出报告
+
+    Args:
+        cases (List[Dict[str, Any]]): 数据驱动用例, 传入 factory 时为未渲染的原始用例
+        token (str, optional): 需要认证时使用的 token
+        **kwargs: 传给 LoadRunner 的参数
+
+    Returns:
+        int: 退出码, 存在请求异常或状态码不匹配时为 1
+    """
+    runner = LoadRunner(cases, **kwargs)
+    if token:
+        runner.client.set_token(token)
+
+    stats = asyncio.run(runner.run())
+
+    logger.info('压测结果:\n' + '\n'.join(runner.report_lines()))
+
+    failures = sum(s.failures for s in stats.values())
+    if failures:
+        logger.error(f'压测存在 {failures} 个失败请求（异常或状态码不匹配）')
+        return 1
+    return 0
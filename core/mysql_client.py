@@ -1,16 +1,21 @@
-from typing import Any, Dict, List, Optional, Union, cast
-from dbutils.pooled_db import PooledDB
-import pymysql
-from pymysql.cursors import DictCursor
+import re
+from collections import namedtuple
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Type, Union, cast
+from pydantic import BaseModel
+from pymysql.cursors import SSCursor, SSDictCursor
 from pymysql.connections import Connection
-from config.settings import Settings
-from utils.logger import logger
+from config.settings import SharedSettings, get_settings
+from core.mysql_pool import MySQLPool, MySQLPoolManager, PoolStats
+from core.query_cache import NO_EXPIRY, QueryCache, extract_tables, is_read_only, normalize_sql, schema_tag
+from utils.logger import hot_log, logger
 
 class MySQLClient:
 
-    settings = Settings()
+    settings = SharedSettings()
 
-    _pool: Optional[PooledDB] = None
+    # 查询结果缓存, 整个会话内所有实例共享
+    query_cache = QueryCache(maxsize=get_settings().MYSQL_QUERY_CACHE_SIZE, ttl=get_settings().MYSQL_QUERY_CACHE_TTL)
 
     def __init__(self,
                  host: Optional[str] = None,
@@ -18,61 +23,123 @@ class MySQLClient:
                  database: Optional[str] = None,
                  user: Optional[str] = None,
                  password: Optional[str] = None,
+                 cache: bool = False,
                  ):
-        pool_config = {
-            'maxconnections': 10,    # 连接池最大连接数
-            'mincached': 3,
-            'maxcached': 5,
-            'blocking': True
-        }
-
-        # 连接池单例
-        if MySQLClient._pool is None:
-            MySQLClient._pool = PooledDB(
-                creator=pymysql,
-                cursorclass=DictCursor,
-                **pool_config,
-                host=host or self.settings.MYSQL_HOST,
-                port=port or self.settings.MYSQL_PORT,
-                database=database or None,
-                user=user or self.settings.MYSQL_USER,
-                password=password or self.settings.MYSQL_PASSWORD,
-                )
+        """
+        Args:
+            cache (bool): 是否缓存只读查询结果（query_one/query_all/query_value）, 适用于反复查询的参考数据;
+                事务内的查询始终不走缓存, 通过本客户端执行的写操作会自动失效相关表的缓存
+        """
+        # 相同连接参数共用一个连接池, 池大小由配置 MYSQL_POOL_SIZE / MYSQL_MAX_OVERFLOW 决定
+        self.pool: MySQLPool = MySQLPoolManager.get_pool(host, port, database, user, password)
         
         self.conn = None
         self.cursor = None
+
+        # 事务嵌套深度, 大于 0 时 execute 等写操作不自动提交
+        self._transaction_depth = 0
+
+        # 服务端 max_allowed_packet, 首次批量写入时查询
+        self._max_allowed_packet: Optional[int] = None
+
+        # 未读取完的流式游标, 归还连接前关闭
+        self._stream_cursors = set()
+
+        # 事务中执行的写操作, 提交后再失效相关的查询缓存
+        self._pending_writes: List[str] = []
+
+        self.use_cache = cache
     
     # 实现上下文管理器操作
     def __enter__(self):
-        self.conn = cast(Connection, MySQLClient._pool.connection())
+        self.conn = cast(Connection, self.pool.connection())
         self.cursor = self.conn.cursor()
-        logger.info('获取数据库连接')
+        hot_log.info('mysql.checkout', '获取数据库连接')
         return self
     
 
     def __exit__(self, exc_type, exc_val, exc_tb):
+        # 流式游标未读取完时连接不可复用, 先关闭（pymysql 会丢弃剩余结果）
+        for cursor in list(self._stream_cursors):
+            cursor.close()
+        self._stream_cursors.clear()
+
         if self.cursor:
             self.cursor.close()
 
         if self.conn:
-            self.conn.close()   # 归还连接
+            self.pool.release(self.conn)   # 归还连接
 
-        logger.info('归还数据库连接到连接池')
+        hot_log.info('mysql.release', '归还数据库连接到连接池')
 
 
     @classmethod
     def close_pool(cls):
-        """手动关闭连接池"""
-        if cls._pool is not None:
-            try:
-                cls._pool.close()
-                logger.info('连接池关闭成功')
-            except Exception as e:
-                logger.error(f'关闭连接池时出错: {e}')
-            finally:
-                cls._pool = None
-        else:
+        """手动关闭所有连接池"""
+        if not MySQLPoolManager._pools:
             logger.warning('连接池未初始化或已关闭')
+            return
+
+        errors = MySQLPoolManager.close_all()
+        for e in errors:
+            logger.error(f'关闭连接池时出错: {e}')
+        if not errors:
+            logger.info('连接池关闭成功')
+
+
+    @classmethod
+    def invalidate_cache(cls, table: Optional[str] = None) -> int:
+        """失效指定表的查询缓存（包括表结构缓存）, 不指定表名时清空全部
+
+        通过其它途径（如被测接口）修改了数据时, 需要手动调用
+
+        Returns:
+            int: 失效的缓存条数
+        """
+        return cls.query_cache.invalidate(table)
+
+
+    def _cached(self, kind: str, sql: str, params, fetch, force: bool = False, ttl: Optional[float] = None,
+                tables: Optional[frozenset] = None):
+        """读穿缓存: 未开启缓存、在事务中、非只读 SQL 或无法解析引用的表时直接查询"""
+        if not (self.use_cache or force) or self._transaction_depth > 0 or not is_read_only(sql):
+            return fetch()
+
+        key = (self.pool.name, kind, normalize_sql(sql), repr(params))
+        hit, value = self.query_cache.get(key)
+        if not hit:
+            tables = tables or extract_tables(sql)
+            if tables is None:
+                # 无法确定依赖的表时无法按表失效, 不缓存
+                return fetch()
+            # 查询期间其它连接提交了写操作时, 查到的可能是旧数据, 不写入缓存
+            version = self.query_cache.version(tables)
+            value = fetch()
+            self.query_cache.set(key, value, tables, ttl=ttl, version=version)
+
+        # 返回副本, 避免调用方修改缓存中的数据; 与不经过缓存时的类型一致
+        if isinstance(value, dict):
+            return dict(value)
+        if isinstance(value, (list, tuple)):
+            rows = [dict(row) if isinstance(row, dict) else row for row in value]
+            return tuple(rows) if isinstance(value, tuple) else rows
+        return value
+
+
+    def _invalidate_written(self, sql: str) -> None:
+        """写操作提交后失效相关表的缓存; 事务中先记录, 提交后再失效, 避免其它连接在提交前把旧数据重新缓存"""
+        if self._transaction_depth > 0:
+            self._pending_writes.append(sql)
+            return
+        if self.query_cache.invalidate_sql(sql):
+            tables = extract_tables(sql)
+            logger.debug(f'写操作后失效查询缓存: {", ".join(tables) if tables is not None else "全部"}')
+
+
+    @classmethod
+    def pool_stats(cls) -> PoolStats:
+        """连接池统计: 获取次数、等待耗时、连接耗尽次数等"""
+        return MySQLPoolManager.stats()
         
     
 
@@ -95,8 +162,10 @@ class MySQLClient:
 
             {'id': 1, 'name': 'ozymandias'}
         """
-        self.cursor.execute(sql, params)
-        return self.cursor.fetchone()
+        def fetch():
+            self.cursor.execute(sql, params)
+            return self.cursor.fetchone()
+        return self._cached('one', sql, params, fetch)
 
     def query_all(self, sql: str, params: Union[tuple, list, dict] = None) -> List[Dict]:
         """查询多条数据
@@ -112,8 +181,10 @@ class MySQLClient:
         Returns:
             List[Dict]: 返回字典形式的结果集（列表）或 None
         """
-        self.cursor.execute(sql, params)
-        return self.cursor.fetchall()
+        def fetch():
+            self.cursor.execute(sql, params)
+            return self.cursor.fetchall()
+        return self._cached('all', sql, params, fetch)
 
 
     def query_value(self, sql: str, params: Union[tuple, list, dict] = None) -> Any:
@@ -136,6 +207,60 @@ class MySQLClient:
         return None
     
 
+    def iter_query(self,
+                   sql: str,
+                   params: Union[tuple, list, dict] = None,
+                   batch_size: int = 1000,
+                   model: Optional[Type[BaseModel]] = None,
+                   as_tuple: bool = False,
+                   ) -> Iterator[Any]:
+        """流式查询, 使用服务端游标逐批读取结果, 内存占用与结果集大小无关
+
+        迭代期间该连接不能执行其它查询; 提前结束迭代时游标会在生成器关闭或归还连接时关闭
+
+        Args:
+            sql (str): 要执行的 SQL 语句
+            params (Union[tuple, list, dict], optional): 绑定到 SQL 语句中的参数
+            batch_size (int): 每次从服务端读取的行数
+            model (Type[BaseModel], optional): 将每行转换为指定的 Pydantic 模型, 如 `DBUserModel`
+            as_tuple (bool): 以具名元组返回每行, 比 dict 更省内存, 与 model 互斥
+
+        Yields:
+            Any: 每行数据, 默认为 dict
+
+        Example:
+            >>> for user in client.iter_query('SELECT id, name FROM t_user_info', model=DBUserModel):
+            ...     assert user.name
+        """
+        if model and as_tuple:
+            raise ValueError('model 与 as_tuple 不能同时使用')
+
+        cursor = self.conn.cursor(SSCursor if as_tuple else SSDictCursor)
+        self._stream_cursors.add(cursor)
+        try:
+            cursor.execute(sql, params)
+
+            row_type = None
+            if as_tuple:
+                row_type = namedtuple('Row', [column[0] for column in cursor.description], rename=True)
+
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    if row_type:
+                        yield row_type._make(row)
+                    elif model:
+                        yield model.model_validate(row)
+                    else:
+                        yield row
+        finally:
+            if cursor in self._stream_cursors:
+                self._stream_cursors.discard(cursor)
+                cursor.close()
+
+
     def desc_table(self, table_name: str) -> List[Dict]:
         """查看表结构以及字段注释
 
@@ -145,8 +270,207 @@ class MySQLClient:
         Returns:
             Any: _description_
         """
-        self.cursor.execute(f'SHOW FULL COLUMNS FROM {table_name}')
-        return self.cursor.fetchall()
+        sql = f'SHOW FULL COLUMNS FROM {table_name}'
 
-    
-    
\ No newline at end of file
+        def fetch():
+            self.cursor.execute(sql)
+            return self.cursor.fetchall()
+
+        # 表结构在会话内基本不变, 始终缓存, 执行 ALTER TABLE 等语句后自动失效
+        return self._cached('desc', sql, None, fetch, force=True, ttl=NO_EXPIRY,
+                            tables=frozenset({schema_tag(table_name)}))
+
+
+    # ---------------- 写操作与批量操作 ----------------
+
+    @staticmethod
+    def _quote_identifier(name: str) -> str:
+        """转义表名/字段名, 支持 `db.table` 形式"""
+        if not re.fullmatch(r'[A-Za-z0-9_$]+(\.[A-Za-z0-9_$]+)?', name):
+            raise ValueError(f'非法的表名或字段名: {name}')
+        return '.'.join(f'`{part}`' for part in name.split('.'))
+
+
+    def _commit_if_needed(self) -> None:
+        if self._transaction_depth == 0:
+            self.conn.commit()
+
+
+    @contextmanager
+    def transaction(self) -> Iterator['MySQLClient']:
+        """事务上下文管理器, 正常退出时提交, 发生异常时回滚; 支持嵌套, 仅最外层提交或回滚
+
+        Example:
+            >>> with client.transaction():
+            ...     client.execute('DELETE FROM t_user_info WHERE id = %s', (1,))
+            ...     client.bulk_insert('t_user_info', rows)
+        """
+        if self._transaction_depth == 0:
+            self.conn.begin()
+        self._transaction_depth += 1
+        try:
+            yield self
+        except BaseException:
+            self._transaction_depth -= 1
+            if self._transaction_depth == 0:
+                self._pending_writes.clear()
+                self.conn.rollback()
+                logger.warning('事务已回滚')
+            raise
+        else:
+            self._transaction_depth -= 1
+            if self._transaction_depth == 0:
+                self.conn.commit()
+                writes, self._pending_writes = self._pending_writes, []
+                for sql in writes:
+                    self._invalidate_written(sql)
+
+
+    def execute(self, sql: str, params: Union[tuple, list, dict] = None) -> int:
+        """执行单条写操作（INSERT/UPDATE/DELETE 等）, 不在事务中时自动提交
+
+        Args:
+            sql (str): 要执行的 SQL 语句
+            params (Union[tuple, list, dict], optional): 绑定到 SQL 语句中的参数
+
+        Returns:
+            int: 受影响的行数
+        """
+        affected = self.cursor.execute(sql, params)
+        self._commit_if_needed()
+        self._invalidate_written(sql)
+        return affected
+
+
+    def execute_many(self, sql: str, seq_params: Iterable[Union[tuple, list, dict]]) -> int:
+        """同一语句批量执行多组参数, 不在事务中时自动提交
+
+        对于 `INSERT ... VALUES (...)` 语句, pymysql 会自动合并为一条多行 INSERT
+
+        Args:
+            sql (str): 要执行的 SQL 语句
+            seq_params (Iterable[Union[tuple, list, dict]]): 多组参数
+
+        Returns:
+            int: 受影响的行数
+        """
+        affected = self.cursor.executemany(sql, list(seq_params))
+        self._commit_if_needed()
+        self._invalidate_written(sql)
+        return affected or 0
+
+
+    @property
+    def max_allowed_packet(self) -> int:
+        """服务端允许的单条 SQL 最大字节数"""
+        if self._max_allowed_packet is None:
+            self._max_allowed_packet = int(self.query_value('SELECT @@max_allowed_packet'))
+        return self._max_allowed_packet
+
+
+    def bulk_insert(self,
+                    table: str,
+                    rows: Sequence[Dict[str, Any]],
+                    chunk_size: int = 5000,
+                    ignore: bool = False,
+                    ) -> int:
+        """多行 INSERT 批量写入, 自动按 max_allowed_packet 和 chunk_size 分批
+
+        所有行的字段与第一行一致; 不在事务中时每批提交一次
+
+        Args:
+            table (str): 表名
+            rows (Sequence[Dict[str, Any]]): 要写入的数据, 每个 dict 为一行
+            chunk_size (int): 每批最多写入的行数
+            ignore (bool): 是否使用 INSERT IGNORE 跳过重复键
+
+        Returns:
+            int: 受影响的行数
+
+        Example:
+            >>> client.bulk_insert('t_user_info', [{'id': 1, 'name': 'walter'}, {'id': 2, 'name': 'jesse'}])
+
+            2
+        """
+        if not rows:
+            return 0
+
+        columns = list(rows[0].keys())
+        head = (f'INSERT {"IGNORE " if ignore else ""}INTO {self._quote_identifier(table)} '
+                f'({", ".join(self._quote_identifier(c) for c in columns)}) VALUES ')
+        placeholder = '(' + ', '.join(['%s'] * len(columns)) + ')'
+
+        # 预留 10% 余量给协议开销
+        max_bytes = int(self.max_allowed_packet * 0.9)
+
+        affected = 0
+        values: List[str] = []
+        size = len(head.encode('utf-8'))
+
+        def flush():
+            nonlocal affected, values, size
+            if values:
+                affected += self.cursor.execute(head + ', '.join(values))
+                self._commit_if_needed()
+            values, size = [], len(head.encode('utf-8'))
+
+        try:
+            for row in rows:
+                literal = self.cursor.mogrify(placeholder, [row[c] for c in columns])
+                literal_size = len(literal.encode('utf-8')) + 2
+                if values and (len(values) >= chunk_size or size + literal_size > max_bytes):
+                    flush()
+                values.append(literal)
+                size += literal_size
+            flush()
+        finally:
+            # 中途失败时之前的批次可能已提交
+            self._invalidate_written(head)
+
+        logger.info(f'批量写入 {table}: {len(rows)} 行')
+        return affected
+
+
+    def verify_rows_exist(self,
+                          table: str,
+                          column: str,
+                          values: Iterable[Any],
+                          chunk_size: int = 1000,
+                          ) -> List[Any]:
+        """批量校验数据是否存在, 每批一条 SQL 代替逐行查询
+
+        是否存在由数据库按字段的类型和排序规则比较（如 '1' 与 1、大小写不敏感的邮箱视为相同）,
+        与单独执行 `WHERE column = value` 的结果一致
+
+        Args:
+            table (str): 表名
+            column (str): 用于匹配的字段, 如主键或唯一键
+            values (Iterable[Any]): 需要存在的字段值
+            chunk_size (int): 每条 SQL 中校验的最大值数
+
+        Returns:
+            List[Any]: 不存在的字段值（保持传入顺序）, 全部存在时为空列表
+
+        Example:
+            >>> missing = client.verify_rows_exist('t_user_info', 'email', emails)
+            >>> assert not missing, f'以下用户未写入数据库: {missing}'
+        """
+        values = list(dict.fromkeys(values))
+        quoted_column = self._quote_identifier(column)
+        quoted_table = self._quote_identifier(table)
+
+        # 每个值一个 NOT EXISTS 子查询（走字段索引）, 只返回不存在的值的下标
+        missing = []
+        for i in range(0, len(values), chunk_size):
+            chunk = values[i:i + chunk_size]
+            sql = ' UNION ALL '.join(
+                f'SELECT {n} AS i FROM DUAL WHERE NOT EXISTS (SELECT 1 FROM {quoted_table} WHERE {quoted_column} = %s)'
+                for n in range(len(chunk))
+            )
+            self.cursor.execute(sql, chunk)
+            missing_indexes = {row['i'] for row in self.cursor.fetchall()}
+            missing.extend(v for n, v in enumerate(chunk) if n in missing_indexes)
+
+        if missing:
+            logger.warning(f'{table}.{column} 中有 {len(missing)}/{len(values)} 条数据不存在')
+        return missing
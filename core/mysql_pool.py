@@ -0,0 +1,195 @@
+import math
+import os
+import threading
+import time
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Optional, Tuple
+
+import pymysql
+from dbutils.pooled_db import PooledDB
+from pymysql.cursors import DictCursor
+
+from config.settings import SharedSettings
+from utils.logger import logger
+
+
+@dataclass
+class PoolStats:
+    """连接池统计"""
+    # 获取连接的次数
+    checkouts: int = 0
+    # 等待连接的总耗时与最大耗时（秒）
+    wait_time: float = 0.0
+    max_wait_time: float = 0.0
+    # 获取连接时池中连接已全部被占用的次数
+    exhausted: int = 0
+    # 同时占用连接数的峰值
+    peak_in_use: int = 0
+
+    def merge(self, other: 'PoolStats') -> None:
+        self.checkouts += other.checkouts
+        self.wait_time += other.wait_time
+        self.max_wait_time = max(self.max_wait_time, other.max_wait_time)
+        self.exhausted += other.exhausted
+        self.peak_in_use = max(self.peak_in_use, other.peak_in_use)
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+class MySQLPool:
+    """带统计的连接池, 封装 DBUtils.PooledDB
+
+    - 常驻连接数为 size, 繁忙时最多再创建 max_overflow 个连接, 超出后阻塞等待
+    - pre_ping 开启时每次取出连接都会 ping, 失效的连接自动重连
+    - recycle_uses 大于 0 时, 连接使用指定次数后关闭重建
+    """
+
+    def __init__(self,
+                 connect_kwargs: Dict,
+                 size: int,
+                 max_overflow: int,
+                 pre_ping: bool = True,
+                 recycle_uses: int = 0,
+                 ):
+        # 连接池名称（不含密码）, 用于日志和查询缓存的键
+        self.name = (f'{connect_kwargs.get("user")}@{connect_kwargs.get("host")}:{connect_kwargs.get("port")}'
+                     f'/{connect_kwargs.get("database") or ""}')
+        self.size = size
+        self.max_connections = size + max_overflow
+        self.stats = PoolStats()
+        self._in_use = 0
+        self._lock = threading.Lock()
+
+        self._pool = PooledDB(
+            creator=pymysql,
+            cursorclass=DictCursor,
+            mincached=0,
+            maxcached=size,
+            maxconnections=self.max_connections,
+            blocking=True,
+            maxusage=recycle_uses or None,
+            ping=1 if pre_ping else 0,
+            **connect_kwargs,
+        )
+
+
+    def connection(self):
+        """从连接池中取出一个连接, 使用完毕后需调用 release 归还"""
+        with self._lock:
+            if self._in_use >= self.max_connections:
+                self.stats.exhausted += 1
+                logger.warning(f'连接池已满 ({self.max_connections}), 等待其它用例归还连接')
+
+        start = time.perf_counter()
+        conn = self._pool.connection()
+        waited = time.perf_counter() - start
+
+        with self._lock:
+            self._in_use += 1
+            self.stats.checkouts += 1
+            self.stats.wait_time += waited
+            self.stats.max_wait_time = max(self.stats.max_wait_time, waited)
+            self.stats.peak_in_use = max(self.stats.peak_in_use, self._in_use)
+        return conn
+
+
+    def release(self, conn) -> None:
+        """归还连接"""
+        conn.close()
+        with self._lock:
+            self._in_use -= 1
+
+
+    def close(self) -> None:
+        self._pool.close()
+
+
+class MySQLPoolManager:
+    """按连接参数管理连接池, 不同的 host/port/database/user 使用各自的连接池
+
+    并行执行（pytest-xdist）时, MYSQL_POOL_SIZE 与 MYSQL_MAX_OVERFLOW 视为全部 worker 的总量,
+    每个 worker 按 worker 数均分（至少 1 个）, 避免 worker 数增加时压垮数据库的连接上限
+    """
+
+    settings = SharedSettings()
+
+    _pools: Dict[Tuple, MySQLPool] = {}
+    _lock = threading.Lock()
+
+    # 已关闭连接池的统计, 会话结束时汇总
+    _closed_stats = PoolStats()
+
+
+    @classmethod
+    def worker_count(cls) -> int:
+        return max(1, int(os.getenv('PYTEST_XDIST_WORKER_COUNT', '1')))
+
+
+    @classmethod
+    def get_pool(cls,
+                 host: Optional[str] = None,
+                 port: Optional[int] = None,
+                 database: Optional[str] = None,
+                 user: Optional[str] = None,
+                 password: Optional[str] = None,
+                 ) -> MySQLPool:
+        connect_kwargs = {
+            'host': host or cls.settings.MYSQL_HOST,
+            'port': port or cls.settings.MYSQL_PORT,
+            'database': database or None,
+            'user': user or cls.settings.MYSQL_USER,
+            'password': password or cls.settings.MYSQL_PASSWORD,
+        }
+        key = tuple(connect_kwargs.values())
+
+        pool = cls._pools.get(key)
+        if pool is not None:
+            return pool
+
+        with cls._lock:
+            pool = cls._pools.get(key)
+            if pool is None:
+                workers = cls.worker_count()
+                size = max(1, math.ceil(cls.settings.MYSQL_POOL_SIZE / workers))
+                max_overflow = math.ceil(cls.settings.MYSQL_MAX_OVERFLOW / workers)
+
+                pool = MySQLPool(
+                    connect_kwargs,
+                    size=size,
+                    max_overflow=max_overflow,
+                    pre_ping=cls.settings.MYSQL_POOL_PRE_PING,
+                    recycle_uses=cls.settings.MYSQL_POOL_RECYCLE_USES,
+                )
+                cls._pools[key] = pool
+                logger.info(f'创建连接池 {pool.name} | size={size}, max_overflow={max_overflow}')
+        return pool
+
+
+    @classmethod
+    def stats(cls) -> PoolStats:
+        """所有连接池（包括已关闭的）的汇总统计"""
+        total = PoolStats()
+        total.merge(cls._closed_stats)
+        for pool in cls._pools.values():
+            total.merge(pool.stats)
+        return total
+
+
+    @classmethod
+    def close_all(cls) -> List[Exception]:
+        """关闭所有连接池
+
+        Returns:
+            List[Exception]: 关闭过程中出现的异常
+        """
+        errors = []
+        with cls._lock:
+            for pool in cls._pools.values():
+                cls._closed_stats.merge(pool.stats)
+                try:
+                    pool.close()
+                except Exception as e:
+                    errors.append(e)
+            cls._pools.clear()
+        return errors
@@ -0,0 +1,266 @@
+import queue
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, Deque, Dict, Iterator, List, Optional, Union
+
+import requests
+
+from utils.logger import logger
+
+if TYPE_CHECKING:
+    from core.api_client import APIClient
+
+
+PAGE = 'page'
+OFFSET = 'offset'
+CURSOR = 'cursor'
+
+_MISSING = object()
+
+
+def get_path(data: Any, path: Optional[str], default: Any = None) -> Any:
+    """按 `.` 分隔的路径读取 JSON 中的字段, 如 `data.items`"""
+    if not path:
+        return data
+    for part in path.split('.'):
+        if not isinstance(data, dict):
+            return default
+        data = data.get(part, _MISSING)
+        if data is _MISSING:
+            return default
+    return data
+
+
+class Paginator:
+    """分页接口迭代器, 逐条产出所有分页中的数据
+
+    支持三种分页方式:
+    - page: 页码分页, 请求参数为 page/page_size
+    - offset: 偏移分页, 请求参数为 offset/limit
+    - cursor: 游标分页, 下一页的游标从当前页的响应中读取
+
+    消费当前页数据（如断言）的同时, 后台提前请求后续 prefetch 页:
+    page/offset 分页各页互不依赖, 并发请求; cursor 分页只能依次请求, 在后台连续拉取
+
+    Args:
+        client (APIClient): 发送请求的客户端
+        endpoint (str): 接口地址
+        style (str): 分页方式, page/offset/cursor
+        page_size (int): 每页数量
+        prefetch (int): 提前请求的页数, 0 表示不预取
+        items_path (str): 响应中数据列表的路径
+        total_path (str, optional): 响应中总数的路径, 指定后按总数计算页数
+        cursor_path (str): cursor 分页时, 响应中下一页游标的路径
+        params (Dict, optional): 其它请求参数
+        max_pages (int, optional): 最多请求的页数
+        page_param/size_param/offset_param/limit_param/cursor_param (str): 分页参数名
+        start_page (int): 起始页码
+        method (str): 请求方法
+        **kwargs: 传递给 client.request 的其它参数
+
+    Example:
+        for user in client.paginate('/users', page_size=500, prefetch=4):
+            ...
+
+        # 按页处理
+        for resp in client.paginate('/export', style='cursor').pages():
+            assert_response_model(resp, ExportPageModel)
+    """
+
+    def __init__(self,
+                 client: 'APIClient',
+                 endpoint: str,
+                 *,
+                 style: str = PAGE,
+                 page_size: int = 100,
+                 prefetch: int = 2,
+                 items_path: str = 'data.items',
+                 total_path: Optional[str] = None,
+                 cursor_path: str = 'data.next_cursor',
+                 params: Optional[Dict[str, Any]] = None,
+                 max_pages: Optional[int] = None,
+                 page_param: str = 'page',
+                 size_param: str = 'page_size',
+                 offset_param: str = 'offset',
+                 limit_param: str = 'limit',
+                 cursor_param: str = 'cursor',
+                 start_page: int = 1,
+                 method: str = 'GET',
+                 **kwargs,
+                 ):
+        if style not in (PAGE, OFFSET, CURSOR):
+            raise ValueError(f'不支持的分页方式: {style}')
+
+        self.client = client
+        self.endpoint = endpoint
+        self.style = style
+        self.page_size = page_size
+        self.prefetch = max(0, prefetch)
+        self.items_path = items_path
+        self.total_path = total_path
+        self.cursor_path = cursor_path
+        self.params = params or {}
+        self.max_pages = max_pages
+        self.page_param = page_param
+        self.size_param = size_param
+        self.offset_param = offset_param
+        self.limit_param = limit_param
+        self.cursor_param = cursor_param
+        self.start_page = start_page
+        self.method = method
+        self.kwargs = kwargs
+
+
+    def __iter__(self) -> Iterator[Any]:
+        for response in self.pages():
+            yield from self.items_of(response)
+
+
+    def items_of(self, response: requests.Response) -> List[Any]:
+        """读取一页响应中的数据列表"""
+        items = get_path(response.json(), self.items_path)
+        if items is None:
+            return []
+        if not isinstance(items, list):
+            raise ValueError(f'{self.endpoint} 响应中 {self.items_path} 不是列表: {type(items).__name__}')
+        return items
+
+
+    def pages(self) -> Iterator[requests.Response]:
+        """按顺序产出每一页的响应"""
+        if self.style == CURSOR:
+            return self._cursor_pages()
+        return self._indexed_pages()
+
+
+    def _fetch(self, page_params: Dict[str, Any]) -> requests.Response:
+        response = self.client.request(self.method, self.endpoint,
+                                       params={**self.params, **page_params}, **self.kwargs)
+        if not response.ok:
+            logger.error(f'分页请求失败: {self.method} {self.endpoint} {page_params} -> {response.status_code}')
+            response.raise_for_status()
+        return response
+
+
+    def _page_params(self, index: int) -> Dict[str, Any]:
+        if self.style == PAGE:
+            return {self.page_param: self.start_page + index, self.size_param: self.page_size}
+        return {self.offset_param: index * self.page_size, self.limit_param: self.page_size}
+
+
+    def _indexed_pages(self) -> Iterator[requests.Response]:
+        """page/offset 分页: 各页互不依赖, 并发预取后续页, 按页序产出"""
+        max_pages = self.max_pages
+        executor = ThreadPoolExecutor(max_workers=self.prefetch, thread_name_prefix='paginator') if self.prefetch else None
+        pending: Deque[Union[Future, Dict[str, Any]]] = deque()
+        next_index = 0
+
+        def submit():
+            nonlocal next_index
+            if max_pages is not None and next_index >= max_pages:
+                return
+            params = self._page_params(next_index)
+            next_index += 1
+            # 不预取时只记录参数, 轮到该页时再请求
+            pending.append(executor.submit(self._fetch, params) if executor else params)
+
+        try:
+            # 第一页单独请求, 得到总数后不会预取超出范围的页
+            submit()
+            index = 0
+            while pending:
+                page = pending.popleft()
+                response = page.result() if isinstance(page, Future) else self._fetch(page)
+                items = self.items_of(response)
+
+                if index == 0 and self.total_path:
+                    total = get_path(response.json(), self.total_path)
+                    if total is not None:
+                        pages = -(-int(total) // self.page_size)
+                        max_pages = pages if max_pages is None else min(max_pages, pages)
+
+                # 不足一页视为最后一页, 丢弃已预取的后续页
+                last = len(items) < self.page_size
+                if last:
+                    if executor:
+                        for future in pending:
+                            future.cancel()
+                    pending.clear()
+                else:
+                    while len(pending) < max(1, self.prefetch):
+                        before = next_index
+                        submit()
+                        if next_index == before:
+                            break
+
+                yield response
+                index += 1
+                if last:
+                    return
+        finally:
+            if executor:
+                for future in pending:
+                    future.cancel()
+                executor.shutdown(wait=False, cancel_futures=True)
+
+
+    def _cursor_pages(self) -> Iterator[requests.Response]:
+        """cursor 分页: 后台线程依次请求, 最多领先消费者 prefetch 页"""
+        if not self.prefetch:
+            yield from self._cursor_fetcher(threading.Event())
+            return
+
+        pages: queue.Queue = queue.Queue(maxsize=self.prefetch)
+        stop = threading.Event()
+        done = object()
+
+        def put(item) -> bool:
+            # 队列已满时等待消费者, 消费者提前结束迭代后不再阻塞
+            while not stop.is_set():
+                try:
+                    pages.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def produce():
+            try:
+                for response in self._cursor_fetcher(stop):
+                    if not put(response):
+                        return
+                put(done)
+            except Exception as e:
+                put(e)
+
+        producer = threading.Thread(target=produce, name='paginator-cursor', daemon=True)
+        producer.start()
+        try:
+            while True:
+                page = pages.get()
+                if page is done:
+                    return
+                if isinstance(page, Exception):
+                    raise page
+                yield page
+        finally:
+            stop.set()
+
+
+    def _cursor_fetcher(self, stop: threading.Event) -> Iterator[requests.Response]:
+        cursor = None
+        count = 0
+        while not stop.is_set():
+            if self.max_pages is not None and count >= self.max_pages:
+                return
+            params = {self.size_param: self.page_size}
+            if cursor is not None:
+                params[self.cursor_param] = cursor
+            response = self._fetch(params)
+            count += 1
+            yield response
+
+            cursor = get_path(response.json(), self.cursor_path)
+            if not cursor:
+                return
@@ -0,0 +1,208 @@
+import math
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, FrozenSet, Hashable, Optional, Tuple
+
+# 引用表名的关键字, 其后为表名或逗号分隔的表列表（FROM a, b AS x）
+_TABLE_KEYWORD = re.compile(r'\b(?:FROM|JOIN|INTO|UPDATE|TABLE(?:\s+IF\s+(?:NOT\s+)?EXISTS)?)\s+', re.IGNORECASE)
+_IDENTIFIER = r'(?:`[^`]+`|[\w$]+)'
+# 表名, 支持 `db`.`table` 写法
+_TABLE_NAME = re.compile(rf'{_IDENTIFIER}(?:\.{_IDENTIFIER})?')
+_ALIAS = re.compile(rf'\s+(?:AS\s+)?({_IDENTIFIER})', re.IGNORECASE)
+_COMMA = re.compile(r'\s*,\s*')
+# 表名之后可能出现的子句关键字, 不是别名
+_CLAUSE_KEYWORDS = frozenset({
+    'WHERE', 'JOIN', 'INNER', 'LEFT', 'RIGHT', 'OUTER', 'CROSS', 'NATURAL', 'STRAIGHT_JOIN', 'ON', 'USING',
+    'GROUP', 'ORDER', 'LIMIT', 'HAVING', 'WINDOW', 'SET', 'VALUES', 'VALUE', 'SELECT', 'FOR', 'LOCK',
+    'UNION', 'EXCEPT', 'INTERSECT', 'PARTITION', 'USE', 'IGNORE', 'FORCE', 'AS',
+})
+
+# 引号中的字符串与标识符原样保留, 只合并引号外的空白
+_QUOTED_OR_WHITESPACE = re.compile(r"""('(?:[^'\\]|\\.|'')*'|"(?:[^"\\]|\\.|"")*"|`[^`]*`)|\s+""")
+
+
+def normalize_sql(sql: str) -> str:
+    """合并引号外的空白并去掉末尾分号, 格式不同但语义相同的 SQL 命中同一个缓存"""
+    return _QUOTED_OR_WHITESPACE.sub(lambda m: m.group(1) or ' ', sql).strip().rstrip(';').rstrip()
+
+
+def _skip_parentheses(sql: str, pos: int) -> int:
+    """跳过 pos 处开始的括号（子查询）, 返回右括号之后的位置, 括号不匹配时返回 -1"""
+    depth = 0
+    for i in range(pos, len(sql)):
+        if sql[i] == '(':
+            depth += 1
+        elif sql[i] == ')':
+            depth -= 1
+            if depth == 0:
+                return i + 1
+    return -1
+
+
+def extract_tables(sql: str) -> Optional[FrozenSet[str]]:
+    """提取 SQL 中引用的表名（小写, 不含库名）, 包括逗号分隔的多个表; 无法解析时返回 None"""
+    tables = set()
+    for keyword in _TABLE_KEYWORD.finditer(sql):
+        pos = keyword.end()
+        while True:
+            if sql.startswith('(', pos):
+                # 子查询中的表由外层循环匹配, 这里跳过后继续读取别名和逗号后的其它表
+                pos = _skip_parentheses(sql, pos)
+                if pos < 0:
+                    return None
+            else:
+                name = _TABLE_NAME.match(sql, pos)
+                if name is None:
+                    return None
+                tables.add(name.group().replace('`', '').split('.')[-1].lower())
+                pos = name.end()
+
+            alias = _ALIAS.match(sql, pos)
+            if alias and alias.group(1).upper() not in _CLAUSE_KEYWORDS:
+                pos = alias.end()
+            comma = _COMMA.match(sql, pos)
+            if comma is None:
+                break
+            pos = comma.end()
+    return frozenset(tables)
+
+
+def schema_tag(table: str) -> str:
+    """表结构缓存使用的表标记, 只会被 DDL 或显式失效清除, 不受数据写入影响"""
+    return f'schema:{table.replace("`", "").split(".")[-1].lower()}'
+
+
+def is_ddl(sql: str) -> bool:
+    head = sql.lstrip().split(None, 1)[0].upper() if sql.strip() else ''
+    return head in ('ALTER', 'DROP', 'CREATE', 'RENAME', 'TRUNCATE')
+
+
+def is_read_only(sql: str) -> bool:
+    """是否为只读查询, 只有只读查询会被缓存"""
+    head = sql.lstrip().split(None, 1)[0].upper() if sql.strip() else ''
+    return head in ('SELECT', 'SHOW', 'DESC', 'DESCRIBE') and 'FOR UPDATE' not in sql.upper()
+
+
+class QueryCache:
+    """查询结果缓存, 支持 TTL 过期、LRU 淘汰以及按表名失效
+
+    缓存键由调用方生成（通常为 连接池 + 规范化 SQL + 参数）, 写入时记录 SQL 引用的表,
+    任一表被写入时相关的缓存全部失效
+
+    每次失效都会递增相关表的版本号: 查询前通过 version 取得版本, 写入缓存时版本已变化（查询期间有写操作提交）
+    则放弃写入, 避免把失效前查到的旧数据重新放入缓存
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        # key -> (过期时间, 引用的表, 结果)
+        self._entries: 'OrderedDict[Hashable, Tuple[float, FrozenSet[str], Any]]' = OrderedDict()
+        self._lock = threading.Lock()
+        # 表 -> 版本号, 以及清空全部缓存的次数
+        self._versions: Dict[str, int] = {}
+        self._epoch = 0
+        self.hits = 0
+        self.misses = 0
+
+
+    def version(self, tables: FrozenSet[str]) -> Tuple[int, ...]:
+        """查询前取得相关表的版本, 传给 set 的 version 参数"""
+        with self._lock:
+            return self._version(tables)
+
+
+    def _version(self, tables: FrozenSet[str]) -> Tuple[int, ...]:
+        return (self._epoch, *(self._versions.get(table, 0) for table in sorted(tables)))
+
+
+    def get(self, key: Hashable) -> Tuple[bool, Any]:
+        """读取缓存
+
+        Returns:
+            Tuple[bool, Any]: (是否命中, 缓存的结果)
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return False, None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True, entry[2]
+
+
+    def set(self,
+            key: Hashable,
+            value: Any,
+            tables: FrozenSet[str],
+            ttl: Optional[float] = None,
+            version: Optional[Tuple[int, ...]] = None,
+            ) -> bool:
+        """写入缓存
+
+        Args:
+            key (Hashable): 缓存键
+            value (Any): 查询结果
+            tables (FrozenSet[str]): 结果依赖的表, 用于按表失效
+            ttl (float, optional): 过期时间（秒）, 默认使用实例的 ttl, math.inf 表示不过期
+            version (Tuple[int, ...], optional): 查询前通过 version 取得的版本, 与当前版本不一致时不写入
+
+        Returns:
+            bool: 是否写入
+        """
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            if version is not None and version != self._version(tables):
+                return False
+            self._entries[key] = (expires_at, tables, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+            return True
+
+
+    def invalidate(self, table: Optional[str] = None, schema: bool = True) -> int:
+        """按表名失效缓存, 不指定表名时清空全部
+
+        Args:
+            table (str, optional): 表名
+            schema (bool): 是否同时失效该表的表结构缓存
+
+        Returns:
+            int: 失效的缓存条数
+        """
+        with self._lock:
+            if table is None:
+                count = len(self._entries)
+                self._entries.clear()
+                self._epoch += 1
+                return count
+
+            tags = {table.replace('`', '').split('.')[-1].lower()}
+            if schema:
+                tags.add(schema_tag(table))
+            for tag in tags:
+                self._versions[tag] = self._versions.get(tag, 0) + 1
+            keys = [key for key, entry in self._entries.items() if tags & entry[1]]
+            for key in keys:
+                del self._entries[key]
+            return len(keys)
+
+
+    def invalidate_sql(self, sql: str) -> int:
+        """写操作执行后, 失效该 SQL 涉及的所有表的缓存, DDL 同时失效表结构缓存; 无法解析表名时清空全部缓存"""
+        tables = extract_tables(sql)
+        if tables is None:
+            return self.invalidate()
+        schema = is_ddl(sql)
+        return sum(self.invalidate(table, schema=schema) for table in tables)
+
+
+# 不过期, 用于会话内不变的数据（如表结构）
+NO_EXPIRY = math.inf
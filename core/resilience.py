@@ -0,0 +1,213 @@
+import fnmatch
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, FrozenSet, List, Optional
+
+from requests.exceptions import RequestException
+
+from config.settings import Settings, get_settings
+from utils.logger import logger
+
+# 重试与熔断
+#
+# - RetryPolicy: 按接口配置的重试策略, 默认只重试幂等方法, 退避时间带随机抖动且有上限
+# - RetryBudget: 全局重试预算, 重试次数不超过请求数的一定比例, 后端整体不可用时不会每个请求都重试满
+# - CircuitBreaker: 按接口熔断, 连续失败达到阈值后直接失败, 冷却时间过后放行一个探测请求（半开）
+
+
+class CircuitOpenError(RequestException):
+    """接口已熔断, 请求未发送"""
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """重试策略
+
+    Args:
+        max_retries (int): 最大重试次数
+        backoff_factor (float): 退避基数, 第 n 次重试前等待 [0, backoff_factor * 2^n] 之间的随机时间
+        backoff_max (float): 单次等待的上限（秒）, 同样作用于响应头中的 Retry-After
+        status_forcelist (FrozenSet[int]): 需要重试的响应状态码
+        methods (FrozenSet[str]): 允许重试的请求方法, 默认不包含 POST/PATCH
+    """
+    max_retries: int = 3
+    backoff_factor: float = 0.5
+    backoff_max: float = 5.0
+    status_forcelist: FrozenSet[int] = frozenset({429, 500, 502, 503, 504})
+    methods: FrozenSet[str] = frozenset({'HEAD', 'GET', 'OPTIONS', 'PUT', 'DELETE'})
+
+    def allows(self, method: str) -> bool:
+        return self.max_retries > 0 and method.upper() in self.methods
+
+    def backoff(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        """第 attempt 次重试（从 0 开始）前的等待时间"""
+        if retry_after:
+            try:
+                return min(self.backoff_max, max(0.0, float(retry_after)))
+            except ValueError:
+                pass
+        return random.uniform(0, min(self.backoff_max, self.backoff_factor * (2 ** attempt)))
+
+
+class RetryBudget:
+    """全局重试预算（令牌桶）
+
+    桶中初始有 min_retries 个令牌, 每个请求存入 ratio 个, 每次重试取出 1 个;
+    令牌不足时不再重试, 总重试次数约束在 min_retries + ratio * 请求数 以内
+    """
+
+    def __init__(self, ratio: float = 0.2, min_retries: int = 10, max_tokens: Optional[float] = None):
+        self.ratio = ratio
+        self.max_tokens = max_tokens if max_tokens is not None else max(min_retries, 100)
+        self._tokens = float(min_retries)
+        self._lock = threading.Lock()
+        # 因预算不足而放弃的重试次数
+        self.exhausted = 0
+
+    def deposit(self) -> None:
+        with self._lock:
+            self._tokens = min(self.max_tokens, self._tokens + self.ratio)
+
+    def withdraw(self) -> bool:
+        with self._lock:
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+            self.exhausted += 1
+            return False
+
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+@dataclass
+class CircuitBreaker:
+    """单个接口的熔断器
+
+    - closed: 正常放行, 连续失败 failure_threshold 次后打开
+    - open: 直接抛出 CircuitOpenError, recovery_timeout 秒后转为半开
+    - half_open: 只放行一个探测请求, 成功则关闭, 失败则重新打开
+    """
+    name: str
+    failure_threshold: int = 5
+    recovery_timeout: float = 30.0
+    state: str = CLOSED
+    failures: int = 0
+    opened_at: float = 0.0
+    # 熔断期间被直接拒绝的请求数
+    rejected: int = 0
+    _probing: bool = False
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def before_request(self) -> None:
+        """发送请求前调用, 熔断时抛出 CircuitOpenError"""
+        with self._lock:
+            if self.state == OPEN and time.monotonic() - self.opened_at >= self.recovery_timeout:
+                self.state = HALF_OPEN
+                self._probing = False
+
+            if self.state == CLOSED:
+                return
+            if self.state == HALF_OPEN and not self._probing:
+                self._probing = True
+                logger.info(f'{self.name} 熔断冷却结束, 发送探测请求')
+                return
+
+            self.rejected += 1
+            remaining = max(0.0, self.recovery_timeout - (time.monotonic() - self.opened_at))
+            raise CircuitOpenError(f'{self.name} 已熔断（连续失败 {self.failures} 次）, {remaining:.0f}s 后重试')
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self.state != CLOSED:
+                logger.info(f'{self.name} 探测成功, 熔断恢复')
+            self.state = CLOSED
+            self.failures = 0
+            self._probing = False
+
+    def release(self) -> None:
+        """请求因网络以外的原因失败（如参数错误）, 不影响熔断状态; 半开时释放探测名额, 下一个请求继续探测"""
+        with self._lock:
+            self._probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.state == HALF_OPEN or (self.state == CLOSED and self.failures >= self.failure_threshold):
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+                self._probing = False
+                logger.warning(f'{self.name} 连续失败 {self.failures} 次, 熔断 {self.recovery_timeout:.0f}s')
+
+
+class Resilience:
+    """重试策略、重试预算与熔断器的统一管理, 所有 APIClient 实例共享
+
+    接口使用 `METHOD /path` 表示（与耗时统计一致）, 策略按注册顺序使用 fnmatch 匹配, 未匹配时使用默认策略
+
+    Example:
+        resilience.set_policy('GET /users*', RetryPolicy(max_retries=5))
+        resilience.set_policy('POST /orders', RetryPolicy(max_retries=2, methods=frozenset({'POST'})))
+    """
+
+    def __init__(self, settings: Optional[Settings] = None):
+        settings = settings or get_settings()
+        self.default_policy = RetryPolicy(
+            max_retries=settings.RETRY_MAX,
+            backoff_factor=settings.RETRY_BACKOFF_FACTOR,
+            backoff_max=settings.RETRY_BACKOFF_MAX,
+        )
+        self.budget = RetryBudget(ratio=settings.RETRY_BUDGET_RATIO, min_retries=settings.RETRY_BUDGET_MIN)
+        self.failure_threshold = settings.CIRCUIT_FAILURE_THRESHOLD
+        self.recovery_timeout = settings.CIRCUIT_RECOVERY_TIMEOUT
+
+        self._policies: List[tuple] = []
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+
+    def set_policy(self, pattern: str, policy: RetryPolicy) -> None:
+        """注册接口的重试策略, pattern 形如 `GET /users/*`, 方法部分可用 `*` 匹配所有方法"""
+        self._policies.append((pattern, policy))
+
+
+    def policy_for(self, key: str, overrides: Optional[Dict[str, RetryPolicy]] = None) -> RetryPolicy:
+        for pattern, policy in list((overrides or {}).items()) + self._policies:
+            if fnmatch.fnmatchcase(key, pattern):
+                return policy
+        return self.default_policy
+
+
+    def breaker(self, name: str) -> CircuitBreaker:
+        breaker = self._breakers.get(name)
+        if breaker is None:
+            with self._lock:
+                breaker = self._breakers.setdefault(name, CircuitBreaker(
+                    name=name,
+                    failure_threshold=self.failure_threshold,
+                    recovery_timeout=self.recovery_timeout,
+                ))
+        return breaker
+
+
+    def reset(self) -> None:
+        """清除所有熔断状态"""
+        with self._lock:
+            self._breakers.clear()
+
+
+    def summary_lines(self) -> List[str]:
+        """熔断与重试预算统计, 没有发生时返回空列表"""
+        lines = [f'{b.name}: {b.state}, 拒绝 {b.rejected} 次请求'
+                 for b in self._breakers.values() if b.rejected or b.state != CLOSED]
+        if self.budget.exhausted:
+            lines.append(f'重试预算耗尽, 放弃重试 {self.budget.exhausted} 次')
+        return lines
+
+
+# 单例
+resilience = Resilience()
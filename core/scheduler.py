@@ -0,0 +1,156 @@
+import graphlib
+import heapq
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# 基于用例元数据的调度
+#
+# 用例文件中可以声明:
+#   - id: 用例标识, 默认使用 title
+#   - depends_on: 依赖的用例 id, 被依赖的用例先执行, 未通过时跳过当前用例
+#   - uses: 用例占用的资源（如 `user:gustavo`）, 占用同一资源的用例串行执行
+#
+# id、依赖与资源只在同一个测试函数（scope）的用例之间生效: 同一个用例文件被多个测试函数加载时, 各函数的用例互不关联
+#
+# 有依赖关系或共享资源的用例合并为同一组, 并行执行（--dist loadgroup）时同组用例分配到同一个 worker 并按依赖顺序执行,
+# 没有关联的用例仍可分配到任意 worker 并发执行
+
+# 用例上记录元数据的 pytest 标记
+CASE_MARKER = 'case'
+
+# 同一测试函数的 async 用例并发执行的 pytest 标记, 参数为最大并发数（由 core.ddt 的 concurrency 参数添加）
+CONCURRENT_MARKER = 'concurrent'
+
+
+class ScheduleError(Exception):
+    """用例依赖无法满足（循环依赖）"""
+
+
+@dataclass
+class CaseNode:
+    """参与调度的用例, scope 为所属的测试函数（nodeid 去掉参数部分）"""
+    case_id: Optional[str]
+    depends_on: Tuple[str, ...] = ()
+    uses: Tuple[str, ...] = ()
+    scope: str = ''
+
+
+@dataclass
+class Schedule:
+    """调度结果
+
+    Attributes:
+        order (List[int]): 执行顺序（原始下标）
+        groups (Dict[int, str]): 需要分配到同一 worker 的用例下标 -> 组名, 独立用例不在其中
+        missing (Dict[int, List[str]]): 依赖了未收集用例的下标 -> 缺失的用例 id
+    """
+    order: List[int]
+    groups: Dict[int, str] = field(default_factory=dict)
+    missing: Dict[int, List[str]] = field(default_factory=dict)
+
+
+def case_meta(case: dict) -> Optional[CaseNode]:
+    """读取用例中的调度元数据, 没有声明时返回 None"""
+    depends_on = case.get('depends_on') or ()
+    uses = case.get('uses') or ()
+    if 'id' not in case and not depends_on and not uses:
+        return None
+    return CaseNode(
+        case_id=str(case.get('id') or case.get('title') or '') or None,
+        depends_on=tuple([depends_on] if isinstance(depends_on, str) else depends_on),
+        uses=tuple([uses] if isinstance(uses, str) else uses),
+    )
+
+
+class _UnionFind:
+
+    def __init__(self, size: int):
+        self.parent = list(range(size))
+
+    def find(self, x: int) -> int:
+        while self.parent[x] != x:
+            self.parent[x] = self.parent[self.parent[x]]
+            x = self.parent[x]
+        return x
+
+    def union(self, a: int, b: int) -> None:
+        a, b = self.find(a), self.find(b)
+        if a != b:
+            # 以较小的下标为根, 组名稳定
+            self.parent[max(a, b)] = min(a, b)
+
+
+def plan(nodes: Sequence[Optional[CaseNode]]) -> Schedule:
+    """根据用例的依赖与资源生成执行顺序和分组
+
+    执行顺序为拓扑序, 在满足依赖的前提下尽量保持原有顺序（如按历史耗时排好的顺序）
+
+    Args:
+        nodes (Sequence[Optional[CaseNode]]): 按当前顺序排列的用例, 没有元数据的用例为 None
+
+    Raises:
+        ScheduleError: 存在循环依赖
+    """
+    # 用例 id 与资源按 (scope, 名称) 区分
+    by_id: Dict[Tuple[str, str], List[int]] = {}
+    for i, node in enumerate(nodes):
+        if node and node.case_id:
+            by_id.setdefault((node.scope, node.case_id), []).append(i)
+
+    sorter = graphlib.TopologicalSorter()
+    union = _UnionFind(len(nodes))
+    missing: Dict[int, List[str]] = {}
+    resource_owner: Dict[Tuple[str, str], int] = {}
+
+    for i, node in enumerate(nodes):
+        sorter.add(i)
+        if node is None:
+            continue
+        for dep in node.depends_on:
+            if (node.scope, dep) not in by_id:
+                missing.setdefault(i, []).append(dep)
+                continue
+            for j in by_id[node.scope, dep]:
+                sorter.add(i, j)
+                union.union(i, j)
+        for resource in node.uses:
+            key = (node.scope, resource)
+            if key in resource_owner:
+                union.union(i, resource_owner[key])
+            else:
+                resource_owner[key] = i
+
+    try:
+        sorter.prepare()
+    except graphlib.CycleError as e:
+        cycle = ' -> '.join(str(nodes[i].case_id) for i in e.args[1])
+        raise ScheduleError(f'用例存在循环依赖: {cycle}') from None
+
+    # 每次取出可执行用例中原始下标最小的一个, 尽量保持原有顺序
+    order = []
+    ready = list(sorter.get_ready())
+    heapq.heapify(ready)
+    while ready:
+        i = heapq.heappop(ready)
+        order.append(i)
+        sorter.done(i)
+        for j in sorter.get_ready():
+            heapq.heappush(ready, j)
+
+    members: Dict[int, List[int]] = {}
+    for i in range(len(nodes)):
+        members.setdefault(union.find(i), []).append(i)
+
+    groups = {}
+    for root, indexes in members.items():
+        if len(indexes) < 2:
+            continue
+        # 组名优先使用共享的资源名, 便于在报告中识别
+        resources = sorted({r for i in indexes for r in (nodes[i].uses if nodes[i] else ())})
+        name = resources[0] if resources else f'depends:{nodes[root].case_id}'
+        if nodes[root].scope:
+            name = f'{nodes[root].scope}::{name}'
+        for i in indexes:
+            groups[i] = name
+
+    return Schedule(order=order, groups=groups, missing=missing)
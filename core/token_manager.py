@@ -0,0 +1,170 @@
+import base64
+import json
+import os
+import threading
+import time
+from typing import TYPE_CHECKING, Dict, Optional, Tuple
+
+from config.paths import CACHE_DIR
+from config.settings import SharedSettings
+from utils.file_lock import FileLock
+from utils.logger import logger
+
+if TYPE_CHECKING:
+    from core.api_client import APIClient
+
+# 登录接口
+LOGIN_ENDPOINT = 'login'
+
+# 多个 worker 进程共享的 token 存储, 文件权限为 0600, 写入时清除已过期的 token
+TOKEN_STORE_FILE = CACHE_DIR.joinpath('tokens.json')
+TOKEN_LOCK_FILE = CACHE_DIR.joinpath('tokens.lock')
+
+
+def parse_jwt_exp(token: str) -> Optional[float]:
+    """读取 JWT 中的过期时间 (exp), 不校验签名
+
+    Returns:
+        Optional[float]: 过期时间戳, 非 JWT 或没有 exp 字段时返回 None
+    """
+    try:
+        payload = token.split('.')[1]
+        payload += '=' * (-len(payload) % 4)
+        exp = json.loads(base64.urlsafe_b64decode(payload)).get('exp')
+        return float(exp) if exp is not None else None
+    except (IndexError, ValueError, TypeError, AttributeError):
+        return None
+
+
+class TokenManager:
+    """token 获取与缓存
+
+    - 按 (base_url, username) 缓存 token, 同一账号在整个会话中只登录一次
+    - 同一进程内多个线程并发获取同一账号的 token 时只会发起一次登录（single-flight）
+    - 多个 worker 进程通过文件锁 + 共享存储文件复用 token, 避免每个 worker 各自登录
+    - token 距过期不足 `TOKEN_REFRESH_MARGIN` 秒时视为失效, 在真正过期之前提前刷新;
+      有效期较短的 token 最多提前有效期的 20% 刷新, 避免每次请求都重新登录
+
+    过期时间优先读取 JWT 的 exp 字段, 否则按 `TOKEN_TTL` 估算
+    """
+
+    settings = SharedSettings()
+
+    # 有效期较短时, 提前刷新的时间不超过有效期的该比例
+    MAX_REFRESH_RATIO = 0.2
+
+    def __init__(self):
+        # (base_url, username) -> (token, 过期时间, 刷新时间)
+        self._tokens: Dict[Tuple[str, str], Tuple[str, float, float]] = {}
+        self._locks: Dict[Tuple[str, str], threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+
+
+    def _is_fresh(self, entry: Optional[Tuple[str, float, float]]) -> bool:
+        return bool(entry) and len(entry) == 3 and entry[2] > time.time()
+
+
+    def _key_lock(self, key: Tuple[str, str]) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault(key, threading.Lock())
+
+
+    @staticmethod
+    def _store_key(key: Tuple[str, str]) -> str:
+        return f'{key[0]}|{key[1]}'
+
+
+    def _read_store(self) -> Dict[str, list]:
+        try:
+            with open(TOKEN_STORE_FILE, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+
+    def _write_store(self, store: Dict[str, list]) -> None:
+        now = time.time()
+        store = {key: entry for key, entry in store.items() if len(entry) == 3 and entry[1] > now}
+        TOKEN_STORE_FILE.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = TOKEN_STORE_FILE.with_suffix(f'.{os.getpid()}.tmp')
+        fd = os.open(tmp_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with open(fd, 'w', encoding='utf-8') as f:
+            json.dump(store, f)
+        os.replace(tmp_file, TOKEN_STORE_FILE)
+
+
+    def _login(self, client: 'APIClient', username: str, password: str) -> Tuple[str, float, float]:
+        resp = client.request('POST', LOGIN_ENDPOINT, json={
+            'username': username,
+            'password': password
+        })
+        assert resp.status_code == 200, f'登录失败: {resp.status_code} - {resp.text}'
+
+        token = resp.json()['data']['token']
+
+        assert token, '登录失败, 未获取到 token'
+
+        now = time.time()
+        expires_at = parse_jwt_exp(token) or now + self.settings.TOKEN_TTL
+        margin = min(self.settings.TOKEN_REFRESH_MARGIN, max(0.0, expires_at - now) * self.MAX_REFRESH_RATIO)
+        logger.info(f'登录成功, 获取 token: {username}')
+        return token, expires_at, expires_at - margin
+
+
+    def get_token(self,
+                  client: 'APIClient',
+                  username: Optional[str] = None,
+                  password: Optional[str] = None,
+                  force: bool = False,
+                  ) -> str:
+        """获取 token, 优先使用缓存, 缓存失效时登录获取
+
+        Args:
+            client (APIClient): 用于发起登录请求的客户端
+            username (str, optional): 用户名, 默认使用配置中的 USERNAME
+            password (str, optional): 密码, 默认使用配置中的 PASSWORD
+            force (bool): 是否忽略缓存强制重新登录, 如 token 被服务端提前吊销
+
+        Returns:
+            str: token
+        """
+        username = username or self.settings.USERNAME
+        password = password or self.settings.PASSWORD
+        key = (client.base_url, username)
+
+        entry = self._tokens.get(key)
+        if not force and self._is_fresh(entry):
+            return entry[0]
+
+        with self._key_lock(key):
+            # 等待锁期间其它线程可能已完成登录
+            entry = self._tokens.get(key)
+            if not force and self._is_fresh(entry):
+                return entry[0]
+
+            with FileLock(TOKEN_LOCK_FILE):
+                store = self._read_store()
+                stored = store.get(self._store_key(key))
+                entry = tuple(stored) if stored else None
+
+                if force or not self._is_fresh(entry):
+                    entry = self._login(client, username, password)
+                    store[self._store_key(key)] = list(entry)
+                    self._write_store(store)
+
+            self._tokens[key] = entry
+            return entry[0]
+
+
+    def invalidate(self, base_url: Optional[str] = None, username: Optional[str] = None) -> None:
+        """清除进程内缓存的 token, 不指定参数时清除全部
+
+        共享存储中的 token 不受影响, 需要强制重新登录时使用 `get_token(..., force=True)`
+        """
+        for key in list(self._tokens):
+            if (base_url is None or key[0] == base_url) and (username is None or key[1] == username):
+                self._tokens.pop(key, None)
+
+
+# 单例
+token_manager = TokenManager()
@@ -3,9 +3,7 @@ from datetime import datetime
 import os
 import subprocess
 import sys
-import pytest
 from config.paths import REPORTS_DIR, ROOT_DIR
-from utils.clean_old_reports import clean_old_reports
 
 
 def parse_args():
@@ -15,20 +13,112 @@ def parse_args():
     parser.add_argument('-k', '--keyword', type=str, default='',help='按关键字过滤测试用例（传递给 pytest -k）')
     parser.add_argument('-m', '--marker', type=str, default='', help='按标记过滤测试用例（传递给 pytest -m）')
     parser.add_argument('--no-report', action='store_true', help='不生成 HTML 报告')
+    parser.add_argument('--report-mode', choices=['html', 'stream'], default='html',
+                        help='报告模式, stream 为流式报告: 每个用例结束时写入 JSON Lines, 结束后生成分页的静态 HTML, 适合大量用例 (default: html)')
+    parser.add_argument('--changed-since', type=str, default='', metavar='GIT_REF',
+                        help='只执行受 GIT_REF 之后的变更影响的用例（用例文件、响应模型、测试文件）以及上次失败的用例')
+    parser.add_argument('--cassette-mode', choices=['record', 'replay'], default=None,
+                        help='HTTP 录制/回放: record 录制真实请求与响应, replay 离线回放, 不访问网络')
+    parser.add_argument('--seed', type=int, default=None,
+                        help='用例模板 {{ unique.xxx }} 的随机种子, 指定后可复现同一组测试数据 (default: 随机生成, 回放时为录制时的种子)')
+    parser.add_argument('--log-profile', choices=['default', 'perf'], default='default',
+                        help='日志模式, perf 为低开销模式: 高频的成功日志只计数汇总, 文件日志缓冲写入 (default: default)')
+    parser.add_argument('--metrics', action='store_true',
+                        help='输出请求耗时明细（JSON Lines）和 Prometheus 格式的耗时直方图到 reports/')
+    parser.add_argument('-w', '--workers', type=int, default=0,
+                        help='并行执行的 worker 进程数, 按历史耗时均衡分配用例（0 表示串行执行）')
+
+    # 压测模式: 使用 cases/ 中的数据驱动用例按目标速率发送请求
+    load = parser.add_argument_group('压测模式')
+    load.add_argument('--load', type=str, default='', metavar='CASE_FILE',
+                      help='以压测模式运行指定用例文件（如 test_user.yaml）, 不执行 pytest')
+    load.add_argument('--endpoint', type=str, default=None, help='压测接口, 用例中的 request.endpoint 优先')
+    load.add_argument('--method', type=str, default='POST', help='压测请求方法, 用例中的 request.method 优先 (default: POST)')
+    load.add_argument('--rps', type=float, default=None, help='目标每秒请求数（开放模型）; 不指定时按 --concurrency 并发循环发送')
+    load.add_argument('--concurrency', type=int, default=10, help='封闭模型下的并发数 (default: 10)')
+    load.add_argument('--duration', type=float, default=60, help='压测持续时间, 单位秒 (default: 60)')
+    load.add_argument('--auth', action='store_true', help='压测请求携带登录 token')
     return parser.parse_args()
 
 
+def select_changed_tests(ref: str):
+    """受 ref 之后的变更影响的用例, 加上上次执行失败的用例; 返回 None 表示需要执行全部用例"""
+    from utils.impact import build_index, changed_files, last_failed, select_tests
+
+    index = build_index()
+    selected = select_tests(changed_files(ref), index)
+    if selected is None:
+        return None
+    # 上次失败的用例（已删除的用例除外）
+    return sorted(set(selected) | (last_failed() & set(index)))
+
+
+def resolve_seed(args) -> int:
+    """测试数据种子: --seed 优先; 回放时使用 cassette 录制时保存的种子; 否则随机生成"""
+    from utils.logger import logger
+
+    if args.seed is not None:
+        return args.seed
+    # 请求体中的 {{ unique.xxx }} 参与 cassette 匹配, 回放时必须与录制时的种子相同（录制时由 conftest 保存种子）
+    if args.cassette_mode == 'replay':
+        from core.cassette import load_seed
+
+        path = ROOT_DIR.joinpath('cassettes', f'{args.env}.jsonl')
+        seed = load_seed(path)
+        if seed is None:
+            logger.error(f'❌ {path} 没有录制时的种子, 请使用 --seed 指定录制时的 DATA_SEED')
+            sys.exit(2)
+        return seed
+    from utils.data_factory import new_seed
+    return new_seed()
+
+
+def run_load(args) -> int:
+    """压测模式入口"""
+    from core.load_runner import run_load_test
+    from utils.data_factory import factory
+    from utils.data_loader import load_test_data
+
+    token = None
+    if args.auth:
+        from core.api_client import APIClient
+        from core.token_manager import token_manager
+        token = token_manager.get_token(APIClient())
+
+    # 用例模板在每次请求时渲染, 使用 {{ unique.xxx }} 的用例每个请求得到新的值, 避免唯一约束冲突
+    return run_load_test(
+        load_test_data(args.load, render=False),
+        factory=factory,
+        token=token,
+        method=args.method,
+        endpoint=args.endpoint,
+        rps=args.rps,
+        concurrency=args.concurrency,
+        duration=args.duration,
+    )
+
+
 def main():
     args = parse_args()
     os.environ['APP_ENV'] = args.env
-
-    from config.settings import Settings
-    settings = Settings()
+    # 需要在导入 utils.logger 之前设置, pytest 子进程同样继承
+    os.environ['LOG_PROFILE'] = args.log_profile
+    # 通过 main.py 执行时推送测试报告, 可设置环境变量 NOTIFY_ENABLED=false 关闭
+    os.environ.setdefault('NOTIFY_ENABLED', 'true')
 
     REPORTS_DIR.mkdir(exist_ok=True)
 
     from utils.logger import logger
-    logger.info(f"🚀 启动自动化测试 | 环境: {args.env.upper()}")
+    from utils.clean_old_reports import clean_old_reports
+
+    # 测试数据种子, 并行执行时各 worker 使用同一个种子（按 worker 编号区分生成的值）
+    os.environ['DATA_SEED'] = str(resolve_seed(args))
+
+    if args.load:
+        logger.info(f"🚀 启动压测 | 环境: {args.env.upper()} | 用例文件: {args.load}")
+        sys.exit(run_load(args))
+
+    logger.info(f"🚀 启动自动化测试 | 环境: {args.env.upper()} | DATA_SEED: {os.environ['DATA_SEED']}")
 
     # 清理 7 天前的报告
     clean_old_reports()
@@ -40,10 +130,32 @@ def main():
 
     # 构建 pytest 命令
     cmd = [sys.executable, '-m', 'pytest']
-    # 添加测试目录
-    cmd.extend(['tests/'])
-    # 添加 HTML 报告（除非禁用）
-    if not args.no_report:
+    # 添加测试目录, 增量执行时只添加受影响的用例
+    if args.changed_since:
+        try:
+            selected = select_changed_tests(args.changed_since)
+        except (subprocess.CalledProcessError, FileNotFoundError) as e:
+            # 如 ref 不存在、不在 git 仓库中或未安装 git
+            detail = (getattr(e, 'stderr', None) or str(e)).strip().splitlines()[0]
+            logger.error(f'❌ 无法获取 {args.changed_since} 之后的变更: {detail}')
+            sys.exit(2)
+        if selected is None:
+            cmd.extend(['tests/'])
+        elif not selected:
+            logger.info(f'{args.changed_since} 之后的变更不影响任何用例, 跳过执行')
+            sys.exit(0)
+        else:
+            logger.info(f'增量执行 | 受影响的用例: {len(selected)}')
+            cmd.extend(selected)
+    else:
+        cmd.extend(['tests/'])
+    # 添加报告（除非禁用）
+    if not args.no_report and args.report_mode == 'stream':
+        cmd.extend([
+            f'--report-jsonl=reports/report_{now}.jsonl',
+            f'--report-path={report_file}'
+        ])
+    elif not args.no_report:
         cmd.extend([
             f'--html={report_file}',
             '--self-contained-html',
@@ -54,6 +166,20 @@ def main():
         cmd.extend(['-k', args.keyword])
     if args.marker:
         cmd.extend(['-m', args.marker])
+    # HTTP 录制/回放
+    if args.cassette_mode:
+        cmd.append(f'--cassette-mode={args.cassette_mode}')
+    # 请求耗时明细与直方图
+    if args.metrics:
+        cmd.extend([
+            f'--metrics-jsonl=reports/metrics_{now}.jsonl',
+            f'--metrics-prom=reports/metrics_{now}.prom'
+        ])
+    # 并行执行（pytest-xdist）, 各 worker 的结果汇总到同一份报告和通知中
+    # loadgroup: 有依赖或共享资源的用例（用例文件中的 depends_on/uses）分配到同一个 worker 按顺序执行, 其余用例与 load 相同
+    if args.workers > 1:
+        cmd.extend(['-n', str(args.workers), '--dist', 'loadgroup'])
+        logger.info(f'并行执行 | worker 数: {args.workers}')
 
     # 增加 verbosity
     cmd.append('-v')
@@ -0,0 +1,85 @@
+import gzip
+import json
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from core.api_client import APIClient
+from utils.metrics import JsonLinesSink, MetricsRecorder
+
+BODY = json.dumps({'code': 0, 'data': {'items': [{'id': i, 'name': f'user_{i}'} for i in range(2000)]}}).encode()
+
+
+class _GzipHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        body = gzip.compress(BODY) if 'gzip' in self.headers.get('Accept-Encoding', '') else BODY
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        if body is not BODY:
+            self.send_header('Content-Encoding', 'gzip')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def gzip_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _GzipHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_port}'
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def metrics(monkeypatch):
+    """使用独立的记录器, 不计入会话结束时的接口耗时汇总"""
+    recorder = MetricsRecorder()
+    monkeypatch.setattr('core.api_client.metrics', recorder)
+    return recorder
+
+
+def test_compression_and_keep_alive(gzip_server, metrics):
+    """测试用例 - 协商 gzip 压缩并复用连接, 按接口统计传输大小与解压后大小
+    """
+    client = APIClient(base_url=gzip_server, pool_maxsize=4)
+    for _ in range(3):
+        resp = client.get('/compressed')
+        assert resp.json()['data']['items'][-1]['id'] == 1999
+
+    stats = metrics.histogram.endpoints['GET /compressed']
+    assert stats.response_bytes == len(BODY) * 3
+    assert stats.wire_bytes < stats.response_bytes / 2
+    assert stats.new_connections == 1
+    assert list(metrics.histogram.endpoints) == ['GET /compressed']
+
+
+def test_dns_timed_separately(gzip_server, metrics, monkeypatch, tmp_path):
+    """测试用例 - DNS 解析耗时单独记录, 不计入 TCP 建连耗时
+    """
+    getaddrinfo = socket.getaddrinfo
+
+    def slow_getaddrinfo(host, *args, **kwargs):
+        if host == 'localhost':
+            time.sleep(0.2)
+        return getaddrinfo(host, *args, **kwargs)
+
+    monkeypatch.setattr(socket, 'getaddrinfo', slow_getaddrinfo)
+    metrics.add_sink(JsonLinesSink(tmp_path / 'timings.jsonl'))
+    client = APIClient(base_url=gzip_server.replace('127.0.0.1', 'localhost'))
+    client.get('/compressed')
+    client.get('/compressed')
+    metrics.close()
+
+    first, second = [json.loads(line) for line in (tmp_path / 'timings.jsonl').read_text().splitlines()]
+    assert first['dns'] >= 0.2 and first['connect'] < 0.2
+    assert second['dns'] is None and second['connect'] is None
@@ -0,0 +1,145 @@
+import json
+from typing import List, Optional
+
+import pytest
+import requests
+from pydantic import BaseModel, ConfigDict, field_validator
+
+from utils.assertions import (ItemRule, assert_items, assert_response_model, field_eq, field_range, field_rule,
+                              field_sorted, field_unique)
+from utils.model_adapters import get_adapter, partial_model
+
+
+def _items(count):
+    return [{'id': i, 'status': 1, 'age': i % 100, 'profile': {'score': i},
+             'start': i, 'end': i + 1} for i in range(count)]
+
+
+RULES = [
+    field_eq('status', 1),
+    field_range('age', 0, 99),
+    field_unique('id'),
+    field_sorted('profile.score'),
+    field_rule(['start', 'end'], lambda start, end: start < end, 'start < end'),
+]
+
+
+def test_assert_items_pass():
+    """测试用例 - 十万条数据全部满足规则
+    """
+    assert_items(_items(100_000), RULES)
+
+
+def test_assert_items_reports_all_violations():
+    """测试用例 - 一次报告所有规则的违规项及其下标
+    """
+    items = _items(10)
+    items[2]['status'] = 0
+    items[3]['id'] = 1
+    items[5]['profile']['score'] = -1
+    items[7]['end'] = 0
+    del items[8]['age']
+
+    with pytest.raises(AssertionError) as e:
+        assert_items(items, RULES, msg='用户列表')
+
+    message = str(e.value)
+    assert 'status == 1: [2]=0' in message
+    assert '[8]=<缺失>' in message
+    assert 'id 唯一: [3]=1（与第 1 项重复）' in message
+    assert 'profile.score 升序: [5]=-1（前一项 4）' in message
+    assert 'start < end: [7]=(7, 0)' in message
+
+
+def test_assert_items_values_shown_with_repr():
+    """测试用例 - 违规值以 repr 显示, 字符串 '1' 与整数 1 可以区分; 1 与 True 不视为重复
+    """
+    assert_items([{'id': 1}, {'id': True}, {'id': 1.5}, {'id': '1'}], [field_unique('id')])
+
+    items = [{'status': '1', 'id': 'a'}, {'status': 1, 'id': 'a'}, {'status': None, 'id': 'b'}]
+    with pytest.raises(AssertionError) as e:
+        assert_items(items, [field_eq('status', 1), field_unique('id'),
+                             field_rule('status', lambda s: s > 0, 'status > 0')])
+
+    message = str(e.value)
+    assert "status == 1: [0]='1', [2]=None" in message
+    assert "id 唯一: [1]='a'（与第 0 项重复）" in message
+    assert "status > 0: [0]='1'（TypeError: " in message
+
+
+def test_item_rule_is_abstract():
+    with pytest.raises(TypeError):
+        ItemRule(('id',), 'id')
+
+    class Incomplete(ItemRule):
+        pass
+
+    with pytest.raises(TypeError):
+        Incomplete(('id',), 'id')
+
+
+class Profile(BaseModel):
+    score: int
+    bio: str
+
+
+class User(BaseModel):
+    model_config = ConfigDict(str_strip_whitespace=True)
+
+    id: int
+    email: str
+    profile: Optional[Profile] = None
+
+    @field_validator('email')
+    @classmethod
+    def lower_email(cls, value: str) -> str:
+        return value.lower()
+
+
+class UserList(BaseModel):
+    code: int
+    data: List[User]
+
+
+def _response(body) -> requests.Response:
+    resp = requests.Response()
+    resp.status_code = 200
+    resp._content = body if isinstance(body, bytes) else json.dumps(body).encode()
+    return resp
+
+
+def test_assert_response_model_from_raw_bytes():
+    """测试用例 - 直接从原始字节校验 JSON, 无效 JSON 与不符合模型时给出不同的错误信息
+    """
+    body = {'code': 0, 'data': [{'id': 1, 'email': ' A@Example.com ', 'profile': {'score': 9, 'bio': ''}}]}
+
+    parsed = assert_response_model(_response(body), UserList)
+    assert parsed.data[0].email == 'a@example.com'
+    assert get_adapter(List[User]).validate_json(json.dumps(body['data']).encode())[0].profile.score == 9
+    assert get_adapter(UserList) is get_adapter(UserList)
+
+    with pytest.raises(AssertionError, match='不是有效的 JSON'):
+        assert_response_model(_response(b'<html>'), UserList, msg='用户列表')
+    with pytest.raises(AssertionError, match='不符合 UserList 模型'):
+        assert_response_model(_response({'code': 'x', 'data': []}), UserList, msg='用户列表')
+
+
+def test_partial_model_validates_selected_fields():
+    """测试用例 - 只校验选择的字段（包括列表中的嵌套字段）, 沿用原模型的配置与字段校验器
+    """
+    # 未选择的字段类型错误也不影响
+    body = {'code': 0, 'data': [{'id': 1, 'email': ' A@Example.com ', 'profile': {'score': 9, 'bio': None}}] * 3}
+
+    parsed = assert_response_model(_response(body), UserList, fields=['data.email', 'data.profile.score'])
+    user = parsed.data[0]
+    assert user.email == 'a@example.com'
+    assert user.profile.score == 9
+    assert not hasattr(user, 'id') and not hasattr(user.profile, 'bio')
+
+    body['data'][0] = {'id': 1, 'email': 'a@example.com', 'profile': {'score': 'high'}}
+    with pytest.raises(AssertionError, match='score'):
+        assert_response_model(_response(body), UserList, fields=['data.profile.score'])
+
+    assert partial_model(UserList, frozenset({'code'})) is partial_model(UserList, frozenset({'code'}))
+    with pytest.raises(ValueError, match='不存在字段'):
+        partial_model(UserList, frozenset({'data.name'}))
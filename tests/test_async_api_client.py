@@ -0,0 +1,86 @@
+import asyncio
+import json
+import os
+
+import httpx
+import pytest
+
+from core.async_api_client import AsyncAPIClient
+from core.ddt import ddt
+from models.response_models.user_model import CreateUserModel
+from utils.assertions import assert_response_model, assert_status_code
+from utils.data_loader import load_test_data
+
+
+def mock_register(request: httpx.Request) -> httpx.Response:
+    """模拟注册接口, gustavo@example.com 已被 gustavo 注册, 其他用户使用该邮箱时返回 400"""
+    body = json.loads(request.content)
+    if body['email'] == 'gustavo@example.com' and body['username'] != 'gustavo':
+        return httpx.Response(400, json={'code': 400, 'message': '用户已存在', 'data': None})
+    return httpx.Response(201, json={'code': 200, 'message': '注册成功', 'data': {'id': 1}})
+
+
+def mock_login(request: httpx.Request) -> httpx.Response:
+    """模拟登录接口, 密码为 12345 时登录成功"""
+    if json.loads(request.content)['password'] == '12345':
+        return httpx.Response(200, json={'code': 200, 'message': '登录成功', 'data': {'token': 'token'}})
+    return httpx.Response(401, json={'code': 401, 'message': '账号或密码错误', 'data': None})
+
+
+# test_login.json 的两条用例都到达后才继续, 依次执行时第一条用例等待超时
+_login_barrier = asyncio.Barrier(2)
+
+
+@ddt('test_login.json', concurrency=2)
+async def test_login_cases_concurrently(case, pytestconfig):
+    """测试用例 - concurrency: 同一函数的 async 用例并发执行, 结果分别报告
+    """
+    if os.getenv('PYTEST_XDIST_WORKER') and not getattr(pytestconfig.option, 'loadgroup', False):
+        pytest.skip('并行执行时只有 --dist loadgroup 会并发执行同一函数的用例')
+
+    async with AsyncAPIClient(transport=httpx.MockTransport(mock_login)) as client:
+        resp = await client.post('/login', json=case['data'])
+        await asyncio.wait_for(_login_barrier.wait(), timeout=2)
+
+    assert_status_code(resp, case['expected']['status_code'], msg=case.get('title'))
+
+
+@ddt('test_user.yaml')
+async def test_create_user_async(case):
+    """测试用例 - 创建用户（异步客户端）
+    """
+    async with AsyncAPIClient(transport=httpx.MockTransport(mock_register)) as client:
+        resp = await client.post('/register', json=case['data'])
+
+    assert_status_code(resp, case['expected']['status_code'], msg=case.get('title'))
+    if case['expected']['status_code'] == 201:
+        model = assert_response_model(resp, CreateUserModel)
+        assert model.data.id == 1
+
+
+async def test_create_user_concurrently():
+    """测试用例 - 并发执行全部创建用户用例, 结果顺序与用例顺序一致
+    """
+    cases = load_test_data('test_user.yaml')
+
+    in_flight = 0
+    peak = 0
+
+    async def slow_register(request: httpx.Request) -> httpx.Response:
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return mock_register(request)
+
+    async with AsyncAPIClient(transport=httpx.MockTransport(slow_register),
+                              max_connections_per_host=1) as client:
+        client.set_token('token')
+        resps = await client.gather(client.post('/register', json=case['data']) for case in cases)
+        assert resps[0].request.headers['Authorization'] == 'Bearer token'
+
+    # 单个 host 的并发数受限
+    assert peak == 1
+    for case, resp in zip(cases, resps):
+        assert_status_code(resp, case['expected']['status_code'], msg=case.get('title'))
@@ -0,0 +1,109 @@
+import json
+import threading
+
+import pytest
+import responses
+
+from core import token_manager as token_manager_module
+from core.api_client import APIClient
+from core.cassette import Cassette, CassetteMissError, load_seed
+from core.ddt import ddt
+from core.token_manager import TokenManager
+from utils.assertions import assert_status_code
+
+
+@ddt('test_user.yaml')
+def test_record_and_replay(tmp_path, case):
+    """测试用例 - 录制真实响应后离线回放, 结果一致
+    """
+    path = tmp_path.joinpath('cassette.jsonl')
+    expected_status = case['expected']['status_code']
+
+    with responses.RequestsMock() as mock:
+        mock.add(responses.POST, 'http://127.0.0.1/register',
+                 json={'code': expected_status, 'message': case['expected'].get('message'), 'data': None},
+                 status=expected_status)
+        recorder = Cassette(path, 'record')
+        recorded = APIClient(cassette=recorder).post('/register', json=case['data'])
+        recorder.close()
+
+    # 回放时不经过 responses, 任何真实网络请求都会失败
+    client = APIClient(cassette=Cassette(path, 'replay'))
+    # 请求体字段顺序不影响匹配
+    replayed = client.post('/register', json=dict(reversed(list(case['data'].items()))))
+
+    assert_status_code(replayed, expected_status, msg=case.get('title'))
+    assert replayed.json() == recorded.json()
+
+    with pytest.raises(CassetteMissError):
+        client.post('/register', json={'username': 'unknown'})
+
+
+def test_record_bypasses_token_cache(tmp_path, monkeypatch):
+    """测试用例 - 录制模式下即使已缓存 token 也重新登录, 登录请求写入 cassette, 回放时可以离线登录
+    """
+    monkeypatch.setattr(token_manager_module, 'TOKEN_STORE_FILE', tmp_path.joinpath('tokens.json'))
+    monkeypatch.setattr(token_manager_module, 'TOKEN_LOCK_FILE', tmp_path.joinpath('tokens.lock'))
+    monkeypatch.setattr('core.api_client.token_manager', TokenManager())
+    path = tmp_path.joinpath('cassette.jsonl')
+
+    with responses.RequestsMock() as mock:
+        login = mock.add(responses.POST, 'http://127.0.0.1/login',
+                         json={'code': 200, 'message': 'ok', 'data': {'token': 'recorded'}})
+        APIClient().authorize()
+        assert login.call_count == 1
+
+        recorder = Cassette(path, 'record')
+        APIClient(cassette=recorder).authorize()
+        recorder.close()
+        assert login.call_count == 2
+
+    assert [json.loads(line)['url'] for line in path.read_text(encoding='utf-8').splitlines()] == ['http://127.0.0.1/login']
+
+    # 清空 token 缓存后回放, 登录由 cassette 返回
+    monkeypatch.setattr('core.api_client.token_manager', TokenManager())
+    tmp_path.joinpath('tokens.json').unlink()
+    client = APIClient(cassette=Cassette(path, 'replay'))
+    client.authorize()
+    assert client.token == 'recorded'
+
+
+def test_concurrent_recorders_do_not_interleave(tmp_path):
+    """测试用例 - 多个 worker 同时录制到同一个文件, 每条记录完整占一行
+    """
+    path = tmp_path.joinpath('cassette.jsonl')
+    body = 'x' * 100_000
+
+    with responses.RequestsMock() as mock:
+        mock.add(responses.GET, 'http://127.0.0.1/large', body=body)
+        # 每个 Cassette 对应一个 worker 进程, 各自打开文件
+        recorders = [Cassette(path, 'record') for _ in range(4)]
+
+        def record(cassette):
+            client = APIClient(cassette=cassette)
+            for _ in range(10):
+                client.get('/large')
+
+        threads = [threading.Thread(target=record, args=(c,)) for c in recorders]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        for c in recorders:
+            c.close()
+
+    lines = path.read_text(encoding='utf-8').splitlines()
+    assert len(lines) == 40
+    assert all(json.loads(line)['url'] == 'http://127.0.0.1/large' for line in lines)
+
+
+def test_seed_saved_and_checked(tmp_path):
+    """测试用例 - 录制时保存 DATA_SEED, 回放时种子不一致直接报错
+    """
+    path = tmp_path.joinpath('cassette.jsonl')
+    Cassette(path, 'record', seed=42).close()
+    assert load_seed(path) == 42
+
+    Cassette(path, 'replay', seed=42)
+    with pytest.raises(ValueError, match='--seed 42'):
+        Cassette(path, 'replay', seed=7)
@@ -0,0 +1,92 @@
+import pytest
+
+from utils import data_factory
+from utils.data_factory import DataFactory
+
+CASE = {
+    'title': '注册后登录',
+    'seed': {'t_user_info': [{'name': '{{ unique.username.gustavo }}', 'email': '{{ unique.email.gustavo }}'}]},
+    'data': {'email': '{{ unique.email }}', 'confirm': 'mail: {{ unique.email }}', 'id': '{{ unique.int }}'},
+    'login': {'email': '{{ unique.email.gustavo }}'},
+    'expected': {'status_code': 201},
+}
+
+
+def test_render_templates():
+    """测试用例 - 模板渲染: 同一用例内复用, 具名值会话内共享, 不修改原用例
+    """
+    factory = DataFactory(seed=42)
+    first, second = factory.render(CASE, 'a.yaml#0'), factory.render(CASE, 'a.yaml#1')
+
+    assert first['data']['confirm'] == f'mail: {first["data"]["email"]}'
+    assert isinstance(first['data']['id'], int)
+    assert first['data']['email'] != second['data']['email']
+    assert first['login']['email'] == second['login']['email'] == first['seed']['t_user_info'][0]['email']
+    # 没有模板的部分原样复用
+    assert first['expected'] is CASE['expected']
+    assert CASE['data']['email'] == '{{ unique.email }}'
+
+    with pytest.raises(ValueError, match='unique.unknown'):
+        factory.render({'x': '{{ unique.unknown }}'}, 'a.yaml#2')
+
+
+def test_values_depend_only_on_seed_and_key():
+    """测试用例 - 值只由种子与用例键决定, 与渲染顺序、渲染了哪些用例无关（cassette 回放时请求体不变）
+    """
+    keys = [f'tests.test_user_api.test_create_user|test_user.yaml#{i}' for i in range(500)]
+
+    full = DataFactory(seed=1)
+    emails = {key: full.render(CASE, key)['data']['email'] for key in keys}
+
+    # 只渲染部分用例并逆序渲染, 如增量执行或分配到不同 worker
+    subset = DataFactory(seed=1)
+    assert all(subset.render(CASE, key)['data']['email'] == emails[key] for key in reversed(keys[::7]))
+    assert subset.named('email', 'gustavo') == full.named('email', 'gustavo')
+
+    # 不同种子、不同用例键之间不重复
+    other = DataFactory(seed=2)
+    values = list(emails.values()) + [other.render(CASE, key)['data']['email'] for key in keys]
+    assert len(set(values)) == len(values)
+
+
+def test_int_and_phone_ranges():
+    """测试用例 - unique.int 在 MySQL INT 范围内, 手机号为 11 位, 不同用例键之间不重复
+    """
+    factory = DataFactory(seed=1)
+    ints = [factory.value('int', str(i)) for i in range(20_000)]
+    assert all(1 <= i <= 2 ** 31 - 1 for i in ints)
+    assert len(set(ints)) == len(ints)
+
+    phones = [factory.value('phone', str(i)) for i in range(20_000)]
+    assert all(len(p) == 11 and p.startswith('1') for p in phones)
+    assert len(set(phones)) == len(phones)
+
+
+def test_hash_collision_rehashed(monkeypatch):
+    """测试用例 - 不同用例键哈希到同一个值时重新哈希, 相同用例键仍得到原来的值
+    """
+    monkeypatch.setitem(data_factory._GENERATORS, 'int', lambda digest: digest[0] % 2)
+    factory = DataFactory(seed=1)
+
+    first, second = factory.value('int', 'a'), factory.value('int', 'b')
+    assert {first, second} == {0, 1}
+    assert factory.value('int', 'a') == first
+
+
+def test_default_seed_is_random(monkeypatch):
+    monkeypatch.delenv('DATA_SEED', raising=False)
+    assert DataFactory().seed != DataFactory().seed
+
+
+def test_seeds():
+    """测试用例 - 前置数据按表登记并去重, 取出后清空
+    """
+    factory = DataFactory(seed=1)
+    rendered = factory.render(CASE, 'a.yaml#0')
+    factory.add_seed(rendered['seed'])
+    factory.add_seed(factory.render(CASE, 'a.yaml#1')['seed'])
+    factory.add_seed({'t_order': {'id': 1}})
+
+    seeds = factory.take_seeds()
+    assert seeds == {'t_user_info': rendered['seed']['t_user_info'], 't_order': [{'id': 1}]}
+    assert factory.take_seeds() == {}
@@ -0,0 +1,123 @@
+import os
+
+import pytest
+
+from utils import data_loader
+
+
+@pytest.fixture
+def case_file(tmp_path, monkeypatch):
+    """临时用例文件, 解析缓存写到临时目录, 并统计实际解析次数"""
+    monkeypatch.setattr(data_loader, 'CASES_CACHE_DIR', tmp_path.joinpath('cache'))
+    monkeypatch.setattr(data_loader, '_memory_cache', {})
+    parsed = []
+    parse = data_loader._parse
+    monkeypatch.setattr(data_loader, '_parse', lambda *args: parsed.append(args[0]) or parse(*args))
+
+    path = tmp_path.joinpath('cases.yaml')
+    path.write_text('- title: a\n  data: {name: walter}\n', encoding='utf-8')
+    return path, parsed
+
+
+def test_parse_cache_hit(case_file):
+    """测试用例 - 文件未修改时使用缓存, 每次返回独立的副本
+    """
+    path, parsed = case_file
+    first = data_loader._load_cached(path)
+    first[0]['data']['name'] = 'changed'
+
+    second = data_loader._load_cached(path)
+    assert second == [{'title': 'a', 'data': {'name': 'walter'}}]
+    # 进程内缓存失效后读取磁盘缓存, 同样不重新解析
+    data_loader._memory_cache.clear()
+    assert data_loader._load_cached(path) == second
+    assert len(parsed) == 1
+
+
+def test_parse_cache_invalidation(case_file):
+    """测试用例 - 文件内容修改后重新解析; 仅修改时间变化时复用
+    """
+    path, parsed = case_file
+    data_loader._load_cached(path)
+
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    data_loader._load_cached(path)
+    assert len(parsed) == 1
+
+    path.write_text('- title: b\n', encoding='utf-8')
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 2 * 10**9))
+    assert data_loader._load_cached(path) == [{'title': 'b'}]
+    assert len(parsed) == 2
+
+
+def test_parse_cache_corrupt(case_file):
+    """测试用例 - 磁盘缓存损坏时重新解析并覆盖
+    """
+    path, parsed = case_file
+    data_loader._load_cached(path)
+    data_loader._cache_file(path).write_bytes(b'not a pickle')
+    data_loader._memory_cache.clear()
+
+    assert data_loader._load_cached(path) == [{'title': 'a', 'data': {'name': 'walter'}}]
+    assert len(parsed) == 2
+    data_loader._memory_cache.clear()
+    data_loader._load_cached(path)
+    assert len(parsed) == 2
+
+
+def test_index_multi_document_yaml(tmp_path, monkeypatch):
+    """测试用例 - 多文档 YAML 按文档建立索引, 块标量中的 `---` 与非 ASCII 字符不影响偏移量
+    """
+    monkeypatch.setattr(data_loader, 'CASES_DIR', tmp_path)
+    tmp_path.joinpath('bulk.yaml').write_text(
+        '# 注释\n'
+        'title: 中文用例\n'
+        'body: |\n'
+        '  line\n'
+        '  ---\n'
+        '---\n'
+        '---\n'
+        '# 空文档之后\n'
+        'title: b\n',
+        encoding='utf-8',
+    )
+
+    offsets = data_loader.index_test_data('bulk.yaml')
+    cases = [data_loader.load_case_at('bulk.yaml', offset) for offset in offsets]
+    assert cases == [{'title': '中文用例', 'body': 'line\n---\n'}, {'title': 'b'}]
+    assert list(data_loader.iter_test_data('bulk.yaml')) == cases
+
+
+def test_index_rejects_single_document_list(tmp_path, monkeypatch):
+    """测试用例 - 单文档的用例列表不能按需加载
+    """
+    monkeypatch.setattr(data_loader, 'CASES_DIR', tmp_path)
+    tmp_path.joinpath('list.yaml').write_text('- title: a\n- title: b\n', encoding='utf-8')
+
+    with pytest.raises(ValueError, match='多文档'):
+        data_loader.index_test_data('list.yaml')
+    with pytest.raises(ValueError, match='多文档'):
+        list(data_loader.iter_test_data('list.yaml'))
+
+
+def test_iter_jsonl(tmp_path, monkeypatch):
+    """测试用例 - JSON Lines 逐行读取, 跳过空行
+    """
+    monkeypatch.setattr(data_loader, 'CASES_DIR', tmp_path)
+    tmp_path.joinpath('bulk.jsonl').write_text('{"title": "a"}\n\n{"title": "中"}\n', encoding='utf-8')
+
+    offsets = data_loader.index_test_data('bulk.jsonl')
+    assert [data_loader.load_case_at('bulk.jsonl', o) for o in offsets] == list(data_loader.iter_test_data('bulk.jsonl'))
+    assert len(offsets) == 2
+
+
+def test_unique_values_keyed_by_scope():
+    """测试用例 - 唯一值由加载方、文件与下标决定: 同一加载方重复加载得到相同的值, 不同加载方不同
+    """
+    first = data_loader.load_test_data('test_user.yaml', scope='tests.a.test_a')
+    again = data_loader.load_test_data('test_user.yaml', scope='tests.a.test_a')
+    other = data_loader.load_test_data('test_user.yaml', scope='tests.b.test_b')
+
+    assert first[0]['data']['email'] == again[0]['data']['email'] != other[0]['data']['email']
+    assert data_loader.load_test_data('test_user.yaml', render=False)[0]['data']['email'] == '{{ unique.email }}'
@@ -0,0 +1,34 @@
+from types import SimpleNamespace
+
+from utils.durations import sort_by_duration
+from utils.history import CaseResult, HistoryStore, base_nodeid
+
+
+def _items(*nodeids):
+    return [SimpleNamespace(nodeid=nodeid) for nodeid in nodeids]
+
+
+def test_sort_by_duration():
+    """测试用例 - 按历史耗时从长到短排序, 没有记录的用例按中位数估计, 耗时相同保持原有顺序
+    """
+    durations = {'t::a': 1.0, 't::b': 5.0, 't::c': 3.0}
+    items = _items('t::a', 't::new', 't::b', 't::c', 't::same')
+    ordered = [item.nodeid for item in sort_by_duration(items, durations)]
+    assert ordered == ['t::b', 't::new', 't::c', 't::same', 't::a']
+    # 没有历史记录时保持原有顺序
+    assert sort_by_duration(items, {}) is items
+
+
+def test_loadgroup_suffix(tmp_path):
+    """测试用例 - loadgroup 的 `@组名` 后缀不影响耗时记录与查找
+    """
+    assert base_nodeid('t.py::test_a[x@y.com]@user:gustavo') == 't.py::test_a[x@y.com]'
+    assert base_nodeid('t.py::test_a[x@y.com]') == 't.py::test_a[x@y.com]'
+
+    store = HistoryStore(tmp_path.joinpath('history.db'))
+    store.record_run('test', [CaseResult('t.py::test_slow@user:gustavo', 'passed', 5.0),
+                              CaseResult('t.py::test_fast', 'passed', 1.0)])
+    durations = store.durations()
+    assert durations == {'t.py::test_slow': 5.0, 't.py::test_fast': 1.0}
+    ordered = sort_by_duration(_items('t.py::test_fast@g', 't.py::test_slow'), durations)
+    assert [item.nodeid for item in ordered] == ['t.py::test_slow', 't.py::test_fast@g']
@@ -0,0 +1,22 @@
+from utils.history import CaseResult, HistoryStore
+
+
+def test_history_trends(tmp_path):
+    """测试用例 - 按历史记录查询最慢用例、耗时回归与不稳定用例
+    """
+    store = HistoryStore(tmp_path.joinpath('history.db'))
+    outcomes = ['passed', 'failed', 'passed', 'passed', 'failed']
+    for i, outcome in enumerate(outcomes):
+        store.record_run('test', [
+            CaseResult('tests/test_a.py::test_slow', 'passed', 2.0 if i < 4 else 5.0),
+            CaseResult('tests/test_a.py::test_fast', 'passed', 0.01),
+            CaseResult('tests/test_a.py::test_flaky', outcome, 0.2, title='不稳定'),
+        ])
+
+    assert store.durations()['tests/test_a.py::test_slow'] == 2.0
+    assert store.slowest(1) == [('tests/test_a.py::test_slow', 2.0)]
+    assert store.regressions() == [('tests/test_a.py::test_slow', 2.0, 5.0)]
+    assert store.flaky() == [('tests/test_a.py::test_flaky', 5, 2, 3)]
+    assert len(store.summary_lines()) == 3
+    # 按环境过滤
+    assert HistoryStore(store.path, env='prod').durations() == {}
@@ -0,0 +1,39 @@
+from utils.impact import build_index, select_tests
+
+
+def test_select_tests():
+    """测试用例 - 按变更的用例文件、模型与测试文件选择受影响的用例
+    """
+    index = build_index()
+    create_user = index['tests/test_user_api.py::test_create_user']
+    assert 'cases/test_user.yaml' in create_user.files
+    assert 'models/response_models/user_model.py' in create_user.files
+    assert '/register' in create_user.endpoints
+
+    selected = select_tests(['cases/test_user.yaml'], index)
+    assert 'tests/test_user_api.py::test_create_user' in selected
+    assert 'tests/test_user_api.py::test_create_user_bulk' not in selected
+    assert 'tests/test_user_api.py::test_create_user' in select_tests(['models/response_models/user_model.py'], index)
+    selected = select_tests(['tests/test_paginator.py', 'README.md'], index)
+    assert {'tests/test_paginator.py::test_paginate_page', 'tests/test_paginator.py::test_paginate_cursor'} <= set(selected)
+    assert all(nodeid.startswith('tests/test_paginator.py::') for nodeid in selected)
+    # 函数体中通过 load_test_data 加载的用例文件同样记录
+    assert 'tests/test_async_api_client.py::test_create_user_concurrently' in select_tests(['cases/test_user.yaml'], index)
+
+
+def test_select_tests_runs_all_when_impact_unknown():
+    """测试用例 - 无法判断影响范围时执行全部用例, 只有没有变更时不执行
+    """
+    index = build_index()
+
+    # 框架代码
+    assert select_tests(['core/api_client.py'], index) is None
+    assert select_tests(['utils/model_adapters.py', 'cases/test_user.yaml'], index) is None
+    assert select_tests(['tests/__init__.py'], index) is None
+    # 没有被用例直接引用的模型
+    assert select_tests(['models/db_models/db_user_model.py'], index) is None
+    # 有变更但没有选出用例
+    assert select_tests(['cases/not_loaded_by_any_test.yaml'], index) is None
+
+    assert select_tests([], index) == []
+    assert select_tests(['README.md', 'reports/report.html'], index) == []
@@ -0,0 +1,83 @@
+import json
+import time
+
+import httpx
+
+from core.async_api_client import AsyncAPIClient
+from core.load_runner import LoadRunner
+from utils.data_factory import DataFactory
+
+
+CASES = [
+    {'title': '查询用户', 'request': {'method': 'GET', 'endpoint': '/users'},
+     'data': {'page': 1}, 'expected': {'status_code': 200}},
+    {'title': '创建用户', 'request': {'method': 'POST', 'endpoint': '/register'},
+     'data': {'email': 'a@example.com'}, 'expected': {'status_code': 201}},
+]
+
+
+async def test_open_model_pacing_and_aggregation():
+    """测试用例 - 开放模型按 rps 发送请求, GET 的 data 作为查询参数, 按用例汇总结果
+    """
+    sent = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        sent.append((time.perf_counter(), request))
+        if request.method == 'GET':
+            return httpx.Response(200, json={'page': request.url.params['page']})
+        # 状态码与预期不一致
+        return httpx.Response(400)
+
+    client = AsyncAPIClient(base_url='http://test', transport=httpx.MockTransport(handler))
+    runner = LoadRunner(CASES, rps=50, duration=0.21, client=client)
+    stats = await runner.run()
+
+    # 0.21s 内按 20ms 间隔安排 11 个请求, 不会提前集中发送
+    assert len(sent) == 11
+    assert sent[-1][0] - sent[0][0] >= 0.19
+    assert runner.elapsed >= 0.2
+
+    gets = [r for _, r in sent if r.method == 'GET']
+    posts = [r for _, r in sent if r.method == 'POST']
+    assert all(r.url.params['page'] == '1' and not r.content for r in gets)
+    assert all(r.content == b'{"email":"a@example.com"}' and not r.url.params for r in posts)
+
+    assert stats['查询用户'].latency.count == 6
+    assert stats['查询用户'].failures == 0
+    assert stats['创建用户'].latency.count == 5
+    assert stats['创建用户'].mismatches == 5
+    assert len(runner.report_lines()) == 3
+
+
+async def test_request_errors_are_counted():
+    """测试用例 - 请求异常计入 errors, 耗时同样记录
+    """
+    def handler(request: httpx.Request) -> httpx.Response:
+        raise httpx.ConnectError('connection refused', request=request)
+
+    client = AsyncAPIClient(base_url='http://test', max_retries=0, transport=httpx.MockTransport(handler))
+    runner = LoadRunner(CASES[:1], rps=100, duration=0.045, client=client)
+    stats = await runner.run()
+
+    assert stats['查询用户'].errors == stats['查询用户'].latency.count == 5
+
+
+async def test_templates_rendered_per_request():
+    """测试用例 - 传入 factory 时每个请求渲染一次用例模板, 唯一值不重复, 原始用例不变
+    """
+    emails = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        emails.append(json.loads(request.content)['email'])
+        return httpx.Response(201)
+
+    cases = [{'title': '创建用户', 'request': {'method': 'POST', 'endpoint': '/register'},
+              'data': {'email': '{{ unique.email }}'}, 'expected': {'status_code': 201}}]
+    client = AsyncAPIClient(base_url='http://test', transport=httpx.MockTransport(handler))
+    runner = LoadRunner(cases, rps=200, duration=0.05, client=client, factory=DataFactory(seed=1))
+    stats = await runner.run()
+
+    assert len(emails) == stats['创建用户'].latency.count == 10
+    assert len(set(emails)) == 10
+    assert cases[0]['data']['email'] == '{{ unique.email }}'
+    assert stats['创建用户'].mismatches == 0
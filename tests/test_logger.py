@@ -0,0 +1,48 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from utils.logger import HotPathLog, logger
+
+
+@pytest.fixture
+def messages():
+    """收集本测试中输出的日志"""
+    records = []
+    handler_id = logger.add(lambda message: records.append(message.record), level='DEBUG', format='{message}')
+    yield records
+    logger.remove(handler_id)
+
+
+def test_hot_log_counts_and_flushes(messages):
+    """测试用例 - perf 模式下只计数不输出, flush 时按次数汇总输出一行并清空计数
+    """
+    hot_log = HotPathLog(enabled=True)
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(lambda _: hot_log.success('assert.status_code', '状态码断言通过: {}', 200), range(1000)))
+    hot_log.info('mysql.checkout', '获取数据库连接')
+
+    assert not messages
+    hot_log.flush()
+
+    [record] = messages
+    assert record['level'].name == 'INFO'
+    assert record['message'] == '高频日志汇总: assert.status_code x 1000, mysql.checkout x 1'
+
+    # 计数已清空, 再次 flush 不输出
+    hot_log.flush()
+    assert len(messages) == 1
+
+
+def test_hot_log_disabled_logs_directly(messages):
+    """测试用例 - default 模式下直接输出, 日志位置为调用方
+    """
+    hot_log = HotPathLog(enabled=False)
+    hot_log.success('assert.status_code', '状态码断言通过: {}', 201)
+    hot_log.flush()
+
+    [record] = messages
+    assert record['level'].name == 'SUCCESS'
+    assert record['message'] == '状态码断言通过: 201'
+    assert record['function'] == 'test_hot_log_disabled_logs_directly'
@@ -0,0 +1,83 @@
+import json
+import random
+
+import pytest
+
+from utils.metrics import (HistogramSink, JsonLinesSink, LatencyHistogram, MetricsSink,
+                           PrometheusSink, RequestTiming, endpoint_key)
+
+
+def test_endpoint_key():
+    """测试用例 - 路径中的数字 id 与 UUID 替换为占位符
+    """
+    assert endpoint_key('get', 'users/42') == 'GET /users/{id}'
+    assert endpoint_key('GET', '/orders/3f2b8c1e-9a4d-4e2f-8b7a-1c2d3e4f5a6b/items?page=2') == 'GET /orders/{uuid}/items'
+    assert endpoint_key('POST', '/v2/login/') == 'POST /v2/login'
+    assert RequestTiming('GET', '/users/7', 200, 0.1).key == 'GET /users/{id}'
+
+
+def test_histogram_percentiles():
+    """测试用例 - 对数分桶的百分位误差不超过 5%
+    """
+    rng = random.Random(0)
+    values = sorted(rng.uniform(0.001, 2.0) for _ in range(10000))
+    histogram = LatencyHistogram()
+    for value in values:
+        histogram.add(value)
+
+    for p in (50, 95, 99):
+        exact = values[int(len(values) * p / 100) - 1]
+        assert histogram.percentile(p) == pytest.approx(exact, rel=0.05)
+    assert histogram.percentile(100) == values[-1]
+    assert histogram.mean == pytest.approx(sum(values) / len(values))
+    assert LatencyHistogram().percentile(50) == 0.0
+
+
+def test_histogram_merge_across_workers():
+    """测试用例 - worker 导出的统计合并后与单进程统计一致
+    """
+    timings = [RequestTiming('GET', f'/users/{i}', 500 if i % 10 == 0 else 200, i / 1000, retries=i % 2,
+                             response_bytes=100, wire_bytes=40, connect=0.01 if i < 2 else None) for i in range(1, 101)]
+    single, worker_a, worker_b = HistogramSink(), HistogramSink(), HistogramSink()
+    for i, timing in enumerate(timings):
+        single.record(timing)
+        (worker_a if i % 2 else worker_b).record(timing)
+
+    controller = HistogramSink()
+    # xdist 回传时经过序列化
+    controller.merge(json.loads(json.dumps(worker_a.export())))
+    controller.merge(json.loads(json.dumps(worker_b.export())))
+
+    merged, expected = controller.endpoints['GET /users/{id}'], single.endpoints['GET /users/{id}']
+    assert list(controller.endpoints) == ['GET /users/{id}']
+    assert merged.latency.buckets == expected.latency.buckets
+    assert merged.latency.total == pytest.approx(expected.latency.total)
+    assert (merged.latency.count, merged.latency.min, merged.latency.max) == (100, 0.001, 0.1)
+    assert (merged.errors, merged.retries, merged.new_connections) == (10, 50, 1)
+    assert merged.latency.percentile(95) == expected.latency.percentile(95)
+
+
+def test_sinks(tmp_path):
+    """测试用例 - JSON Lines 逐条写入, Prometheus 按接口模板输出累计直方图
+    """
+    jsonl = JsonLinesSink(tmp_path.joinpath('metrics.jsonl'))
+    prom = PrometheusSink(tmp_path.joinpath('metrics.prom'), labels={'worker': 'gw0'})
+    for i, total in enumerate((0.003, 0.2, 3.0)):
+        timing = RequestTiming('get', f'/users/{i}', 200, total)
+        jsonl.record(timing)
+        prom.record(timing)
+    jsonl.close()
+    prom.close()
+
+    rows = [json.loads(line) for line in jsonl.path.read_text(encoding='utf-8').splitlines()]
+    assert [row['key'] for row in rows] == ['GET /users/{id}'] * 3
+
+    text = prom.path.read_text(encoding='utf-8')
+    labels = 'method="GET",endpoint="/users/{id}",worker="gw0"'
+    assert f'api_request_duration_seconds_bucket{{{labels},le="0.005"}} 1' in text
+    assert f'api_request_duration_seconds_bucket{{{labels},le="0.25"}} 2' in text
+    assert f'api_request_duration_seconds_bucket{{{labels},le="+Inf"}} 3' in text
+    assert f'api_request_duration_seconds_count{{{labels}}} 3' in text
+
+    with pytest.raises(TypeError):
+        MetricsSink()
@@ -0,0 +1,265 @@
+import pytest
+from pydantic import BaseModel
+from pymysql.converters import escape_item
+from pymysql.cursors import SSCursor, SSDictCursor
+
+from core.mysql_client import MySQLClient
+from core.query_cache import QueryCache
+
+
+class FakeCursor:
+    """记录执行的 SQL, mogrify 与 pymysql 一样转义参数"""
+
+    def __init__(self):
+        self.executed = []
+        self.results = []
+        self._literals = 0
+
+    def mogrify(self, query, args):
+        self._literals += 1
+        return query % tuple(escape_item(v, 'utf8mb4') for v in args)
+
+    def execute(self, sql, params=None):
+        self.executed.append((sql, params))
+        # 多行 INSERT 的受影响行数为本批 mogrify 的行数
+        affected, self._literals = self._literals, 0
+        return affected
+
+    def fetchall(self):
+        return self.results.pop(0)
+
+    def close(self):
+        pass
+
+
+class FakeStreamCursor:
+    """服务端游标, 记录每次 fetchmany 读取的行数"""
+
+    def __init__(self, cursor_class, rows):
+        self.cursor_class = cursor_class
+        self.rows = rows
+        self.description = [('id',), ('name',)]
+        self.fetches = []
+        self.closed = False
+        self._offset = 0
+
+    def execute(self, sql, params=None):
+        pass
+
+    def fetchmany(self, size):
+        batch = self.rows[self._offset:self._offset + size]
+        self._offset += len(batch)
+        self.fetches.append(len(batch))
+        if self.cursor_class is SSCursor:
+            return [tuple(row.values()) for row in batch]
+        return batch
+
+    def close(self):
+        self.closed = True
+
+
+class FakeConnection:
+
+    def __init__(self, rows=()):
+        self.commits = 0
+        self.rows = list(rows)
+        self.stream_cursors = []
+
+    def cursor(self, cursor_class):
+        cursor = FakeStreamCursor(cursor_class, self.rows)
+        self.stream_cursors.append(cursor)
+        return cursor
+
+    def begin(self):
+        pass
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        pass
+
+
+@pytest.fixture
+def client():
+    """不连接数据库的客户端, 游标与连接替换为 Fake"""
+    client = MySQLClient()
+    client.conn = FakeConnection()
+    client.cursor = FakeCursor()
+    client._max_allowed_packet = 4 * 1024 * 1024
+    return client
+
+
+def test_bulk_insert_escapes_values(client):
+    """测试用例 - 每行通过 cursor.mogrify 转义, 字段名加反引号
+    """
+    affected = client.bulk_insert('t_user_info', [{'id': 1, 'name': "o'brien"}, {'id': 2, 'name': None}])
+
+    assert affected == 2
+    [(sql, params)] = client.cursor.executed
+    assert sql == "INSERT INTO `t_user_info` (`id`, `name`) VALUES (1, 'o\\'brien'), (2, NULL)"
+    assert params is None
+    assert client.conn.commits == 1
+
+
+def test_bulk_insert_ignore(client):
+    client.bulk_insert('t_user_info', [{'id': 1}], ignore=True)
+    assert client.cursor.executed[0][0].startswith('INSERT IGNORE INTO `t_user_info`')
+
+
+def test_bulk_insert_chunk_size(client):
+    """测试用例 - 按 chunk_size 分批, 不在事务中时每批提交一次
+    """
+    rows = [{'id': i} for i in range(7)]
+    assert client.bulk_insert('t_user_info', rows, chunk_size=3) == 7
+
+    statements = [sql for sql, _ in client.cursor.executed]
+    assert [sql.count('(') - 1 for sql in statements] == [3, 3, 1]
+    assert statements[-1].endswith('VALUES (6)')
+    assert client.conn.commits == 3
+
+
+def test_bulk_insert_max_allowed_packet(client):
+    """测试用例 - 单条 SQL 不超过 max_allowed_packet 的 90%, 事务中不提交
+    """
+    client._max_allowed_packet = 200
+    rows = [{'id': i, 'name': 'x' * 40} for i in range(10)]
+
+    with client.transaction():
+        assert client.bulk_insert('t_user_info', rows) == 10
+
+    statements = [sql for sql, _ in client.cursor.executed]
+    assert len(statements) > 1
+    assert all(len(sql.encode('utf-8')) <= 180 for sql in statements)
+    assert sum(sql.count("'x") for sql in statements) == 10
+    # 只有事务退出时提交一次
+    assert client.conn.commits == 1
+
+
+def test_verify_rows_exist(client):
+    """测试用例 - 由数据库判断是否存在, 按批返回不存在的值, 保持传入顺序并去重
+    """
+    # 第一批中下标 1 的值不存在, 第二批全部存在
+    client.cursor.results = [[{'i': 1}], []]
+
+    missing = client.verify_rows_exist('t_user_info', 'email', ['A@example.com', 'b@example.com', 'A@example.com', 'c@example.com'],
+                                       chunk_size=2)
+
+    assert missing == ['b@example.com']
+    (sql, params), (_, second) = client.cursor.executed
+    assert params == ['A@example.com', 'b@example.com']
+    assert second == ['c@example.com']
+    assert sql.count('NOT EXISTS (SELECT 1 FROM `t_user_info` WHERE `email` = %s)') == 2
+
+
+ROWS = [{'id': i, 'name': f'user_{i}'} for i in range(25)]
+
+
+class UserRow(BaseModel):
+    id: int
+    name: str
+
+
+def test_iter_query_fetches_in_batches(client):
+    """测试用例 - 使用服务端游标按 batch_size 逐批读取, 读取完毕后关闭游标
+    """
+    client.conn = FakeConnection(ROWS)
+
+    assert list(client.iter_query('SELECT id, name FROM t_user_info', batch_size=10)) == ROWS
+
+    [cursor] = client.conn.stream_cursors
+    assert cursor.cursor_class is SSDictCursor
+    assert cursor.fetches == [10, 10, 5, 0]
+    assert cursor.closed
+    assert not client._stream_cursors
+
+
+def test_iter_query_rows_as_model_or_tuple(client):
+    client.conn = FakeConnection(ROWS[:3])
+
+    users = list(client.iter_query('SELECT id, name FROM t_user_info', model=UserRow))
+    assert users[2] == UserRow(id=2, name='user_2')
+
+    rows = list(client.iter_query('SELECT id, name FROM t_user_info', as_tuple=True))
+    assert client.conn.stream_cursors[1].cursor_class is SSCursor
+    assert rows[1].id == 1 and rows[1].name == 'user_1'
+
+    with pytest.raises(ValueError):
+        next(client.iter_query('SELECT 1', model=UserRow, as_tuple=True))
+
+
+def test_iter_query_closes_cursor_on_early_break(client):
+    """测试用例 - 提前结束迭代时不再读取后续批次, 生成器关闭时关闭游标
+    """
+    client.conn = FakeConnection(ROWS)
+
+    rows = client.iter_query('SELECT id, name FROM t_user_info', batch_size=10)
+    for row in rows:
+        if row['id'] == 3:
+            break
+
+    [cursor] = client.conn.stream_cursors
+    assert cursor.fetches == [10]
+    assert not cursor.closed
+    rows.close()
+    assert cursor.closed
+    assert not client._stream_cursors
+
+
+def test_iter_query_cursor_closed_on_release(client, monkeypatch):
+    """测试用例 - 未读取完的游标在归还连接时关闭
+    """
+    client.conn = FakeConnection(ROWS)
+    monkeypatch.setattr(client.pool, 'release', lambda conn: None)
+
+    rows = client.iter_query('SELECT id, name FROM t_user_info', batch_size=10)
+    next(rows)
+    [cursor] = client.conn.stream_cursors
+
+    client.__exit__(None, None, None)
+    assert cursor.closed
+    assert not client._stream_cursors
+
+
+def test_cache_invalidated_after_commit(client, monkeypatch):
+    """测试用例 - 事务中的写操作在提交后才失效查询缓存, 回滚时不失效
+    """
+    cache = QueryCache()
+    monkeypatch.setattr(MySQLClient, 'query_cache', cache)
+    cache.set('users', 1, frozenset({'t_user_info'}))
+
+    with client.transaction():
+        client.execute('UPDATE t_user_info SET name = %s WHERE id = %s', ('walter', 1))
+        client.bulk_insert('t_order', [{'id': 1}])
+        # 提交前其它连接读到的仍是旧数据, 缓存保持不变
+        assert cache.get('users') == (True, 1)
+        assert client.conn.commits == 0
+
+    assert client.conn.commits == 1
+    assert cache.get('users') == (False, None)
+
+    cache.set('users', 2, frozenset({'t_user_info'}))
+    with pytest.raises(RuntimeError):
+        with client.transaction():
+            client.execute('DELETE FROM t_user_info WHERE id = %s', (1,))
+            raise RuntimeError
+    assert cache.get('users') == (True, 2)
+    assert not client._pending_writes
+
+
+def test_cached_result_type_matches_uncached(client, monkeypatch):
+    """测试用例 - 命中缓存时返回与直接查询相同类型的副本, 无法解析表名的查询不缓存
+    """
+    monkeypatch.setattr(MySQLClient, 'query_cache', QueryCache())
+    client.use_cache = True
+    client.cursor.results = [(), ({'id': 1},), ({'id': 1},), ({'id': 1},)]
+
+    assert client.query_all('SELECT id FROM t_user_info WHERE 0') == ()
+    first = client.query_all('SELECT id FROM t_user_info')
+    cached = client.query_all('SELECT id FROM t_user_info')
+    assert type(first) is type(cached) is tuple
+    assert cached == first and cached[0] is not first[0]
+
+    client.query_all("SELECT TRIM('x' FROM 'xyx')")
+    client.query_all("SELECT TRIM('x' FROM 'xyx')")
+    assert len(client.cursor.executed) == 4
@@ -0,0 +1,115 @@
+import math
+import threading
+import time
+
+import pytest
+
+from core.mysql_pool import MySQLPool, MySQLPoolManager, PoolStats
+
+
+class FakeConnection:
+
+    def __init__(self, pool):
+        self.pool = pool
+
+    def close(self):
+        self.pool.available.release()
+
+
+class FakePooledDB:
+    """替代 PooledDB, 连接全部被占用时阻塞等待"""
+
+    def __init__(self, max_connections):
+        self.available = threading.Semaphore(max_connections)
+        self.closed = False
+
+    def connection(self):
+        self.available.acquire()
+        return FakeConnection(self)
+
+    def close(self):
+        self.closed = True
+
+
+def make_pool(size=1, max_overflow=1) -> MySQLPool:
+    # 连接池惰性创建连接, 不会连接数据库
+    pool = MySQLPool({'host': '127.0.0.1', 'port': 3306, 'user': 'test', 'password': ''}, size, max_overflow)
+    pool._pool = FakePooledDB(pool.max_connections)
+    return pool
+
+
+@pytest.fixture
+def manager(monkeypatch):
+    """隔离全局连接池, 避免影响会话结束时的统计"""
+    monkeypatch.setattr(MySQLPoolManager, '_pools', {})
+    monkeypatch.setattr(MySQLPoolManager, '_closed_stats', PoolStats())
+    return MySQLPoolManager
+
+
+def test_pool_stats_merge():
+    total = PoolStats(checkouts=3, wait_time=0.5, max_wait_time=0.3, exhausted=1, peak_in_use=4)
+    total.merge(PoolStats(checkouts=2, wait_time=0.25, max_wait_time=0.4, exhausted=2, peak_in_use=2))
+
+    # 次数与耗时累加, 最大值取较大者
+    assert total == PoolStats(checkouts=5, wait_time=0.75, max_wait_time=0.4, exhausted=3, peak_in_use=4)
+
+
+def test_peak_and_wait_accounting():
+    """测试用例 - 连接耗尽时计数, 等待耗时计入统计, 峰值不超过连接上限
+    """
+    pool = make_pool(size=1, max_overflow=1)
+    first, second = pool.connection(), pool.connection()
+    assert pool.stats.peak_in_use == 2
+    assert pool.stats.exhausted == 0
+
+    acquired = []
+    waiter = threading.Thread(target=lambda: acquired.append(pool.connection()))
+    waiter.start()
+    time.sleep(0.1)
+    assert not acquired
+    pool.release(first)
+    waiter.join(timeout=5)
+
+    assert acquired
+    assert pool.stats.checkouts == 3
+    assert pool.stats.exhausted == 1
+    assert pool.stats.peak_in_use == 2
+    assert pool.stats.max_wait_time >= 0.09
+    assert pool.stats.wait_time >= pool.stats.max_wait_time
+
+    pool.release(second)
+    pool.release(acquired[0])
+    assert pool._in_use == 0
+
+
+def test_manager_stats_include_closed_pools(manager):
+    """测试用例 - 汇总统计包括已关闭的连接池
+    """
+    closed, open_ = make_pool(), make_pool()
+    manager._pools.update({('a',): closed, ('b',): open_})
+    closed.release(closed.connection())
+    closed.release(closed.connection())
+    open_.release(open_.connection())
+
+    assert manager.stats().checkouts == 3
+
+    assert manager.close_all() == []
+    assert closed._pool.closed and open_._pool.closed
+    assert not manager._pools
+    assert manager.stats().checkouts == 3
+    assert manager.stats().peak_in_use == 1
+
+
+def test_get_pool_splits_size_across_workers(manager, monkeypatch):
+    """测试用例 - 并行执行时连接池大小按 worker 数均分, 相同连接参数复用同一个连接池
+    """
+    monkeypatch.setenv('PYTEST_XDIST_WORKER_COUNT', '4')
+
+    pool = manager.get_pool(host='127.0.0.1', port=3306, user='test', password='secret')
+    settings = manager.settings
+
+    assert pool.name == 'test@127.0.0.1:3306/'
+    assert pool.size == max(1, math.ceil(settings.MYSQL_POOL_SIZE / 4))
+    assert pool.max_connections == pool.size + math.ceil(settings.MYSQL_MAX_OVERFLOW / 4)
+    assert manager.get_pool(host='127.0.0.1', port=3306, user='test', password='secret') is pool
+    assert manager.get_pool(host='127.0.0.1', port=3307, user='test', password='secret') is not pool
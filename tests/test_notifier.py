@@ -0,0 +1,125 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from core.resilience import RetryPolicy
+from utils.notifier import Notifier
+
+STATS = {'total': 2, 'passed': 1, 'failed': 1, 'error': 0, 'skipped': 0}
+
+
+class _Webhook(BaseHTTPRequestHandler):
+    # 依次返回的状态码, 用完后返回 200; delay 为每次响应前的等待时间
+    # 状态保存在 fixture 为每个服务器创建的子类上, 不同用例之间互不影响
+    statuses: list
+    delay: float
+    received: list
+    url: str
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        time.sleep(self.delay)
+        status = self.statuses.pop(0) if self.statuses else 200
+        if status == 200:
+            self.received.append(body)
+        self.send_response(status)
+        self.send_header('Content-Length', '2')
+        self.end_headers()
+        self.wfile.write(b'{}')
+
+    def log_message(self, *args):
+        pass
+
+
+class _Server(ThreadingHTTPServer):
+    # 处理线程不设为 daemon, server_close 时等待处理中的请求完成
+    daemon_threads = False
+
+
+@pytest.fixture
+def webhook():
+    handler = type('Webhook', (_Webhook,), {'statuses': [], 'delay': 0.0, 'received': []})
+    server = _Server(('127.0.0.1', 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    handler.url = f'http://127.0.0.1:{server.server_port}/hook'
+    yield handler
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+
+def _notifier(url, outbox):
+    return Notifier(webhook_url=url, outbox=outbox, timeout=2,
+                    retry_policy=RetryPolicy(max_retries=2, backoff_factor=0.01, methods=frozenset({'POST'})))
+
+
+def test_notifier_retry_and_outbox(webhook, tmp_path):
+    """测试用例 - 推送失败时重试, 未送达的消息保存到 outbox 并在下次推送时合并重发
+    """
+    outbox = tmp_path.joinpath('outbox.jsonl')
+
+    # 第一次执行: 3 次都失败, 保存到 outbox
+    webhook.statuses = [503, 503, 503]
+    notifier = _notifier(webhook.url, outbox)
+    notifier.send_report(STATS, report_path='reports/first.html')
+    assert notifier.flush(timeout=5) is False
+    assert len(outbox.read_text(encoding='utf-8').splitlines()) == 1
+
+    # 第二次执行: 重试一次后成功, 两条消息合并为一条推送
+    webhook.statuses = [503]
+    notifier = _notifier(webhook.url, outbox)
+    notifier.send_report(STATS, report_path='reports/second.html')
+    assert notifier.flush(timeout=5) is True
+    assert not outbox.exists()
+    assert len(webhook.received) == 1
+    text = webhook.received[0]['content']['text']
+    assert 'reports/first.html' in text and 'reports/second.html' in text
+
+
+def test_notifier_does_not_block(webhook, tmp_path):
+    """测试用例 - 推送在后台进行, 等待超时后消息保存到 outbox
+    """
+    webhook.delay = 1.0
+    outbox = tmp_path.joinpath('outbox.jsonl')
+    notifier = _notifier(webhook.url, outbox)
+
+    start = time.monotonic()
+    notifier.send_report(STATS, report_path='reports/slow.html')
+    assert time.monotonic() - start < 0.5
+    assert notifier.flush(timeout=0.2) is False
+    assert 'reports/slow.html' in outbox.read_text(encoding='utf-8')
+
+
+def test_notifier_drops_non_retryable(webhook, tmp_path):
+    """测试用例 - 4xx 等不可重试的失败不重试也不写入 outbox
+    """
+    outbox = tmp_path.joinpath('outbox.jsonl')
+    webhook.statuses = [400, 200]
+    notifier = _notifier(webhook.url, outbox)
+    notifier.send_report(STATS, report_path='reports/bad.html')
+
+    assert notifier.flush(timeout=5) is False
+    assert not outbox.exists()
+    # 未重试, 第二个状态码仍未使用
+    assert webhook.statuses == [200]
+
+
+def test_notifier_skips_corrupt_outbox_lines(webhook, tmp_path):
+    """测试用例 - outbox 中损坏的行被跳过, 其它消息正常重发
+    """
+    outbox = tmp_path.joinpath('outbox.jsonl')
+    message = _notifier(webhook.url, tmp_path.joinpath('unused.jsonl')).build_message(STATS, report_path='reports/kept.html')
+    outbox.write_text(json.dumps(message) + '\n{"msg_type": "te\n', encoding='utf-8')
+
+    notifier = _notifier(webhook.url, outbox)
+    assert len(notifier._undelivered) == 1
+
+    notifier.send_report(STATS, report_path='reports/new.html')
+    assert notifier.flush(timeout=5) is True
+    text = webhook.received[0]['content']['text']
+    assert 'reports/kept.html' in text and 'reports/new.html' in text
+    assert not list(tmp_path.glob('*.tmp'))
@@ -0,0 +1,87 @@
+import json
+import threading
+import time
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+import responses
+
+from core.api_client import APIClient
+from utils.assertions import assert_items, field_sorted, field_unique
+
+TOTAL = 1050
+
+
+def _page_callback(request):
+    query = {k: int(v[0]) for k, v in parse_qs(urlparse(request.url).query).items()}
+    start = (query['page'] - 1) * query['page_size']
+    items = [{'id': i} for i in range(start, min(start + query['page_size'], TOTAL))]
+    return 200, {}, json.dumps({'code': 0, 'data': {'items': items, 'total': TOTAL}})
+
+
+def _cursor_callback(request):
+    query = parse_qs(urlparse(request.url).query)
+    start = int(query.get('cursor', ['0'])[0])
+    end = min(start + int(query['page_size'][0]), TOTAL)
+    next_cursor = str(end) if end < TOTAL else None
+    return 200, {}, json.dumps({'code': 0, 'data': {'items': [{'id': i} for i in range(start, end)],
+                                                    'next_cursor': next_cursor}})
+
+
+@pytest.mark.parametrize('prefetch', [0, 4])
+def test_paginate_page(prefetch):
+    """测试用例 - 页码分页, 按顺序产出所有数据
+    """
+    with responses.RequestsMock() as mock:
+        mock.add_callback(responses.GET, 'http://127.0.0.1/users', callback=_page_callback)
+        items = list(APIClient().paginate('/users', page_size=100, prefetch=prefetch))
+
+    assert len(items) == TOTAL
+    assert_items(items, [field_unique('id'), field_sorted('id')])
+
+
+def test_paginate_cursor():
+    """测试用例 - 游标分页, 后台预取
+    """
+    with responses.RequestsMock() as mock:
+        mock.add_callback(responses.GET, 'http://127.0.0.1/export', callback=_cursor_callback)
+        items = list(APIClient().paginate('/export', style='cursor', page_size=200, prefetch=3))
+
+    assert [item['id'] for item in items] == list(range(TOTAL))
+
+
+def test_paginate_stop_early():
+    """测试用例 - 提前结束迭代时不再请求后续页
+    """
+    with responses.RequestsMock(assert_all_requests_are_fired=False) as mock:
+        mock.add_callback(responses.GET, 'http://127.0.0.1/users', callback=_page_callback)
+        paginator = APIClient().paginate('/users', page_size=100, prefetch=2, total_path='data.total')
+        for item in paginator:
+            if item['id'] == 150:
+                break
+
+        assert len(mock.calls) <= 4
+
+
+def _producer_alive() -> bool:
+    return any(t.name == 'paginator-cursor' for t in threading.enumerate())
+
+
+def test_paginate_cursor_producer_exits_on_early_stop():
+    """测试用例 - 游标分页提前结束时, 已请求完全部页、阻塞在队列上的后台线程也会退出
+    """
+    with responses.RequestsMock() as mock:
+        mock.add_callback(responses.GET, 'http://127.0.0.1/export', callback=_cursor_callback)
+        # 共 2 页, 队列只能容纳 1 页: 消费者取走第 1 页后, 第 2 页入队, 结束标记等待入队
+        pages = APIClient().paginate('/export', style='cursor', page_size=600, prefetch=1).pages()
+        next(pages)
+        time.sleep(0.3)
+        # 只统计本用例的请求, 上一个用例中已取消的预取线程可能仍在请求 /users
+        assert sum('/export' in call.request.url for call in mock.calls) == 2
+
+        pages.close()
+        deadline = time.monotonic() + 2
+        while _producer_alive() and time.monotonic() < deadline:
+            time.sleep(0.05)
+
+    assert not _producer_alive()
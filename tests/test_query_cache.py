@@ -0,0 +1,113 @@
+from types import SimpleNamespace
+
+import pytest
+
+from core import query_cache as query_cache_module
+from core.query_cache import NO_EXPIRY, QueryCache, extract_tables, normalize_sql, schema_tag
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """可手动推进的时钟"""
+    clock = SimpleNamespace(now=1000.0)
+    monkeypatch.setattr(query_cache_module, 'time', SimpleNamespace(monotonic=lambda: clock.now))
+    return clock
+
+
+def test_extract_tables():
+    assert extract_tables('SELECT * FROM `db`.`t_user_info` u JOIN t_order o ON u.id = o.user_id') == {'t_user_info', 't_order'}
+    assert extract_tables('UPDATE T_User_Info SET name = %s') == {'t_user_info'}
+
+
+def test_extract_comma_separated_tables():
+    """测试用例 - FROM 后逗号分隔的多个表（含别名、子查询）全部提取, 无法解析时返回 None
+    """
+    assert extract_tables('SELECT * FROM a, b WHERE a.id = b.id') == {'a', 'b'}
+    assert extract_tables('SELECT * FROM a AS x, `db`.`b` y, c\nLEFT JOIN d ON 1') == {'a', 'b', 'c', 'd'}
+    assert extract_tables('SELECT * FROM (SELECT id FROM a) t, b') == {'a', 'b'}
+    assert extract_tables('UPDATE a, b SET a.x = b.x') == {'a', 'b'}
+    assert extract_tables("SELECT TRIM('x' FROM 'xyx')") is None
+
+    cache = QueryCache()
+    cache.set('join', 1, extract_tables('SELECT * FROM a x, b y WHERE x.id = y.id'))
+    assert cache.invalidate_sql('DELETE FROM b WHERE id = 1') == 1
+
+
+def test_normalize_sql_keeps_literals():
+    """测试用例 - 只合并引号外的空白, 字符串中的空白不同则缓存键不同
+    """
+    assert normalize_sql("SELECT *\n  FROM t WHERE name = 'a  b' ;") == "SELECT * FROM t WHERE name = 'a  b'"
+    assert normalize_sql("SELECT * FROM t WHERE name = 'a  b'") != normalize_sql("SELECT * FROM t WHERE name = 'a b'")
+    assert normalize_sql("SELECT 'it''s  x',  \"a  b\"") == "SELECT 'it''s  x', \"a  b\""
+
+
+def test_lru_eviction():
+    """测试用例 - 超出容量时淘汰最久未使用的缓存
+    """
+    cache = QueryCache(maxsize=2)
+    cache.set('a', 1, frozenset({'t'}))
+    cache.set('b', 2, frozenset({'t'}))
+    # 访问 a 后 b 成为最久未使用
+    assert cache.get('a') == (True, 1)
+    cache.set('c', 3, frozenset({'t'}))
+
+    assert cache.get('b') == (False, None)
+    assert cache.get('a') == (True, 1)
+    assert cache.get('c') == (True, 3)
+    assert (cache.hits, cache.misses) == (3, 1)
+
+
+def test_ttl_expiry(clock):
+    """测试用例 - 超过 TTL 后不再命中, NO_EXPIRY 不过期
+    """
+    cache = QueryCache(ttl=10)
+    cache.set('a', 1, frozenset({'t'}))
+    cache.set('schema', 2, frozenset({schema_tag('t')}), ttl=NO_EXPIRY)
+
+    clock.now += 9.9
+    assert cache.get('a') == (True, 1)
+    clock.now += 0.1
+    assert cache.get('a') == (False, None)
+    assert cache.get('schema') == (True, 2)
+
+
+def test_invalidate_by_table():
+    """测试用例 - 按表失效依赖该表的缓存, 写入数据不影响表结构缓存, DDL 同时失效表结构缓存
+    """
+    cache = QueryCache()
+    cache.set('users', 1, extract_tables('SELECT * FROM t_user_info'))
+    cache.set('join', 2, extract_tables('SELECT * FROM t_user_info JOIN t_order ON 1'))
+    cache.set('orders', 3, extract_tables('SELECT * FROM t_order'))
+    cache.set('desc', 4, frozenset({schema_tag('t_user_info')}))
+
+    assert cache.invalidate_sql('INSERT INTO `t_user_info` (`id`) VALUES (1)') == 2
+    assert cache.get('orders') == (True, 3)
+    assert cache.get('desc') == (True, 4)
+
+    assert cache.invalidate_sql('ALTER TABLE t_user_info ADD COLUMN age INT') == 1
+    assert cache.get('desc') == (False, None)
+
+    assert cache.invalidate() == 1
+    assert cache.get('orders') == (False, None)
+
+
+def test_stale_fill_is_discarded():
+    """测试用例 - 查询期间相关表被失效时, 查到的旧数据不写入缓存
+    """
+    cache = QueryCache()
+    tables = frozenset({'t_user_info'})
+
+    version = cache.version(tables)
+    cache.invalidate('t_user_info')
+    assert not cache.set('users', 'stale', tables, version=version)
+    assert cache.get('users') == (False, None)
+
+    # 其它表的写操作不影响
+    version = cache.version(tables)
+    cache.invalidate('t_order')
+    assert cache.set('users', 'fresh', tables, version=version)
+    assert cache.get('users') == (True, 'fresh')
+
+    version = cache.version(tables)
+    cache.invalidate()
+    assert not cache.set('users', 'stale', tables, version=version)
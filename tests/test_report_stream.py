@@ -0,0 +1,33 @@
+import json
+from types import SimpleNamespace
+
+from utils.report_stream import ReportWriter, render_html
+
+
+def _report(nodeid, when, outcome='passed', duration=0.1, longrepr='', user_properties=()):
+    return SimpleNamespace(nodeid=nodeid, when=when, duration=duration, longreprtext=longrepr,
+                           failed=outcome == 'failed', skipped=outcome == 'skipped',
+                           user_properties=list(user_properties))
+
+
+def test_report_stream(tmp_path):
+    """测试用例 - 流式报告逐个用例写入, 并生成可过滤的 HTML 页面
+    """
+    writer = ReportWriter(tmp_path.joinpath('report.jsonl'))
+    writer.on_report(_report('t::ok', 'setup', user_properties=[('case_title', '正常')]))
+    writer.on_report(_report('t::ok', 'call'))
+    # teardown 之前不写入
+    assert writer.path.read_text(encoding='utf-8') == ''
+    writer.on_report(_report('t::ok', 'teardown'))
+    writer.on_report(_report('t::bad', 'setup'))
+    writer.on_report(_report('t::bad', 'call', 'failed', longrepr='assert </script> == 1'))
+    writer.on_report(_report('t::bad', 'teardown'))
+    writer.close()
+
+    rows = [json.loads(line) for line in writer.path.read_text(encoding='utf-8').splitlines()]
+    assert [(r['nodeid'], r['outcome'], r['title']) for r in rows] == [('t::ok', 'passed', '正常'), ('t::bad', 'failed', None)]
+    assert abs(rows[0]['duration'] - 0.3) < 1e-9
+
+    page = render_html(writer.path).read_text(encoding='utf-8')
+    assert page.count('</script>') == 2
+    assert '\\u003c/script>' in page
@@ -0,0 +1,102 @@
+import socket
+import time
+
+import pytest
+import responses
+
+from core.api_client import APIClient
+from core.resilience import CircuitOpenError, Resilience, RetryBudget, RetryPolicy
+
+NO_BACKOFF = RetryPolicy(max_retries=3, backoff_factor=0)
+
+
+@pytest.fixture
+def resilience(monkeypatch):
+    """独立的熔断器与重试预算, 熔断状态不带入其它用例和会话结束时的统计"""
+    local = Resilience()
+    monkeypatch.setattr('core.api_client.resilience', local)
+    return local
+
+
+def test_retry_idempotent_only():
+    """测试用例 - 只重试幂等方法, POST 失败直接返回
+    """
+    client = APIClient(retry_policies={'* /orders': NO_BACKOFF})
+    with responses.RequestsMock() as mock:
+        mock.add(responses.GET, 'http://127.0.0.1/orders', status=503)
+        mock.add(responses.GET, 'http://127.0.0.1/orders', status=200, json={'code': 0})
+        mock.add(responses.POST, 'http://127.0.0.1/orders', status=503)
+
+        assert client.get('/orders').status_code == 200
+        assert client.post('/orders', json={}).status_code == 503
+        assert len(mock.calls) == 3
+
+
+def test_circuit_breaker_fast_fail(resilience):
+    """测试用例 - 依赖不可用时熔断, 之后的请求直接失败, 冷却后探测恢复
+    """
+    # 获取一个未监听的端口
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+    base_url = f'http://127.0.0.1:{port}'
+    breaker = resilience.breaker('GET /health')
+
+    client = APIClient(base_url=base_url, retry_policies={'*': NO_BACKOFF})
+    for _ in range(breaker.failure_threshold):
+        with pytest.raises(Exception):
+            client.get('/health')
+    # 熔断按接口区分, 不影响其它接口
+    assert resilience.breaker('GET /users').state == 'closed'
+
+    start = time.perf_counter()
+    for _ in range(100):
+        with pytest.raises(CircuitOpenError):
+            client.get('/health')
+    assert time.perf_counter() - start < 1
+    assert breaker.rejected >= 100
+
+    # 冷却结束后放行探测请求, 探测成功则恢复
+    breaker.recovery_timeout = 0
+    with responses.RequestsMock() as mock:
+        mock.add(responses.GET, f'{base_url}/health', status=200)
+        assert client.get('/health').status_code == 200
+    assert breaker.state == 'closed'
+
+
+def test_half_open_probe_released_on_other_errors(resilience):
+    """测试用例 - 半开状态下探测请求因网络以外的原因失败时释放探测名额, 之后的请求可以继续探测
+    """
+    resilience.failure_threshold = 1
+    resilience.recovery_timeout = 0
+    client = APIClient(retry_policies={'*': NO_BACKOFF})
+    # 路径中的 id 模板化, 同一接口共用一个熔断器
+    breaker = resilience.breaker('GET /users/{id}')
+
+    with responses.RequestsMock() as mock:
+        mock.add(responses.GET, 'http://127.0.0.1/users/1', status=503)
+        mock.add(responses.GET, 'http://127.0.0.1/users/2', body=ValueError('bad response'))
+        mock.add(responses.GET, 'http://127.0.0.1/users/3', status=200, json={'code': 0})
+
+        assert client.get('/users/1').status_code == 503
+        assert breaker.state == 'open'
+
+        with pytest.raises(ValueError):
+            client.get('/users/2')
+        assert breaker.state == 'half_open'
+
+        assert client.get('/users/3').status_code == 200
+    assert breaker.state == 'closed'
+
+
+def test_retry_budget():
+    """测试用例 - 重试预算耗尽后不再重试
+    """
+    budget = RetryBudget(ratio=0.5, min_retries=2)
+    assert budget.withdraw() and budget.withdraw()
+    assert not budget.withdraw()
+
+    budget.deposit()
+    budget.deposit()
+    assert budget.withdraw()
+    assert budget.exhausted == 1
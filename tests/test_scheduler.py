@@ -0,0 +1,49 @@
+import dataclasses
+
+import pytest
+
+from core.scheduler import CaseNode, ScheduleError, case_meta, plan
+from utils.data_loader import load_test_data
+
+
+def test_plan_order_and_groups():
+    """测试用例 - 按依赖排序, 有依赖或共享资源的用例归为同一组, 独立用例不分组
+    """
+    nodes = [
+        case_meta({'id': 'login', 'depends_on': ['register'], 'uses': ['user:gustavo']}),
+        None,
+        case_meta({'id': 'register', 'uses': 'user:gustavo'}),
+        case_meta({'id': 'profile', 'depends_on': 'login'}),
+        case_meta({'title': 'independent', 'uses': ['user:heisenberg']}),
+        case_meta({'id': 'orphan', 'depends_on': ['not_collected']}),
+    ]
+    schedule = plan(nodes)
+
+    assert schedule.order == [1, 2, 0, 3, 4, 5]
+    assert schedule.groups == {0: 'user:gustavo', 2: 'user:gustavo', 3: 'user:gustavo'}
+    assert schedule.missing == {5: ['not_collected']}
+
+
+def test_plan_cycle():
+    """测试用例 - 循环依赖
+    """
+    with pytest.raises(ScheduleError, match='循环依赖'):
+        plan([CaseNode('a', depends_on=('b',)), CaseNode('b', depends_on=('a',))])
+
+
+def test_plan_scoped_by_test_function():
+    """测试用例 - 两个测试函数加载同一个用例文件, 依赖与资源只在各自函数的用例之间生效
+    """
+    cases = load_test_data('test_user.yaml')
+    scopes = ['tests/test_user_api.py::test_create_user', 'tests/test_cassette.py::test_record_and_replay']
+    nodes = [dataclasses.replace(case_meta(case), scope=scope) for scope in scopes for case in cases]
+    schedule = plan(nodes)
+
+    # 依赖只指向同一个函数中的用例, 两个函数的用例不交错执行
+    assert schedule.order == list(range(len(nodes)))
+    assert not schedule.missing
+    first = {i for i, name in schedule.groups.items() if name.startswith(scopes[0])}
+    second = {i for i, name in schedule.groups.items() if name.startswith(scopes[1])}
+    assert first and second
+    assert max(first) < len(cases) <= min(second)
+    assert len(set(schedule.groups.values())) == 2
@@ -0,0 +1,25 @@
+from config.settings import Settings, SharedSettings, get_settings, reload_settings
+
+
+class _Client:
+    settings = SharedSettings()
+
+
+def test_shared_settings(monkeypatch):
+    """测试用例 - 进程内共享配置, reload_settings 后重新读取
+    """
+    settings = get_settings()
+    assert get_settings() is settings
+    assert _Client.settings is settings and _Client().settings is settings
+    # 实例化不修改类共享的 model_config
+    assert Settings.model_config['env_file'] is None
+
+    monkeypatch.setenv('API_BASE_URL', 'http://reloaded.example.com/')
+    try:
+        reloaded = reload_settings()
+        assert reloaded is not settings
+        assert _Client.settings is reloaded
+        assert reloaded.API_BASE_URL == 'http://reloaded.example.com'
+    finally:
+        monkeypatch.undo()
+        reload_settings()
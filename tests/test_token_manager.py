@@ -0,0 +1,87 @@
+import base64
+import json
+import os
+import stat
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import pytest
+import responses
+
+from core import token_manager as token_manager_module
+from core.api_client import APIClient
+from core.token_manager import TokenManager, parse_jwt_exp
+
+
+def make_jwt(exp: float) -> str:
+    payload = base64.urlsafe_b64encode(json.dumps({'exp': exp}).encode()).rstrip(b'=').decode()
+    return f'header.{payload}.signature'
+
+
+@pytest.fixture
+def manager(tmp_path, monkeypatch):
+    """使用临时目录作为共享存储, 避免影响本地缓存的 token"""
+    monkeypatch.setattr(token_manager_module, 'TOKEN_STORE_FILE', tmp_path.joinpath('tokens.json'))
+    monkeypatch.setattr(token_manager_module, 'TOKEN_LOCK_FILE', tmp_path.joinpath('tokens.lock'))
+    manager = TokenManager()
+    monkeypatch.setattr('core.api_client.token_manager', manager)
+    return manager
+
+
+def test_parse_jwt_exp():
+    assert parse_jwt_exp(make_jwt(1700000000)) == 1700000000
+    assert parse_jwt_exp('opaque-token') is None
+
+
+@responses.activate
+def test_concurrent_logins_are_deduplicated(manager):
+    """测试用例 - 多线程并发获取 token 时只登录一次
+    """
+    login = responses.add(responses.POST, 'http://127.0.0.1/login',
+                          json={'code': 200, 'message': 'ok', 'data': {'token': make_jwt(time.time() + 3600)}})
+    client = APIClient()
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        tokens = set(pool.map(lambda _: manager.get_token(client), range(16)))
+
+    assert len(tokens) == 1
+    assert login.call_count == 1
+
+    # 进程内缓存清除后, 从共享存储中读取, 依然不会重新登录
+    manager.invalidate()
+    assert manager.get_token(client) in tokens
+    assert login.call_count == 1
+
+
+@responses.activate
+def test_token_refreshed_before_expiry(manager, monkeypatch):
+    """测试用例 - 有效期短于刷新阈值的 token 不会每次请求都刷新, 临近过期时才在请求前刷新
+    """
+    now = time.time()
+    login = responses.add(responses.POST, 'http://127.0.0.1/login',
+                          json={'code': 200, 'message': 'ok', 'data': {'token': make_jwt(now + 10)}})
+    responses.add(responses.GET, 'http://127.0.0.1/users', json={'code': 200, 'message': 'ok', 'data': []})
+
+    client = APIClient()
+    client.authorize()
+    client.get('/users')
+    client.get('/users')
+    assert login.call_count == 1
+
+    # 有效期 10 秒, 提前 2 秒（20%）刷新
+    monkeypatch.setattr(token_manager_module, 'time', SimpleNamespace(time=lambda: now + 8.5))
+    client.get('/users')
+    assert login.call_count == 2
+    assert responses.calls[-1].request.headers['Authorization'] == f'Bearer {client.token}'
+
+
+@responses.activate
+def test_token_store_permissions(manager):
+    """测试用例 - 共享存储文件只允许当前用户读写
+    """
+    responses.add(responses.POST, 'http://127.0.0.1/login',
+                  json={'code': 200, 'message': 'ok', 'data': {'token': make_jwt(time.time() + 3600)}})
+    manager.get_token(APIClient())
+
+    assert stat.S_IMODE(os.stat(token_manager_module.TOKEN_STORE_FILE).st_mode) == 0o600
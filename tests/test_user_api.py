@@ -31,4 +31,21 @@ def test_create_user(unauthorized_client, case):
     assert_status_code(resp, case['expected']['status_code'], msg=case.get('title'))
     if expected_status == 201:
         model = assert_response_model(resp, CreateUserModel)
-        assert model.data.id == 1
\ No newline at end of file
+        assert model.data.id == 1
+
+@responses.activate
+@ddt('test_user_bulk.jsonl', lazy=True)
+def test_create_user_bulk(unauthorized_client, case):
+    """测试用例 - 批量创建用户, 用例按需加载
+    """
+    expected_status = case['expected']['status_code']
+
+    responses.add(
+        responses.POST,
+        'http://127.0.0.1/register',
+        json={'code': 200, 'message': '注册成功', 'data': {'id': 1}} if expected_status == 201 else {'code': 400, 'message': case['expected'].get('error_code'), 'data': None},
+        status=expected_status
+        )
+
+    resp = unauthorized_client.post('/register', json=case['data'])
+    assert_status_code(resp, expected_status, msg=case.get('title'))
@@ -3,15 +3,15 @@
 # 2. 在 Pydantic 验证通过后，使用传统断言 assert 从功能业务层面验证数据正确性
 
 
-import json
-
 from requests import Response
 
-from utils.logger import logger
+from utils.model_adapters import get_adapter, partial_model
+from utils.logger import hot_log, logger
 
 from pydantic import BaseModel, ValidationError
 
-from typing import Type, TypeVar, Any
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Type, TypeVar, Union
 
 
 def assert_status_code(resp: Response, expected: int, msg=''):
@@ -27,19 +27,23 @@ def assert_status_code(resp: Response, expected: int, msg=''):
         error_msg = f'{msg} | 响应状态码不匹配, 期望: {expected}, 实际: {actual}'
         logger.error(error_msg)
         raise AssertionError(error_msg)
-    logger.success(f'状态码断言通过: {actual}')
+    hot_log.success('assert.status_code', '状态码断言通过: {}', actual)
 
 
 # 类型注解，方便在断言时调用模型属性
 T = TypeVar('T', bound=BaseModel)
 
-def assert_response_model(resp: Response, model: Type[T], msg='') -> T:
+def assert_response_model(resp: Response, model: Type[T], msg='', fields: Optional[Iterable[str]] = None) -> T:
     """基于 Pydantic 模型断言整个响应体
 
+    直接从响应的原始字节校验 JSON（model_validate_json）, 不需要先解析为 Python 对象再校验
+
     Args:
         resp (Response): requests 响应结果
-        model (Type[BaseModel]): 用于断言的响应模型
+        model (Type[BaseModel]): 用于断言的响应模型, 也可以是 List[Model] 等类型
         msg (str, optional): 功能业务层面的失败信息, 用于说明预期行为, 表现测试和断言意图, 增强断言消息的可读性
+        fields (Iterable[str], optional): 只校验指定字段, 使用 `.` 表示嵌套（如 `data.items.id`）,
+            适用于超大的列表响应, 未指定的字段不会被校验和解析
 
     Returns:
         BaseModel: 解析通过后的响应模型实例, 解析通过之后, 就可以对单个字段进行属性访问形式的调用, 对单个字段的断言非常方便
@@ -51,19 +55,253 @@ def assert_response_model(resp: Response, model: Type[T], msg='') -> T:
             email: str
 
         assert_response_model(resp, UserResponse)
+
+        # 只校验部分字段
+        assert_response_model(resp, UserListResponse, fields=['code', 'data.items.id'])
     """
+    name = getattr(model, '__name__', str(model))
+    if fields:
+        model = partial_model(model, frozenset(fields))
+
     try:
-        data = resp.json()
         # 自动验证并解析为模型实例
-        parsed = model.model_validate(data)
-        logger.success(f'Pydantic 模型断言通过: {model.__name__}')
+        parsed = get_adapter(model).validate_json(resp.content)
+        hot_log.success('assert.model', 'Pydantic 模型断言通过: {}', name)
         return parsed
     except ValidationError as e:
-        error_msg = f'{msg} | 响应不符合 {model.__name__} 模型:\n{e}'
+        if any(error['type'] == 'json_invalid' for error in e.errors()):
+            error_msg = f'{msg} | 响应不是有效的 JSON: {resp.text[:200]}'
+        else:
+            error_msg = f'{msg} | 响应不符合 {name} 模型:\n{e}'
         logger.error(f'Pydantic 断言失败: {error_msg}')
         raise AssertionError(error_msg)
-    except json.JSONDecodeError:
-        logger.error('响应不是有效的 JSON')
 
 
-    
\ No newline at end of file
+# 列表批量断言：对列表响应的全部元素一次性检查多条规则, 汇总所有违规项（带元素下标）后统一断言
+# 每个字段只提取一次, 规则在提取出的列上执行, 十万级元素的列表也只需要毫秒级
+
+_MISSING = object()
+
+
+def _getter(field: str) -> Callable[[Any], Any]:
+    """字段取值函数, 同时支持 dict 与模型实例, 使用 `.` 表示嵌套"""
+    parts = field.split('.')
+
+    def get(item):
+        for part in parts:
+            if isinstance(item, dict):
+                item = item.get(part, _MISSING)
+            else:
+                item = getattr(item, part, _MISSING)
+            if item is _MISSING:
+                return _MISSING
+        return item
+
+    return get
+
+
+def _column(items: Sequence[Any], field: str, all_dict: bool) -> List[Any]:
+    """提取所有元素的字段值, 元素均为 dict 时逐层使用 dict.get 批量提取"""
+    if all_dict:
+        column = items
+        for part in field.split('.'):
+            column = [value.get(part, _MISSING) if type(value) is dict else _MISSING for value in column]
+        return column
+
+    get = _getter(field)
+    return [get(item) for item in items]
+
+
+class ItemRule(ABC):
+    """列表断言规则, 子类实现 check
+
+    Args:
+        fields (Tuple[str, ...]): 规则依赖的字段
+        description (str): 规则描述, 用于错误信息
+    """
+
+    def __init__(self, fields: Tuple[str, ...], description: str):
+        self.fields = fields
+        self.description = description
+
+    @abstractmethod
+    def check(self, columns: List[List[Any]]) -> List[Tuple[Any, ...]]:
+        """在字段列上执行检查
+
+        Returns:
+            List[Tuple[Any, ...]]: 违规项 (元素下标, 实际值) 或 (元素下标, 实际值, 补充说明), 实际值在错误信息中以 repr 显示
+        """
+
+
+class _Eq(ItemRule):
+    def __init__(self, field: str, expected: Any):
+        super().__init__((field,), f'{field} == {expected!r}')
+        self.expected = expected
+
+    def check(self, columns):
+        expected = self.expected
+        return [(i, v) for i, v in enumerate(columns[0]) if v != expected]
+
+
+class _Range(ItemRule):
+    def __init__(self, field: str, min_value: Any = None, max_value: Any = None):
+        super().__init__((field,), f'{"" if min_value is None else f"{min_value!r} <= "}{field}'
+                                   f'{"" if max_value is None else f" <= {max_value!r}"}')
+        self.min_value = min_value
+        self.max_value = max_value
+
+    def check(self, columns):
+        low, high = self.min_value, self.max_value
+        violations = []
+        for i, v in enumerate(columns[0]):
+            try:
+                if (low is not None and v < low) or (high is not None and v > high):
+                    violations.append((i, v))
+            except TypeError:
+                violations.append((i, v))
+        return violations
+
+
+class _Unique(ItemRule):
+    def __init__(self, field: str):
+        super().__init__((field,), f'{field} 唯一')
+
+    def check(self, columns):
+        column = columns[0]
+        # 取值均可哈希时, 元素数与去重后数量相同即可直接通过
+        try:
+            if len(set(column)) == len(column):
+                return []
+        except TypeError:
+            pass
+
+        # 键包含类型, 1 与 True、1.0 不视为重复
+        first_seen: Dict[Any, int] = {}
+        violations = []
+        for i, v in enumerate(column):
+            try:
+                key = (type(v), v)
+                hash(key)
+            except TypeError:
+                key = (type(v), repr(v))
+            if key in first_seen:
+                violations.append((i, v, f'与第 {first_seen[key]} 项重复'))
+            else:
+                first_seen[key] = i
+        return violations
+
+
+class _Sorted(ItemRule):
+    def __init__(self, field: str, reverse: bool = False):
+        super().__init__((field,), f'{field} {"降序" if reverse else "升序"}')
+        self.reverse = reverse
+
+    def check(self, columns):
+        column = columns[0]
+        violations = []
+        for i, (prev, cur) in enumerate(zip(column, column[1:]), start=1):
+            try:
+                ok = prev >= cur if self.reverse else prev <= cur
+            except TypeError:
+                ok = False
+            if not ok:
+                violations.append((i, cur, f'前一项 {prev!r}'))
+        return violations
+
+
+class _Predicate(ItemRule):
+    def __init__(self, fields: Tuple[str, ...], predicate: Callable[..., bool], description: str):
+        super().__init__(fields, description)
+        self.predicate = predicate
+
+    def check(self, columns):
+        predicate = self.predicate
+        violations = []
+        for i, values in enumerate(zip(*columns)):
+            actual = values if len(values) > 1 else values[0]
+            try:
+                ok = predicate(*values)
+            except Exception as e:
+                violations.append((i, actual, f'{type(e).__name__}: {e}'))
+                continue
+            if not ok:
+                violations.append((i, actual))
+        return violations
+
+
+def field_eq(field: str, expected: Any) -> ItemRule:
+    """每个元素的字段都等于期望值"""
+    return _Eq(field, expected)
+
+
+def field_range(field: str, min_value: Any = None, max_value: Any = None) -> ItemRule:
+    """每个元素的字段都在 [min_value, max_value] 范围内, 不指定表示不限制"""
+    return _Range(field, min_value, max_value)
+
+
+def field_unique(field: str) -> ItemRule:
+    """所有元素的字段取值互不相同"""
+    return _Unique(field)
+
+
+def field_sorted(field: str, reverse: bool = False) -> ItemRule:
+    """元素按字段有序（默认升序）"""
+    return _Sorted(field, reverse)
+
+
+def field_rule(fields: Union[str, Sequence[str]], predicate: Callable[..., bool], description: str = '') -> ItemRule:
+    """自定义规则, 按 fields 的顺序将字段值传入 predicate, 可用于跨字段校验
+
+    Example:
+        field_rule(['start_time', 'end_time'], lambda start, end: start <= end, 'start_time <= end_time')
+    """
+    fields = (fields,) if isinstance(fields, str) else tuple(fields)
+    return _Predicate(fields, predicate, description or f'{getattr(predicate, "__name__", "predicate")}({", ".join(fields)})')
+
+
+def _format_violation(index: int, value: Any, note: str = '') -> str:
+    shown = '<缺失>' if value is _MISSING else repr(value)
+    return f'[{index}]={shown}（{note}）' if note else f'[{index}]={shown}'
+
+
+def assert_items(items: Sequence[Any], rules: Iterable[ItemRule], msg='', max_report: int = 20) -> None:
+    """对列表中的所有元素批量断言, 汇总所有规则的违规项后一次性报告
+
+    Args:
+        items (Sequence[Any]): 列表元素, dict 或模型实例均可
+        rules (Iterable[ItemRule]): 断言规则, 由 field_eq/field_range/field_unique/field_sorted/field_rule 构建
+        msg (str, optional): 功能业务层面的失败信息
+        max_report (int): 每条规则最多在错误信息中列出的违规项数量
+
+    Example:
+        assert_items(resp.json()['data']['items'], [
+            field_eq('status', 1),
+            field_range('age', 0, 150),
+            field_unique('id'),
+            field_sorted('created_at', reverse=True),
+        ])
+    """
+    rules = list(rules)
+    items = items if isinstance(items, (list, tuple)) else list(items)
+
+    # 每个字段只提取一次, 多条规则共用
+    columns: Dict[str, List[Any]] = {}
+    all_dict = all(type(item) is dict for item in items)
+    for rule in rules:
+        for field in rule.fields:
+            if field not in columns:
+                columns[field] = _column(items, field, all_dict)
+
+    failures = []
+    for rule in rules:
+        violations = rule.check([columns[field] for field in rule.fields])
+        if violations:
+            shown = ', '.join(_format_violation(*violation) for violation in violations[:max_report])
+            more = f' ... 共 {len(violations)} 项' if len(violations) > max_report else ''
+            failures.append(f'  {rule.description}: {shown}{more}')
+
+    if failures:
+        error_msg = f'{msg} | 列表断言失败（共 {len(items)} 项）:\n' + '\n'.join(failures)
+        logger.error(error_msg)
+        raise AssertionError(error_msg)
+    hot_log.success('assert.items', '列表断言通过: {} 项 x {} 条规则', len(items), len(rules))
@@ -9,7 +9,7 @@ def clean_old_reports(days=7):
     cutoff_date = now - timedelta(days=days)
 
     logger.info(f'--- 正在清理 {days} 天前的旧报告 ---')
-    for report in REPORTS_DIR.glob('*.html'):
+    for report in [*REPORTS_DIR.glob('*.html'), *REPORTS_DIR.glob('*.jsonl')]:
         file_mtime = datetime.fromtimestamp(report.stat().st_mtime)
 
         if file_mtime < cutoff_date:
@@ -0,0 +1,155 @@
+import hashlib
+import os
+import re
+import secrets
+import uuid
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from utils.logger import logger
+
+# 测试数据工厂
+#
+# 用例文件中通过模板引用唯一值, 加载用例时渲染:
+#   - `{{ unique.email }}`: 每条用例一个值, 同一条用例中多次引用得到同一个值
+#   - `{{ unique.email.gustavo }}`: 具名值, 整个会话中同名引用得到同一个值, 用于多条用例（或前置数据）共用一个实体
+# 整个字符串只有一个模板时保留值的类型（如 `{{ unique.int }}` 为 int）
+#
+# 唯一值由 hash(种子, 类型, 用例键) 生成, 用例键由加载方（测试函数）、用例文件与用例下标组成（具名值为名称）,
+# 与加载顺序、worker 编号和 worker 数无关: 同一种子下增量执行、只执行部分用例或改变并行数时, 请求体保持不变, cassette 可以回放
+#
+# 同一种子下不同用例键的值在本进程内不重复（极少数哈希冲突时重新哈希）, 并行执行的 worker 之间按用例键区分;
+# 种子默认随机生成（64 位）, 多次执行之间 email/username/uuid 实际上不会重复, unique.int（MySQL INT 范围）
+# 与 unique.phone（10 位）取值范围有限, 只是大概率不重复; 指定 DATA_SEED 环境变量可复现同一组数据（会与上次写入的数据重复）
+# cassette 按请求体匹配, 回放时需使用录制时的种子（main.py 回放时自动读取 cassette 旁保存的种子）
+#
+# 用例中的 seed 声明前置数据, 收集用例时登记, 会话开始时按表批量写入一次（见 conftest.py 的 seed_data）:
+#   - title: "创建用户 - 邮箱已存在"
+#     seed:
+#       t_user_info:
+#         - name: "{{ unique.username.gustavo }}"
+#           email: "{{ unique.email.gustavo }}"
+#     data:
+#       email: "{{ unique.email.gustavo }}"
+
+_TEMPLATE = re.compile(r'\{\{\s*unique\.(\w+)(?:\.(\w+))?\s*\}\}')
+
+# unique.int 需存入 MySQL INT, 取值 1 ~ 2^31 - 1
+_INT_MAX = 2 ** 31 - 1
+
+
+def _number(digest: bytes) -> int:
+    return int.from_bytes(digest[:8], 'big')
+
+
+# 生成器: 16 字节哈希 -> 值
+_GENERATORS: Dict[str, Callable[[bytes], Any]] = {
+    'email': lambda digest: f'user_{digest[:6].hex()}@example.com',
+    'username': lambda digest: f'user_{digest[:6].hex()}',
+    'int': lambda digest: _number(digest) % _INT_MAX + 1,
+    'uuid': lambda digest: str(uuid.UUID(bytes=digest, version=4)),
+    # 11 位手机号: 1 + 10 位
+    'phone': lambda digest: f'1{_number(digest) % 10 ** 10:010d}',
+}
+
+
+def new_seed() -> int:
+    """随机生成种子, 同一秒内启动的多次执行也不会相同"""
+    return secrets.randbits(64)
+
+
+class DataFactory:
+    """唯一测试数据的生成、模板渲染与前置数据登记
+
+    Args:
+        seed (Optional[int]): 随机种子, 默认读取 DATA_SEED 环境变量, 未设置时随机生成
+    """
+
+    def __init__(self, seed: Optional[int] = None):
+        if seed is None:
+            seed = int(os.getenv('DATA_SEED') or new_seed())
+        self.seed = seed
+
+        # 已生成的值: (类型, 键) -> 值, 以及 (类型, 值) -> 键, 用于检测不同键的哈希冲突
+        self._values: Dict[Tuple[str, str], Any] = {}
+        self._owners: Dict[Tuple[str, Any], str] = {}
+        # 登记的前置数据: 表名 -> 行
+        self._seeds: Dict[str, List[Dict[str, Any]]] = {}
+
+
+    def value(self, kind: str, key: str) -> Any:
+        """指定类型与键的唯一值, 同一种子下相同的键总是得到相同的值"""
+        cached = self._values.get((kind, key))
+        if cached is not None:
+            return cached
+        generator = _GENERATORS.get(kind)
+        if generator is None:
+            raise ValueError(f'不支持的数据类型: unique.{kind}, 仅支持 {", ".join(_GENERATORS)}')
+
+        digest = hashlib.blake2b(f'{self.seed}\x1f{kind}\x1f{key}'.encode('utf-8'), digest_size=16).digest()
+        value = generator(digest)
+        # 与其它键的值冲突时重新哈希
+        while self._owners.setdefault((kind, value), key) != key:
+            digest = hashlib.blake2b(digest, digest_size=16).digest()
+            value = generator(digest)
+        self._values[kind, key] = value
+        return value
+
+
+    def named(self, kind: str, name: str) -> Any:
+        """会话内同名共享的唯一值"""
+        return self.value(kind, f'named:{name}')
+
+
+    def render(self, case: Any, key: str) -> Any:
+        """渲染用例中的 `{{ unique.xxx }}` 模板, 不修改原对象; 没有模板时原样返回
+
+        Args:
+            case (Any): 用例
+            key (str): 用例键, 在会话内唯一标识这条用例（如 `<测试函数>|<用例文件>#<下标>`）, 生成的值只由种子和用例键决定
+        """
+        return self._render(case, key)
+
+
+    def _render(self, value: Any, key: str) -> Any:
+        if isinstance(value, str):
+            if '{{' not in value:
+                return value
+            return self._render_str(value, key)
+        if isinstance(value, dict):
+            rendered = {k: self._render(v, key) for k, v in value.items()}
+            return value if all(rendered[k] is value[k] for k in value) else rendered
+        if isinstance(value, list):
+            rendered = [self._render(v, key) for v in value]
+            return value if all(a is b for a, b in zip(rendered, value)) else rendered
+        return value
+
+
+    def _render_str(self, text: str, key: str) -> Any:
+        def resolve(match: re.Match) -> Any:
+            kind, name = match.groups()
+            return self.named(kind, name) if name else self.value(kind, key)
+
+        match = _TEMPLATE.fullmatch(text.strip())
+        if match:
+            return resolve(match)
+        return _TEMPLATE.sub(lambda m: str(resolve(m)), text)
+
+
+    def add_seed(self, seed: Dict[str, Any]) -> None:
+        """登记用例声明的前置数据, 格式为 表名 -> 行或行的列表"""
+        for table, rows in seed.items():
+            rows = [rows] if isinstance(rows, dict) else rows
+            registered = self._seeds.setdefault(table, [])
+            registered.extend(row for row in rows if row not in registered)
+
+
+    def take_seeds(self) -> Dict[str, List[Dict[str, Any]]]:
+        """取出已登记的前置数据并清空"""
+        seeds, self._seeds = self._seeds, {}
+        if seeds:
+            logger.info(f'前置数据: {", ".join(f"{table} {len(rows)} 行" for table, rows in seeds.items())} | DATA_SEED={self.seed}')
+        return seeds
+
+
+# 单例
+factory = DataFactory()
@@ -1,15 +1,120 @@
+import hashlib
 import json
-from typing import Any, Dict, List
-from config.paths import CASES_DIR
+import os
+import pickle
+from array import array
+from collections.abc import Mapping
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+from config.paths import CACHE_DIR, CASES_DIR
 import yaml
 
+from utils.data_factory import factory
 from utils.logger import logger
 
-def load_test_data(file_name: str) -> List[Dict[str, Any]]:
+# 优先使用 libyaml 的 C 实现, 未安装时退回纯 Python 实现
+YamlLoader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+# 解析结果缓存目录, 多个 worker 进程共享
+CASES_CACHE_DIR = CACHE_DIR.joinpath('cases')
+
+# 进程内缓存: 文件路径 -> (mtime_ns, size, 序列化的解析结果)
+# 保存序列化结果, 每次读取得到独立的副本, 多个用例修改用例数据时互不影响
+_memory_cache: Dict[str, tuple] = {}
+
+
+def _cache_file(data_file: Path) -> Path:
+    key = hashlib.sha1(str(data_file).encode('utf-8')).hexdigest()
+    return CASES_CACHE_DIR.joinpath(f'{key}.pickle')
+
+
+def _read_cache(cache_file: Path) -> Optional[Dict[str, Any]]:
+    try:
+        with open(cache_file, 'rb') as f:
+            return pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.warning(f'用例缓存读取失败, 将重新解析: {cache_file} ({e})')
+        return None
+
+
+def _write_cache(cache_file: Path, entry: Dict[str, Any]) -> None:
+    try:
+        CASES_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        # 先写临时文件再替换, 并发写入时其它进程读到的始终是完整文件
+        tmp_file = cache_file.with_suffix(f'.{os.getpid()}.tmp')
+        with open(tmp_file, 'wb') as f:
+            pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_file, cache_file)
+    except OSError as e:
+        logger.warning(f'用例缓存写入失败: {cache_file} ({e})')
+
+
+def _parse(data_file: Path, content: bytes) -> Any:
+    if data_file.suffix in ('.yaml', '.yml'):
+        return yaml.load(content, Loader=YamlLoader)
+    elif data_file.suffix == '.json':
+        return json.loads(content)
+    elif data_file.suffix == '.jsonl':
+        return [json.loads(line) for line in content.splitlines() if line.strip()]
+    else:
+        raise ValueError(f'不支持的文件格式: {data_file.suffix}. 仅支持 .yaml, .yml, .json, .jsonl')
+
+
+def _load_cached(data_file: Path) -> Any:
+    """读取解析结果, 依次查找进程内缓存、磁盘缓存, 均未命中时才解析原文件
+
+    缓存以文件路径 + 修改时间 + 内容哈希为键:
+    - 修改时间和大小未变, 直接使用缓存, 无需读取原文件
+    - 修改时间变化但内容哈希一致（如仅 touch）, 更新缓存中的修改时间后复用
+
+    每次调用返回新的对象, 调用方可以自由修改
+    """
+    stat = data_file.stat()
+    path_key = str(data_file)
+
+    memory_entry = _memory_cache.get(path_key)
+    if memory_entry and memory_entry[:2] == (stat.st_mtime_ns, stat.st_size):
+        return pickle.loads(memory_entry[2])
+
+    cache_file = _cache_file(data_file)
+    entry = _read_cache(cache_file)
+
+    if not (entry and entry['mtime_ns'] == stat.st_mtime_ns and entry['size'] == stat.st_size):
+        content = data_file.read_bytes()
+        digest = hashlib.blake2b(content).hexdigest()
+
+        if not (entry and entry['digest'] == digest):
+            entry = {'data': _parse(data_file, content), 'digest': digest}
+
+        entry.update(mtime_ns=stat.st_mtime_ns, size=stat.st_size)
+        _write_cache(cache_file, entry)
+
+    _memory_cache[path_key] = (stat.st_mtime_ns, stat.st_size, pickle.dumps(entry['data'], protocol=pickle.HIGHEST_PROTOCOL))
+    return entry['data']
+
+
+def case_key(scope: str, file_name: str, index: int) -> str:
+    """用例键: 加载方 + 用例文件 + 下标, 唯一值由种子和用例键生成（见 utils/data_factory.py）"""
+    return f'{scope}|{file_name}#{index}'
+
+
+def _current_scope() -> str:
+    """未指定加载方时使用当前执行的测试用例（在测试函数中加载用例文件）, 不在 pytest 中执行时为空"""
+    return os.getenv('PYTEST_CURRENT_TEST', '').rsplit(' ', 1)[0]
+
+
+def load_test_data(file_name: str, scope: Optional[str] = None, render: bool = True) -> List[Dict[str, Any]]:
     """
     通用测试数据加载器, 支持 YAML/JSON 格式
 
-    支持文件后缀：.yaml, .yml, .json
+    支持文件后缀：.yaml, .yml, .json, .jsonl
+
+    解析结果缓存在 `.cache/cases/` 中, 用例文件未修改时直接读取缓存, 不再重复解析
+
+    用例中的 `{{ unique.email }}` 等模板在加载时渲染为唯一值（见 utils/data_factory.py）,
+    值由种子与用例键（scope + 文件名 + 下标）决定: 不同加载方得到不同的值, 同一加载方多次加载得到相同的值
 
     测试用例数据格式:
 
@@ -62,6 +167,8 @@ def load_test_data(file_name: str) -> List[Dict[str, Any]]:
 
     Args:
         file_name (str): 数据文件名, 不需要路径
+        scope (Optional[str]): 加载方, 如 ddt 装饰的测试函数; 默认为当前执行的测试用例
+        render (bool): 是否渲染模板, 为 False 时返回原始用例, 由调用方按需渲染（如压测时每次请求渲染一次）
 
     Returns:
         
@@ -72,23 +179,198 @@ def load_test_data(file_name: str) -> List[Dict[str, Any]]:
         raise FileNotFoundError(f'测试数据文件不存在: {data_file}')
     
     try:
-        with open(data_file, 'r', encoding='utf-8') as f:
-            if data_file.suffix in ('.yaml', '.yml'):
-                data = yaml.safe_load(f)
-            elif data_file.suffix == '.json':
-                data = json.load(f)
-            else:
-                raise ValueError(f'不支持的文件格式: {data_file.suffix}. 仅支持 .yaml, .yml, .json')
-            
-            # 验证数据结构
-            if not isinstance(data, list):
-                raise ValueError(f'数据根节点必须是列表(list), 当前类型: {type(data).__name__}')
-            
-            logger.info(f'成功加载测试数据: {data_file} —— {len(data)} 条用例')
+        data = _load_cached(data_file)
+
+        # 验证数据结构
+        if not isinstance(data, list):
+            raise ValueError(f'数据根节点必须是列表(list), 当前类型: {type(data).__name__}')
+
+        logger.info(f'成功加载测试数据: {data_file} —— {len(data)} 条用例')
+        if not render:
             return data
+        scope = _current_scope() if scope is None else scope
+        return [factory.render(case, case_key(scope, file_name, i)) for i, case in enumerate(data)]
     except yaml.YAMLError as e:
         raise ValueError(f'YAML 文件解析失败 ({data_file}): {e}')
     except json.JSONDecodeError as e:
         raise ValueError(f'JSON 文件解析失败 ({data_file}): {e}')
     except Exception as e:
-        raise RuntimeError(f'数据文件加载时出错 ({data_file}): {e}')
\ No newline at end of file
+        raise RuntimeError(f'数据文件加载时出错 ({data_file}): {e}')
+
+
+# ---------------- 流式加载 ----------------
+# 适用于超大的用例文件, 每条用例单独解析, 内存占用与文件大小无关
+#   - JSON Lines (.jsonl): 每行一条用例
+#   - 多文档 YAML (.yaml/.yml): 以 `---` 分隔, 每个文档一条用例
+
+STREAM_SUFFIXES = ('.jsonl', '.yaml', '.yml')
+
+
+def _stream_file(file_name: str) -> Path:
+    data_file = CASES_DIR.joinpath(file_name)
+    if not data_file.exists():
+        raise FileNotFoundError(f'测试数据文件不存在: {data_file}')
+    if data_file.suffix not in STREAM_SUFFIXES:
+        raise ValueError(f'不支持流式加载的文件格式: {data_file.suffix}. 仅支持 .jsonl, .yaml, .yml')
+    return data_file
+
+
+def _single_document_list(data_file: Path) -> ValueError:
+    return ValueError(f'{data_file} 是单个文档的用例列表, 流式加载需要使用多文档格式（每条用例以 `---` 分隔）, '
+                      f'或改为普通加载（ddt 不指定 lazy）')
+
+
+def iter_test_data(file_name: str) -> Iterator[Dict[str, Any]]:
+    """逐条读取测试用例, 不会一次性加载整个文件
+
+    Args:
+        file_name (str): 数据文件名, 不需要路径, 支持 .jsonl 以及多文档 .yaml/.yml
+
+    Yields:
+        Dict[str, Any]: 单条测试用例
+    """
+    data_file = _stream_file(file_name)
+
+    with open(data_file, 'rb') as f:
+        if data_file.suffix == '.jsonl':
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            for document in yaml.load_all(f, Loader=YamlLoader):
+                if isinstance(document, list):
+                    raise _single_document_list(data_file)
+                if document is not None:
+                    yield document
+
+
+class _ByteOffset:
+    """YAML 事件中的位置为字符下标, 换算为文件中的字节偏移量; 下标需递增, 只读取相邻两个位置之间的内容"""
+
+    def __init__(self, data_file: Path):
+        self._file = open(data_file, encoding='utf-8', newline='')
+        self._chars = 0
+        self._bytes = 0
+
+    def __call__(self, index: int) -> int:
+        while self._chars < index:
+            chunk = self._file.read(min(index - self._chars, 1 << 16))
+            if not chunk:
+                break
+            self._chars += len(chunk)
+            self._bytes += len(chunk.encode('utf-8'))
+        return self._bytes
+
+    def close(self) -> None:
+        self._file.close()
+
+
+def index_test_data(file_name: str) -> array:
+    """扫描用例文件, 记录每条用例在文件中的起始字节偏移量
+
+    只保存偏移量（每条 8 字节）, 用例内容在执行时通过 `load_case_at` 按需读取;
+    YAML 文件按解析事件定位每个文档的根节点, 块标量等内容中的 `---` 不会被误认为文档分隔
+
+    Args:
+        file_name (str): 数据文件名, 不需要路径, 支持 .jsonl 以及多文档 .yaml/.yml
+
+    Returns:
+        array: 每条用例的起始偏移量
+
+    Raises:
+        ValueError: YAML 文件的文档为列表（单文档的用例列表）
+    """
+    data_file = _stream_file(file_name)
+    offsets = array('q')
+
+    if data_file.suffix == '.jsonl':
+        with open(data_file, 'rb') as f:
+            offset = 0
+            for line in f:
+                if line.strip():
+                    offsets.append(offset)
+                offset += len(line)
+        return offsets
+
+    byte_offset = _ByteOffset(data_file)
+    try:
+        with open(data_file, 'rb') as f:
+            root = False
+            for event in yaml.parse(f, Loader=YamlLoader):
+                if isinstance(event, yaml.DocumentStartEvent):
+                    root = True
+                    continue
+                if not root:
+                    continue
+                root = False
+                if isinstance(event, yaml.SequenceStartEvent):
+                    raise _single_document_list(data_file)
+                # 空文档
+                if isinstance(event, yaml.ScalarEvent) and event.value == '' and event.tag is None:
+                    continue
+                offsets.append(byte_offset(event.start_mark.index))
+    finally:
+        byte_offset.close()
+    return offsets
+
+
+def load_case_at(file_name: str, offset: int) -> Dict[str, Any]:
+    """读取文件中指定偏移量处的单条用例
+
+    Args:
+        file_name (str): 数据文件名, 不需要路径
+        offset (int): `index_test_data` 返回的偏移量
+
+    Returns:
+        Dict[str, Any]: 单条测试用例
+    """
+    data_file = _stream_file(file_name)
+
+    with open(data_file, 'rb') as f:
+        f.seek(offset)
+        if data_file.suffix == '.jsonl':
+            return json.loads(f.readline())
+
+        # 只解析从偏移量开始的第一个文档, 读到下一个文档分隔时停止
+        loader = YamlLoader(f)
+        try:
+            return loader.get_data()
+        finally:
+            loader.dispose()
+
+
+class LazyCase(Mapping):
+    """按需加载的测试用例
+
+    参数化时只保存文件名和偏移量, 用例执行时首次访问字段才读取内容, 用法与普通 dict 一致
+    """
+
+    __slots__ = ('file_name', 'offset', 'index', 'scope', '_data')
+
+    def __init__(self, file_name: str, offset: int, index: int, scope: str = ''):
+        self.file_name = file_name
+        self.offset = offset
+        self.index = index
+        self.scope = scope
+        self._data: Optional[Dict[str, Any]] = None
+
+    def load(self) -> Dict[str, Any]:
+        if self._data is None:
+            self._data = factory.render(load_case_at(self.file_name, self.offset), case_key(self.scope, self.file_name, self.index))
+        return self._data
+
+    def release(self) -> None:
+        """释放已加载的用例内容, 用例执行结束后调用"""
+        self._data = None
+
+    def __getitem__(self, key):
+        return self.load()[key]
+
+    def __iter__(self):
+        return iter(self.load())
+
+    def __len__(self):
+        return len(self.load())
+
+    def __repr__(self):
+        return f'LazyCase({self.file_name!r}, index={self.index})'
@@ -0,0 +1,41 @@
+import sqlite3
+import statistics
+from typing import Dict, List, TypeVar
+
+from utils.history import HistoryStore, base_nodeid
+from utils.logger import logger
+
+
+def load_durations() -> Dict[str, float]:
+    """读取历史用例耗时（最近几次执行的中位数, 见 utils/history.py）
+
+    Returns:
+        Dict[str, float]: 用例 nodeid -> 耗时（秒）, 没有历史记录或读取失败时返回空字典
+    """
+    try:
+        return HistoryStore().durations()
+    except sqlite3.Error as e:
+        logger.warning(f'历史执行记录读取失败, 将忽略: {e}')
+        return {}
+
+
+T = TypeVar('T')
+
+def sort_by_duration(items: List[T], durations: Dict[str, float]) -> List[T]:
+    """按历史耗时从长到短排序 pytest 用例（LPT 策略）
+
+    配合 pytest-xdist 的 load 调度, 耗时长的用例先分发, 各 worker 最终的总耗时更均衡。
+    没有历史记录的用例按历史耗时中位数估计; 并行执行时 nodeid 上的 `@组名` 后缀（--dist loadgroup）不参与匹配。
+
+    Args:
+        items (List[T]): pytest 收集到的用例（需要有 nodeid 属性）
+        durations (Dict[str, float]): 历史耗时
+
+    Returns:
+        List[T]: 排序后的用例, 耗时相同的用例保持原有顺序
+    """
+    if not durations:
+        return items
+
+    default = statistics.median(durations.values())
+    return sorted(items, key=lambda item: durations.get(base_nodeid(item.nodeid), default), reverse=True)
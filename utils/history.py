@@ -0,0 +1,217 @@
+import sqlite3
+import statistics
+import time
+from contextlib import closing
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from config.paths import CACHE_DIR
+from utils.metrics import EndpointStats
+
+# 历史执行记录
+#
+# 每次执行结束后写入 SQLite, 报告被清理后耗时历史仍然保留:
+#   - runs: 每次执行的环境与汇总结果
+#   - results: 每个用例的结果与耗时
+#   - endpoints: 每个接口的耗时百分位
+# 用于查询最慢用例、耗时回归与不稳定用例, 同时为并行执行提供历史耗时
+
+HISTORY_DB = CACHE_DIR.joinpath('history.db')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    started_at REAL NOT NULL,
+    finished_at REAL NOT NULL,
+    env TEXT NOT NULL,
+    total INTEGER NOT NULL,
+    passed INTEGER NOT NULL,
+    failed INTEGER NOT NULL,
+    skipped INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS results (
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    nodeid TEXT NOT NULL,
+    title TEXT,
+    outcome TEXT NOT NULL,
+    duration REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_results_nodeid ON results(nodeid, run_id);
+CREATE TABLE IF NOT EXISTS endpoints (
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    endpoint TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    errors INTEGER NOT NULL,
+    p50 REAL NOT NULL,
+    p95 REAL NOT NULL,
+    p99 REAL NOT NULL
+);
+"""
+
+
+def base_nodeid(nodeid: str) -> str:
+    """去掉 xdist loadgroup 追加的 `@组名` 后缀, 串行与并行执行的同一用例使用同一个 nodeid"""
+    # 参数化用例的 id 中可能含有 `@`（如邮箱）, 只查找参数部分之后的后缀
+    end = nodeid.rfind(']') if '[' in nodeid.rsplit('::', 1)[-1] else nodeid.rfind('::')
+    at = nodeid.find('@', end + 1)
+    return nodeid[:at] if at != -1 else nodeid
+
+
+@dataclass
+class CaseResult:
+    """单个用例的执行结果, outcome 为 passed/failed/skipped"""
+    nodeid: str
+    outcome: str
+    duration: float
+    title: Optional[str] = None
+
+
+class HistoryStore:
+    """历史执行记录
+
+    Args:
+        path (Union[str, Path]): 数据库文件
+        env (str, optional): 只查询指定环境的记录, 默认查询全部
+    """
+
+    def __init__(self, path: Union[str, Path] = HISTORY_DB, env: Optional[str] = None):
+        self.path = Path(path)
+        self.env = env
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with closing(self._connect()) as conn:
+            conn.executescript(_SCHEMA)
+
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute('PRAGMA journal_mode=WAL')
+        return conn
+
+
+    def record_run(self,
+                   env: str,
+                   results: Iterable[CaseResult],
+                   endpoints: Optional[Dict[str, EndpointStats]] = None,
+                   started_at: Optional[float] = None,
+                   ) -> int:
+        """写入一次执行的结果
+
+        Returns:
+            int: 执行记录 id
+        """
+        results = list(results)
+        outcomes = [r.outcome for r in results]
+        with closing(self._connect()) as conn, conn:
+            run_id = conn.execute(
+                'INSERT INTO runs (started_at, finished_at, env, total, passed, failed, skipped) VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (started_at or time.time(), time.time(), env, len(results),
+                 outcomes.count('passed'), outcomes.count('failed'), outcomes.count('skipped')),
+            ).lastrowid
+            conn.executemany(
+                'INSERT INTO results (run_id, nodeid, title, outcome, duration) VALUES (?, ?, ?, ?, ?)',
+                [(run_id, base_nodeid(r.nodeid), r.title, r.outcome, r.duration) for r in results],
+            )
+            conn.executemany(
+                'INSERT INTO endpoints (run_id, endpoint, count, errors, p50, p95, p99) VALUES (?, ?, ?, ?, ?, ?, ?)',
+                [(run_id, key, s.latency.count, s.errors,
+                  s.latency.percentile(50), s.latency.percentile(95), s.latency.percentile(99))
+                 for key, s in (endpoints or {}).items()],
+            )
+        return run_id
+
+
+    def _recent_runs(self, conn: sqlite3.Connection, limit: int) -> List[int]:
+        if self.env:
+            rows = conn.execute('SELECT id FROM runs WHERE env = ? ORDER BY id DESC LIMIT ?', (self.env, limit))
+        else:
+            rows = conn.execute('SELECT id FROM runs ORDER BY id DESC LIMIT ?', (limit,))
+        return [row[0] for row in rows]
+
+
+    def _results(self, runs: int) -> Tuple[List[int], Dict[str, List[Tuple[int, str, float]]]]:
+        """最近 runs 次执行的结果: (执行 id 从新到旧, nodeid -> [(执行 id, outcome, duration), ...])"""
+        with closing(self._connect()) as conn:
+            run_ids = self._recent_runs(conn, runs)
+            if not run_ids:
+                return [], {}
+            rows = conn.execute(
+                f'SELECT run_id, nodeid, outcome, duration FROM results WHERE run_id IN ({",".join("?" * len(run_ids))})',
+                run_ids,
+            ).fetchall()
+
+        by_node: Dict[str, List[Tuple[int, str, float]]] = {}
+        for run_id, nodeid, outcome, duration in rows:
+            by_node.setdefault(nodeid, []).append((run_id, outcome, duration))
+        return run_ids, by_node
+
+
+    def durations(self, runs: int = 5) -> Dict[str, float]:
+        """最近 runs 次执行中各用例耗时的中位数, 用于并行执行时均衡分配用例"""
+        _, by_node = self._results(runs)
+        return {nodeid: statistics.median(d for _, _, d in rows) for nodeid, rows in by_node.items()}
+
+
+    def slowest(self, limit: int = 10, runs: int = 5) -> List[Tuple[str, float]]:
+        """最近 runs 次执行中耗时中位数最长的用例"""
+        return sorted(self.durations(runs).items(), key=lambda kv: kv[1], reverse=True)[:limit]
+
+
+    def regressions(self, baseline_runs: int = 10, ratio: float = 1.5, min_duration: float = 0.1) -> List[Tuple[str, float, float]]:
+        """最近一次执行中耗时相比基线（之前 baseline_runs 次的中位数）增长超过 ratio 倍的用例
+
+        Returns:
+            List[Tuple[str, float, float]]: (nodeid, 基线耗时, 本次耗时), 按增长倍数从高到低排序
+        """
+        run_ids, by_node = self._results(baseline_runs + 1)
+        if len(run_ids) < 2:
+            return []
+
+        latest = run_ids[0]
+        regressions = []
+        for nodeid, rows in by_node.items():
+            current = [d for run_id, _, d in rows if run_id == latest]
+            baseline = [d for run_id, _, d in rows if run_id != latest]
+            if not current or not baseline:
+                continue
+            base = statistics.median(baseline)
+            if current[0] >= min_duration and current[0] > base * ratio:
+                regressions.append((nodeid, base, current[0]))
+        return sorted(regressions, key=lambda r: r[2] / max(r[1], 1e-9), reverse=True)
+
+
+    def flaky(self, runs: int = 20, min_runs: int = 3) -> List[Tuple[str, int, int, int]]:
+        """最近 runs 次执行中时而通过时而失败的用例
+
+        Returns:
+            List[Tuple[str, int, int, int]]: (nodeid, 执行次数, 失败次数, 结果翻转次数), 按翻转次数从高到低排序
+        """
+        _, by_node = self._results(runs)
+        flaky = []
+        for nodeid, rows in by_node.items():
+            outcomes = [outcome for _, outcome, _ in sorted(rows) if outcome != 'skipped']
+            failures = outcomes.count('failed')
+            if len(outcomes) < min_runs or failures == 0 or failures == len(outcomes):
+                continue
+            flips = sum(a != b for a, b in zip(outcomes, outcomes[1:]))
+            flaky.append((nodeid, len(outcomes), failures, flips))
+        return sorted(flaky, key=lambda f: (f[3], f[2]), reverse=True)
+
+
+    def summary_lines(self, limit: int = 3) -> List[str]:
+        """最慢用例、耗时回归与不稳定用例的摘要, 用于终端输出与通知"""
+        lines = []
+        slowest = self.slowest(limit)
+        if slowest:
+            lines.append('最慢用例: ' + ', '.join(f'{nodeid} {duration:.2f}s' for nodeid, duration in slowest))
+        for nodeid, base, current in self.regressions()[:limit]:
+            lines.append(f'耗时回归: {nodeid} {base:.2f}s -> {current:.2f}s (x{current / max(base, 1e-9):.1f})')
+        for nodeid, count, failures, _ in self.flaky()[:limit]:
+            lines.append(f'不稳定用例: {nodeid} (最近 {count} 次失败 {failures} 次)')
+        return lines
+
+
+if __name__ == '__main__':
+    # uv run python -m utils.history
+    for line in HistoryStore().summary_lines(limit=10):
+        print(line)
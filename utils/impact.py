@@ -0,0 +1,225 @@
+import ast
+import json
+import re
+import subprocess
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set
+
+from config.paths import CASES_DIR, MODELS_DIR, ROOT_DIR, TESTS_DIR
+from utils.logger import logger
+
+# 增量执行: 根据变更的文件选出受影响的用例
+#
+# 通过静态分析 tests/ 建立影响索引, 每个测试函数记录:
+#   - 通过 @ddt 或 load_test_data 等加载的用例文件（cases/ 中存在的文件名字符串常量）
+#   - 引用的 models/ 中的模型所在文件（包括被其它模型文件间接引用的情况）
+#   - 请求的接口（以 `/` 开头的字符串常量）
+# 以下情况无法判断影响范围, 执行全部用例:
+#   - 变更了框架代码（core/、utils/、config/、conftest.py、依赖等）或 tests/ 中的非测试模块
+#   - 变更的模型没有被任何用例直接引用, 或被框架代码导入
+#   - 有变更但没有选出任何用例（只有变更为空时才不执行）
+
+# 不影响用例执行的文件
+_IGNORED = re.compile(r'(\.md$|^reports/|^logs/|^\.cache/|^\.github/|^docs/)')
+
+# 接口路径形式的字符串常量
+_ENDPOINT = re.compile(r'^/[\w\-./{}]*$')
+
+# 上次执行失败的用例（pytest cache）
+LAST_FAILED_FILE = ROOT_DIR.joinpath('.pytest_cache', 'v', 'cache', 'lastfailed')
+
+
+@dataclass
+class ImpactEntry:
+    """单个测试函数依赖的文件与接口"""
+    nodeid: str
+    files: Set[str] = field(default_factory=set)
+    endpoints: Set[str] = field(default_factory=set)
+
+
+def _relative(path: Path) -> str:
+    return path.resolve().relative_to(ROOT_DIR).as_posix()
+
+
+def _module_file(module: str) -> Optional[str]:
+    """将项目内的模块名解析为相对路径, 非项目内模块返回 None"""
+    base = ROOT_DIR.joinpath(*module.split('.'))
+    for candidate in (base.with_suffix('.py'), base.joinpath('__init__.py')):
+        if candidate.exists():
+            return _relative(candidate)
+    return None
+
+
+def _imports(tree: ast.Module) -> Dict[str, str]:
+    """模块中导入的项目内名称 -> 所在文件"""
+    names = {}
+    for node in ast.walk(tree):
+        if isinstance(node, ast.ImportFrom) and node.module and node.level == 0:
+            file = _module_file(node.module)
+            for alias in node.names:
+                # from models.response_models import user_model 形式导入的是子模块
+                target = _module_file(f'{node.module}.{alias.name}') or file
+                if target:
+                    names[alias.asname or alias.name] = target
+        elif isinstance(node, ast.Import):
+            for alias in node.names:
+                file = _module_file(alias.name)
+                if file:
+                    names[alias.asname or alias.name.split('.')[0]] = file
+    return names
+
+
+def _ddt_files(decorators: Iterable[ast.expr]) -> Set[str]:
+    files = set()
+    for decorator in decorators:
+        if (isinstance(decorator, ast.Call) and getattr(decorator.func, 'id', getattr(decorator.func, 'attr', None)) == 'ddt'
+                and decorator.args and isinstance(decorator.args[0], ast.Constant)):
+            files.add(_relative(CASES_DIR.joinpath(decorator.args[0].value)))
+    return files
+
+
+def _is_case_file(name: str) -> bool:
+    """函数体中引用的用例文件, 如 load_test_data('test_user.yaml')"""
+    if not name or '\n' in name or len(name) > 255:
+        return False
+    try:
+        return CASES_DIR.joinpath(name).is_file()
+    except (OSError, ValueError):
+        return False
+
+
+def build_index(tests_dir: Path = TESTS_DIR) -> Dict[str, ImpactEntry]:
+    """扫描测试文件, 建立 nodeid -> 影响索引"""
+    index = {}
+    for test_file in sorted(tests_dir.rglob('test_*.py')):
+        tree = ast.parse(test_file.read_text(encoding='utf-8'))
+        imports = _imports(tree)
+        module_path = _relative(test_file)
+
+        for node in tree.body:
+            if not isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)) or not node.name.startswith('test'):
+                continue
+            impact = ImpactEntry(nodeid=f'{module_path}::{node.name}', files={module_path})
+            impact.files |= _ddt_files(node.decorator_list)
+
+            for child in ast.walk(node):
+                if isinstance(child, ast.Name) and child.id in imports:
+                    file = imports[child.id]
+                    if file.startswith(f'{MODELS_DIR.name}/'):
+                        impact.files.add(file)
+                elif isinstance(child, ast.Constant) and isinstance(child.value, str):
+                    if _ENDPOINT.match(child.value):
+                        impact.endpoints.add(child.value.rstrip('/') or '/')
+                    elif _is_case_file(child.value):
+                        impact.files.add(_relative(CASES_DIR.joinpath(child.value)))
+            index[impact.nodeid] = impact
+    return index
+
+
+def _framework_imports() -> Set[str]:
+    """框架代码（models/ 与测试模块以外的项目代码）导入的项目内文件"""
+    imported = set()
+    for path in ROOT_DIR.rglob('*.py'):
+        parts = path.relative_to(ROOT_DIR).parts
+        # 跳过虚拟环境等非项目代码
+        if any(part.startswith('.') or part in ('venv', 'site-packages') for part in parts):
+            continue
+        if parts[0] == MODELS_DIR.name or (parts[0] == TESTS_DIR.name and path.name.startswith('test_')):
+            continue
+        try:
+            imported |= set(_imports(ast.parse(path.read_text(encoding='utf-8'))).values())
+        except (SyntaxError, UnicodeDecodeError):
+            continue
+    return imported
+
+
+def _model_dependents(changed: Set[str]) -> Set[str]:
+    """变更的模型文件, 以及直接或间接导入了这些文件的其它模型文件"""
+    graph: Dict[str, Set[str]] = {}
+    for model_file in MODELS_DIR.rglob('*.py'):
+        graph[_relative(model_file)] = set(_imports(ast.parse(model_file.read_text(encoding='utf-8'))).values())
+
+    affected = {path for path in changed if path in graph}
+    while True:
+        more = {path for path, deps in graph.items() if path not in affected and deps & affected}
+        if not more:
+            return affected
+        affected |= more
+
+
+def _case_endpoints(path: str) -> Set[str]:
+    """用例文件中通过 request.endpoint 声明的接口（如压测用例）"""
+    from utils.data_loader import load_test_data
+
+    try:
+        cases = load_test_data(Path(path).relative_to(CASES_DIR.name).as_posix())
+    except Exception:
+        return set()
+    return {'/' + case['request']['endpoint'].strip('/') for case in cases
+            if isinstance(case.get('request'), dict) and case['request'].get('endpoint')}
+
+
+def changed_files(ref: str) -> List[str]:
+    """相对 ref 变更的文件（包括未提交和未跟踪的文件）"""
+    def git(*args):
+        return subprocess.run(['git', *args], cwd=ROOT_DIR, check=True, capture_output=True, text=True).stdout.split('\n')
+
+    files = git('diff', '--name-only', ref) + git('ls-files', '--others', '--exclude-standard')
+    return sorted({f for f in files if f})
+
+
+def last_failed() -> Set[str]:
+    """上次执行失败的用例 nodeid（去掉参数部分）"""
+    try:
+        data = json.loads(LAST_FAILED_FILE.read_text(encoding='utf-8'))
+    except (FileNotFoundError, ValueError):
+        return set()
+    return {re.split(r'[\[@]', nodeid, 1)[0] for nodeid in data}
+
+
+def select_tests(changed: Iterable[str], index: Optional[Dict[str, ImpactEntry]] = None) -> Optional[List[str]]:
+    """根据变更的文件选出受影响的用例
+
+    Returns:
+        Optional[List[str]]: 受影响的 nodeid 列表, 只有没有变更时为空;
+            变更了无法判断影响范围的文件时返回 None, 表示执行全部用例
+    """
+    index = index if index is not None else build_index()
+    changed = {path for path in changed if not _IGNORED.search(path)}
+    if not changed:
+        return []
+
+    files, endpoints = set(), set()
+    for path in changed:
+        if path.startswith(f'{TESTS_DIR.name}/') and path.endswith('.py') and Path(path).name.startswith('test_'):
+            files.add(path)
+        elif path.startswith(f'{CASES_DIR.name}/'):
+            files.add(path)
+            endpoints |= _case_endpoints(path)
+        elif path.startswith(f'{MODELS_DIR.name}/') and path.endswith('.py'):
+            continue
+        else:
+            logger.info(f'变更了 {path}, 无法判断影响范围, 执行全部用例')
+            return None
+
+    changed_models = {path for path in changed if path.startswith(f'{MODELS_DIR.name}/')}
+    if changed_models:
+        models = _model_dependents(changed_models)
+        referenced = set().union(*(impact.files for impact in index.values()))
+        for path in sorted(changed_models):
+            # 模型及依赖它的模型都没有被用例直接引用时, 可能通过框架代码间接使用
+            if not _model_dependents({path}) & referenced:
+                logger.info(f'变更了 {path}, 没有用例直接引用该模型, 执行全部用例')
+                return None
+        used_by_framework = models & _framework_imports()
+        if used_by_framework:
+            logger.info(f'变更了被框架代码导入的模型 {", ".join(sorted(used_by_framework))}, 执行全部用例')
+            return None
+        files |= models
+
+    selected = [nodeid for nodeid, impact in index.items() if impact.files & files or impact.endpoints & endpoints]
+    if not selected:
+        logger.info(f'变更了 {", ".join(sorted(changed))}, 没有选出受影响的用例, 执行全部用例')
+        return None
+    return selected
@@ -1,12 +1,28 @@
 from loguru import logger as _logger
 from config.paths import LOGS_DIR
+from collections import Counter
+import os
 import sys
+import threading
 
 LOGS_DIR.mkdir(exist_ok=True)
 
 _logger.remove()
 
 
+# 日志模式（环境变量 LOG_PROFILE, 可通过 main.py --log-profile 指定）:
+# - default: 标准输出 DEBUG 级别彩色日志, 每次断言、每次获取数据库连接都输出一行
+# - perf: 低开销模式, 用于大规模用例
+#   - 断言通过、获取/归还连接等高频日志只计数, 会话结束时汇总输出
+#   - 标准输出只输出 INFO 及以上且不着色, app.logs 只记录 WARNING 以下的日志, 使用大缓冲区批量写入
+#   - WARNING/ERROR 等失败诊断信息同步写入不带缓冲的 errors.logs, worker 异常退出时也不会丢失
+LOG_PROFILE = os.getenv('LOG_PROFILE', 'default')
+PERF_PROFILE = LOG_PROFILE == 'perf'
+
+_FILE_FORMAT = '{time:YYYY-MM-DD HH:mm:ss.SSS} | {level: <8} | {name}:{function}:{line} - {message}'
+_WARNING_NO = _logger.level('WARNING').no
+
+
 # 输出到文件
 _logger.add(
     sink=LOGS_DIR.joinpath('app.logs'),
@@ -15,21 +31,86 @@ _logger.add(
     retention='7 days',
     compression='zip',
     enqueue=True,
-    format='{time:YYYY-MM-DD HH:mm:ss.SSS} | {level: <8} | {name}:{function}:{line} - {message}'
+    # perf 模式下使用 1MB 写缓冲, 减少写文件的系统调用; 缓冲中的日志在进程崩溃时会丢失, WARNING 及以上另行写入
+    buffering=1 << 20 if PERF_PROFILE else -1,
+    filter=(lambda record: record['level'].no < _WARNING_NO) if PERF_PROFILE else None,
+    format=_FILE_FORMAT
 )
 
+if PERF_PROFILE:
+    _logger.add(
+        sink=LOGS_DIR.joinpath('errors.logs'),
+        level='WARNING',
+        rotation='1 day',
+        retention='7 days',
+        compression='zip',
+        # 同步写入且不缓冲, 每条日志立即落盘
+        enqueue=False,
+        buffering=1,
+        format=_FILE_FORMAT
+    )
+
 
 # 标准输出
-_logger.add(
-    sink=sys.stdout,
-    level='DEBUG',
-    colorize=True,
-    format='<green>{time:YYYY-MM-DD HH:mm:ss.SSS}</green> | <level>{level: <8}</level> | {name}:{function}:{line} - {message}'
-)
+if PERF_PROFILE:
+    _logger.add(
+        sink=sys.stdout,
+        level='INFO',
+        colorize=False,
+        format='{time:HH:mm:ss.SSS} | {level: <8} | {name}:{line} - {message}'
+    )
+else:
+    _logger.add(
+        sink=sys.stdout,
+        level='DEBUG',
+        colorize=True,
+        format='<green>{time:YYYY-MM-DD HH:mm:ss.SSS}</green> | <level>{level: <8}</level> | {name}:{function}:{line} - {message}'
+    )
 
 
 # 单例
 logger = _logger
 
 
+class HotPathLog:
+    """高频日志
+
+    default 模式下直接输出（消息使用 `{}` 占位符, 由 loguru 在确实需要输出时才格式化）;
+    perf 模式下只按 key 计数, 不格式化消息, 会话结束时调用 flush 汇总输出
+
+    Example:
+        hot_log.success('assert.status_code', '状态码断言通过: {}', actual)
+    """
+
+    def __init__(self, enabled: bool):
+        self.enabled = enabled
+        self._counts: Counter = Counter()
+        self._lock = threading.Lock()
+
+
+    def log(self, level: str, key: str, message: str, *args) -> None:
+        if self.enabled:
+            with self._lock:
+                self._counts[key] += 1
+            return
+        # depth=2: 日志位置显示为调用 hot_log 的函数
+        logger.opt(depth=2).log(level, message, *args)
+
+
+    def success(self, key: str, message: str, *args) -> None:
+        self.log('SUCCESS', key, message, *args)
+
+
+    def info(self, key: str, message: str, *args) -> None:
+        self.log('INFO', key, message, *args)
+
+
+    def flush(self) -> None:
+        """输出并清空计数"""
+        with self._lock:
+            counts, self._counts = self._counts, Counter()
+        if counts:
+            logger.info('高频日志汇总: ' + ', '.join(f'{key} x {count}' for key, count in counts.most_common()))
+
 
+hot_log = HotPathLog(enabled=PERF_PROFILE)
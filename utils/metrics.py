@@ -0,0 +1,315 @@
+import json
+import math
+import re
+import threading
+import time
+from abc import ABC, abstractmethod
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+# 请求耗时统计
+#
+# APIClient 每发送一个请求记录一条 RequestTiming, 由 MetricsRecorder 分发给各个 sink:
+#   - HistogramSink: 进程内按接口聚合的耗时直方图, 用于会话结束时输出 p50/p95/p99
+#   - JsonLinesSink: 每个请求一行 JSON, 便于事后分析
+#   - PrometheusSink: 会话结束时写出 Prometheus 文本格式, 供 node_exporter textfile collector 采集
+
+# 路径中的数字 id 与 UUID 替换为占位符, 同一接口的不同资源聚合为一个序列
+_NUMERIC_SEGMENT = re.compile(r'^\d+$')
+_UUID_SEGMENT = re.compile(r'^[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}$')
+
+
+def endpoint_template(endpoint: str) -> str:
+    """接口路径模板, 如 `users/42?x=1` -> `/users/{id}`"""
+    segments = []
+    for segment in endpoint.split('?', 1)[0].strip('/').split('/'):
+        if _NUMERIC_SEGMENT.match(segment):
+            segment = '{id}'
+        elif _UUID_SEGMENT.match(segment):
+            segment = '{uuid}'
+        segments.append(segment)
+    return '/' + '/'.join(segments)
+
+
+def endpoint_key(method: str, endpoint: str) -> str:
+    """接口标识 `METHOD /path`, 用于耗时统计、重试策略与熔断"""
+    return f'{method.upper()} {endpoint_template(endpoint)}'
+
+
+@dataclass
+class RequestTiming:
+    """单个请求的耗时与大小, 时间单位均为秒"""
+    method: str
+    endpoint: str
+    status_code: Optional[int]
+    total: float
+    # 发送请求到解析完响应头的耗时
+    ttfb: Optional[float] = None
+    # DNS 解析耗时, 复用连接时为 None
+    dns: Optional[float] = None
+    # TCP 建连耗时（不含 DNS 解析）, 复用连接时为 None
+    connect: Optional[float] = None
+    # TLS 握手耗时, 复用连接或 HTTP 请求时为 None
+    tls: Optional[float] = None
+    retries: int = 0
+    request_bytes: int = 0
+    # 解压后的响应体大小
+    response_bytes: int = 0
+    # 实际传输的响应体大小（压缩后）
+    wire_bytes: int = 0
+    error: Optional[str] = None
+    timestamp: float = field(default_factory=time.time)
+
+    @property
+    def key(self) -> str:
+        return endpoint_key(self.method, self.endpoint)
+
+
+class LatencyHistogram:
+    """对数分桶的耗时直方图, 内存占用与样本数无关, 百分位误差不超过 5%"""
+
+    MIN_VALUE = 1e-4
+    GROWTH = 1.05
+
+    def __init__(self):
+        self.buckets: Dict[int, int] = {}
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    def _index(self, value: float) -> int:
+        if value <= self.MIN_VALUE:
+            return 0
+        return math.ceil(math.log(value / self.MIN_VALUE, self.GROWTH))
+
+    def add(self, value: float) -> None:
+        index = self._index(value)
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+        self.count += 1
+        self.total += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def merge(self, other: 'LatencyHistogram') -> None:
+        for index, count in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + count
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def percentile(self, p: float) -> float:
+        """返回第 p 百分位的耗时（p 取值 0 ~ 100）"""
+        if not self.count:
+            return 0.0
+        rank = max(1, math.ceil(self.count * p / 100))
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= rank:
+                return min(max(self.MIN_VALUE * self.GROWTH ** index, self.min), self.max)
+        return self.max
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def to_dict(self) -> dict:
+        return {'buckets': self.buckets, 'count': self.count, 'total': self.total,
+                'min': self.min if self.count else None, 'max': self.max}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'LatencyHistogram':
+        histogram = cls()
+        histogram.buckets = {int(k): v for k, v in data['buckets'].items()}
+        histogram.count = data['count']
+        histogram.total = data['total']
+        histogram.min = data['min'] if data['min'] is not None else math.inf
+        histogram.max = data['max']
+        return histogram
+
+
+@dataclass
+class EndpointStats:
+    """单个接口的汇总统计"""
+    latency: LatencyHistogram = field(default_factory=LatencyHistogram)
+    errors: int = 0
+    retries: int = 0
+    request_bytes: int = 0
+    response_bytes: int = 0
+    wire_bytes: int = 0
+    # 新建的 TCP 连接数与 TLS 握手次数, 其余请求复用了连接
+    new_connections: int = 0
+    tls_handshakes: int = 0
+
+    def merge(self, other: 'EndpointStats') -> None:
+        self.latency.merge(other.latency)
+        self.errors += other.errors
+        self.retries += other.retries
+        self.request_bytes += other.request_bytes
+        self.response_bytes += other.response_bytes
+        self.wire_bytes += other.wire_bytes
+        self.new_connections += other.new_connections
+        self.tls_handshakes += other.tls_handshakes
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        data['latency'] = self.latency.to_dict()
+        return data
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'EndpointStats':
+        return cls(**{**data, 'latency': LatencyHistogram.from_dict(data['latency'])})
+
+
+class MetricsSink(ABC):
+    """sink 基类"""
+
+    @abstractmethod
+    def record(self, timing: RequestTiming) -> None:
+        ...
+
+    def close(self) -> None:
+        pass
+
+
+class HistogramSink(MetricsSink):
+    """进程内按接口聚合耗时"""
+
+    def __init__(self):
+        self.endpoints: Dict[str, EndpointStats] = {}
+
+    def record(self, timing: RequestTiming) -> None:
+        stats = self.endpoints.setdefault(timing.key, EndpointStats())
+        stats.latency.add(timing.total)
+        stats.errors += 1 if timing.error or (timing.status_code or 0) >= 500 else 0
+        stats.retries += timing.retries
+        stats.request_bytes += timing.request_bytes
+        stats.response_bytes += timing.response_bytes
+        stats.wire_bytes += timing.wire_bytes
+        stats.new_connections += timing.connect is not None
+        stats.tls_handshakes += timing.tls is not None
+
+    def export(self) -> Dict[str, dict]:
+        """导出为可序列化的字典, 用于在 xdist worker 与主进程之间传递"""
+        return {key: stats.to_dict() for key, stats in self.endpoints.items()}
+
+    def merge(self, exported: Dict[str, dict]) -> None:
+        """合并其它进程导出的统计"""
+        for key, data in exported.items():
+            self.endpoints.setdefault(key, EndpointStats()).merge(EndpointStats.from_dict(data))
+
+
+class JsonLinesSink(MetricsSink):
+    """每个请求写一行 JSON"""
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, 'a', encoding='utf-8', buffering=1)
+
+    def record(self, timing: RequestTiming) -> None:
+        self._file.write(json.dumps({**asdict(timing), 'key': timing.key}, ensure_ascii=False) + '\n')
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class PrometheusSink(MetricsSink):
+    """按 Prometheus 文本格式输出耗时直方图, close 时写入文件"""
+
+    BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+    def __init__(self, path: Union[str, Path], labels: Optional[Dict[str, str]] = None):
+        self.path = Path(path)
+        # 附加到每个序列上的固定标签, 如并行执行时的 worker 编号
+        self.labels = ''.join(f',{k}="{v}"' for k, v in (labels or {}).items())
+        # (method, endpoint) -> [各个桶的计数..., 总次数, 总耗时]
+        self._series: Dict[tuple, list] = {}
+
+    def record(self, timing: RequestTiming) -> None:
+        series = self._series.setdefault((timing.method.upper(), endpoint_template(timing.endpoint)),
+                                         [0] * len(self.BUCKETS) + [0, 0.0])
+        for i, bound in enumerate(self.BUCKETS):
+            if timing.total <= bound:
+                series[i] += 1
+        series[-2] += 1
+        series[-1] += timing.total
+
+    def render(self) -> str:
+        name = 'api_request_duration_seconds'
+        lines = [f'# HELP {name} API request duration in seconds.', f'# TYPE {name} histogram']
+        for (method, endpoint), series in sorted(self._series.items()):
+            labels = f'method="{method}",endpoint="{endpoint}"{self.labels}'
+            for bound, count in zip(self.BUCKETS, series):
+                lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {count}')
+            lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {series[-2]}')
+            lines.append(f'{name}_sum{{{labels}}} {series[-1]}')
+            lines.append(f'{name}_count{{{labels}}} {series[-2]}')
+        return '\n'.join(lines) + '\n'
+
+    def close(self) -> None:
+        if not self._series:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.write_text(self.render(), encoding='utf-8')
+
+
+class MetricsRecorder:
+    """请求耗时记录器, 始终保留进程内直方图, 其它 sink 按需添加"""
+
+    def __init__(self):
+        self.histogram = HistogramSink()
+        self.sinks: List[MetricsSink] = [self.histogram]
+        self._lock = threading.Lock()
+
+    def add_sink(self, sink: MetricsSink) -> None:
+        self.sinks.append(sink)
+
+    def record(self, timing: RequestTiming) -> None:
+        with self._lock:
+            for sink in self.sinks:
+                sink.record(timing)
+
+    def close(self) -> None:
+        """关闭除内存直方图以外的 sink, 写出文件"""
+        with self._lock:
+            for sink in self.sinks[1:]:
+                sink.close()
+            self.sinks = [self.histogram]
+
+    def summary_lines(self) -> List[str]:
+        """按接口输出耗时百分位、新建连接数与传输大小, 按 p95 从慢到快排序"""
+        endpoints = self.histogram.endpoints
+        if not endpoints:
+            return []
+
+        width = max(len(key) for key in endpoints)
+        lines = [f'{"endpoint":<{width}}  {"count":>6}  {"err":>4}  {"retry":>5}  {"p50(ms)":>8}  {"p95(ms)":>8}  {"p99(ms)":>8}'
+                 f'  {"conn":>5}  {"wire(KB)":>9}  {"body(KB)":>9}']
+        for key, stats in sorted(endpoints.items(), key=lambda kv: kv[1].latency.percentile(95), reverse=True):
+            latency = stats.latency
+            lines.append(
+                f'{key:<{width}}  {latency.count:>6}  {stats.errors:>4}  {stats.retries:>5}  '
+                f'{latency.percentile(50) * 1000:>8.1f}  {latency.percentile(95) * 1000:>8.1f}  {latency.percentile(99) * 1000:>8.1f}'
+                f'  {stats.new_connections:>5}  {stats.wire_bytes / 1024:>9.1f}  {stats.response_bytes / 1024:>9.1f}'
+            )
+
+        # 汇总连接复用率与压缩率
+        requests = sum(stats.latency.count for stats in endpoints.values())
+        connections = sum(stats.new_connections for stats in endpoints.values())
+        handshakes = sum(stats.tls_handshakes for stats in endpoints.values())
+        wire = sum(stats.wire_bytes for stats in endpoints.values())
+        body = sum(stats.response_bytes for stats in endpoints.values())
+        lines.append(
+            f'请求 {requests} 次, 新建连接 {connections} 个, TLS 握手 {handshakes} 次, 连接复用率 {1 - connections / max(requests, 1):.1%}'
+            f' | 传输 {wire / 1024:.1f} KB, 解压后 {body / 1024:.1f} KB'
+            + (f', 压缩率 {wire / body:.1%}' if body else '')
+        )
+        return lines
+
+
+# 单例
+metrics = MetricsRecorder()
@@ -0,0 +1,91 @@
+import types
+from functools import lru_cache
+from typing import Any, Dict, FrozenSet, List, Type, Union, get_args, get_origin
+
+from pydantic import BaseModel, ConfigDict, TypeAdapter, create_model, field_validator
+
+# 响应模型校验器缓存
+#
+# - get_adapter: 每个模型（或 List[Model] 等类型）只构建一次 TypeAdapter, 可直接从原始字节校验 JSON
+# - partial_model: 只保留测试关心的字段, 对超大的列表响应只校验需要的字段;
+#   沿用原模型的配置和字段校验器, 模型级校验器（model_validator）可能依赖未选择的字段, 不会沿用
+
+
+@lru_cache(maxsize=None)
+def get_adapter(model: Any) -> TypeAdapter:
+    """获取模型对应的 TypeAdapter（按模型缓存）
+
+    Example:
+        >>> get_adapter(CreateUserModel).validate_json(resp.content)
+        >>> get_adapter(List[CreateUserData]).validate_json(b'[{"id": 1}]')
+    """
+    return TypeAdapter(model)
+
+
+def _field_tree(fields: FrozenSet[str]) -> Dict[str, dict]:
+    tree: Dict[str, dict] = {}
+    for path in fields:
+        node = tree
+        for part in path.split('.'):
+            node = node.setdefault(part, {})
+    return tree
+
+
+def _narrow(annotation: Any, tree: Dict[str, dict]) -> Any:
+    """将字段类型中的模型替换为只包含指定子字段的模型, 支持 List[Model]、Optional[Model] 等嵌套"""
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return _build(annotation, tree)
+
+    origin = get_origin(annotation)
+    args = get_args(annotation)
+    if origin in (list, List):
+        return List[_narrow(args[0], tree)]
+    if origin in (Union, types.UnionType):
+        return Union[tuple(arg if arg is type(None) else _narrow(arg, tree) for arg in args)]
+
+    raise ValueError(f'字段类型 {annotation} 不是模型, 无法继续选择子字段 {list(tree)}')
+
+
+def _build(model: Type[BaseModel], tree: Dict[str, dict]) -> Type[BaseModel]:
+    definitions = {}
+    for name, sub_tree in tree.items():
+        field = model.model_fields.get(name)
+        if field is None:
+            raise ValueError(f'{model.__name__} 中不存在字段: {name}')
+        annotation = _narrow(field.annotation, sub_tree) if sub_tree else field.annotation
+        definitions[name] = (annotation, field)
+
+    # 沿用作用于已选择字段的校验器, 未选择的字段不存在, 不再检查
+    validators = {}
+    for name, decorator in model.__pydantic_decorators__.field_validators.items():
+        info = decorator.info
+        fields = ['*'] if '*' in info.fields else [f for f in info.fields if f in tree]
+        if fields:
+            func = getattr(decorator.func, '__func__', decorator.func)
+            validators[name] = field_validator(*fields, mode=info.mode, check_fields=False,
+                                               json_schema_input_type=info.json_schema_input_type)(func)
+
+    return create_model(
+        f'Partial{model.__name__}',
+        # 未选择的字段直接忽略, 其余配置（如 str_strip_whitespace、strict）与原模型一致
+        __config__=ConfigDict(**{**model.model_config, 'extra': 'ignore'}),
+        __validators__=validators,
+        **definitions,
+    )
+
+
+@lru_cache(maxsize=None)
+def partial_model(model: Type[BaseModel], fields: FrozenSet[str]) -> Type[BaseModel]:
+    """基于已有模型构建只包含部分字段的模型（按模型 + 字段缓存）
+
+    字段使用 `.` 表示嵌套, 列表中的模型同样适用, 如 `data.items.id` 表示 data.items 中每个元素的 id;
+    未选择的字段在校验时直接忽略, 不会构建对应的 Python 对象
+
+    Args:
+        model (Type[BaseModel]): 完整的响应模型
+        fields (FrozenSet[str]): 需要校验的字段路径
+
+    Returns:
+        Type[BaseModel]: 只包含指定字段的模型
+    """
+    return _build(model, _field_tree(fields))
@@ -1,22 +1,66 @@
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import List, Optional, Tuple, Union
+
 import requests
 
-from config.paths import REPORTS_DIR
-from config.settings import Settings
+from config.paths import CACHE_DIR
+from config.settings import SharedSettings
+from core.resilience import RetryPolicy
 from utils.logger import logger
-from core.api_client import unauthorized_client
+
+# 测试报告推送
+#
+# send_report 只把消息放入队列, 由后台线程发送, 不阻塞 pytest 结束流程:
+#   - 每次请求有超时, 失败按 RetryPolicy 退避重试
+#   - 发送前合并队列中所有待发送的消息（多次调用、上次未送达的消息）, 只推送一条
+#   - flush 最多等待指定时间, 未送达的消息写入 outbox 文件, 下次执行时与新消息一起重发
+#   - 不可重试的失败（如 4xx, 重发也不会成功）直接丢弃, 不写入 outbox
+#
+# 超时后仍在发送中的消息同样写入 outbox, 可能导致下次重复推送（至少一次）
+
+OUTBOX_FILE = CACHE_DIR.joinpath('notifier_outbox.jsonl')
+
+# outbox 最多保留的消息数, webhook 长期不可用时只保留最近的通知
+OUTBOX_MAX = 20
+
 
 class Notifier:
 
-    settings = Settings()
+    settings = SharedSettings()
+
+    def __init__(self,
+                 webhook_url: Optional[str] = None,
+                 outbox: Union[str, Path] = OUTBOX_FILE,
+                 timeout: Optional[float] = None,
+                 retry_policy: Optional[RetryPolicy] = None,
+                 ):
+        self.webhook_url = webhook_url if webhook_url is not None else self.settings.FEISHU_WEBHOOK_URL
+        self.outbox = Path(outbox)
+        self.timeout = timeout or self.settings.NOTIFY_TIMEOUT
+        self.retry_policy = retry_policy or RetryPolicy(
+            max_retries=self.settings.NOTIFY_MAX_RETRIES,
+            methods=frozenset({'POST'}),
+        )
 
-    def __init__(self):
-        self.webhook_url = self.settings.FEISHU_WEBHOOK_URL
+        # 尚未送达的消息（包括上次执行遗留在 outbox 中的）
+        self._undelivered: List[dict] = self._load_outbox()
+        # 已提交的消息数与后台线程已处理（送达或放弃）的消息数
+        self._submitted = len(self._undelivered)
+        self._processed = 0
+        # 因不可重试的失败而丢弃的消息数
+        self._dropped = 0
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
 
         if not self.webhook_url:
             logger.warning('未配置 WEBHOOK_URL, 跳过测试报告推送')
-    
 
-    def build_message(self, stats: dict, report_path: str) -> dict:
+
+    def build_message(self, stats: dict, report_path: str, trends: Optional[List[str]] = None) -> dict:
         total = stats.get('total', 0)
         passed = stats.get('passed', 0)
         failed = stats.get('failed', 0)
@@ -26,7 +70,7 @@ class Notifier:
         status = "🟢 全部通过" if failed == 0 and errors == 0 else "🔴 存在失败"
 
         text = f"""【接口自动化测试报告】- {self.settings.APP_ENV} 环境
-        
+
 状态：{status}
 总计：{total}
 通过：{passed}
@@ -36,23 +80,139 @@ class Notifier:
 报告：{report_path}
         """
 
+        # 历史趋势（最慢用例、耗时回归、不稳定用例）
+        if trends:
+            text += '\n趋势：\n' + '\n'.join(trends)
+
         return {'msg_type': 'text', 'content': {'text': text}}
 
 
-    def send_report(self, stats: dict, report_path: str):
+    def send_report(self, stats: dict, report_path: str, trends: Optional[List[str]] = None):
+        """在后台推送测试报告, 立即返回"""
         if not self.webhook_url:
             return
-        
-        try:
-            message = self.build_message(stats, report_path)
+        self.enqueue(self.build_message(stats, report_path, trends))
+
+
+    def enqueue(self, message: dict) -> None:
+        with self._cond:
+            self._undelivered.append(message)
+            self._submitted += 1
+            self._cond.notify_all()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='notifier', daemon=True)
+                self._thread.start()
+
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """等待后台发送完成, 最多等待 timeout 秒（默认 NOTIFY_FLUSH_TIMEOUT）, 未送达的消息写入 outbox
+
+        Returns:
+            bool: 是否全部送达（有消息因不可重试的失败被丢弃时为 False）
+        """
+        deadline = time.monotonic() + (timeout if timeout is not None else self.settings.NOTIFY_FLUSH_TIMEOUT)
+        with self._cond:
+            while self._thread is not None and self._processed < self._submitted:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    logger.warning(f'通知推送超时, {len(self._undelivered)} 条消息将在下次执行时重发')
+                    break
+                self._cond.wait(remaining)
+            undelivered = list(self._undelivered)
+            dropped = self._dropped
 
-            headers = {'Content-Type': 'application/json'}
+        self._save_outbox(undelivered)
+        return not undelivered and not dropped
 
-            r = requests.post(url=self.webhook_url, headers=headers, json=message)
 
-            if r.status_code == 200:
-                logger.success(f'测试报告 {report_path} 推送成功')
-            else:
-                logger.error(f'测试报告 {report_path} 推送失败: {r.status_code} - {r.text}')
-        except Exception as e:
-            logger.error(f'测试报告 {report_path} 推送失败: {e}')
\ No newline at end of file
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while self._processed >= self._submitted:
+                    self._cond.wait()
+                batch = list(self._undelivered)
+                submitted = self._submitted
+
+            delivered, retryable = self._post(self._coalesce(batch))
+
+            with self._cond:
+                if delivered or not retryable:
+                    # 发送期间新加入的消息留到下一轮
+                    del self._undelivered[:len(batch)]
+                if not delivered and not retryable:
+                    self._dropped += len(batch)
+                    logger.error(f'测试报告推送失败且不可重试, 丢弃 {len(batch)} 条通知')
+                self._processed = submitted
+                self._cond.notify_all()
+
+
+    @staticmethod
+    def _coalesce(messages: List[dict]) -> dict:
+        """多条文本消息合并为一条"""
+        if len(messages) == 1:
+            return messages[0]
+        texts = [m.get('content', {}).get('text', '') for m in messages]
+        return {'msg_type': 'text', 'content': {'text': f'（合并 {len(messages)} 条通知）\n\n' + '\n\n'.join(texts)}}
+
+
+    def _post(self, message: dict) -> Tuple[bool, bool]:
+        """推送消息
+
+        Returns:
+            Tuple[bool, bool]: (是否送达, 失败是否可重试)
+        """
+        policy = self.retry_policy
+        for attempt in range(policy.max_retries + 1):
+            retry_after = None
+            try:
+                r = requests.post(url=self.webhook_url, json=message, timeout=self.timeout)
+                if r.status_code == 200:
+                    logger.success('测试报告推送成功')
+                    return True, False
+                error = f'{r.status_code} - {r.text}'
+                retryable = r.status_code in policy.status_forcelist
+                retry_after = r.headers.get('Retry-After')
+            except requests.RequestException as e:
+                error = str(e)
+                retryable = True
+
+            if not retryable or attempt == policy.max_retries:
+                break
+            logger.warning(f'测试报告推送失败: {error}, 第 {attempt + 1} 次重试')
+            time.sleep(policy.backoff(attempt, retry_after))
+
+        logger.error(f'测试报告推送失败: {error}')
+        return False, retryable
+
+
+    def _load_outbox(self) -> List[dict]:
+        try:
+            lines = self.outbox.read_text(encoding='utf-8').splitlines()
+        except FileNotFoundError:
+            return []
+        messages = []
+        for lineno, line in enumerate(lines, 1):
+            if not line.strip():
+                continue
+            try:
+                messages.append(json.loads(line))
+            except json.JSONDecodeError as e:
+                # 写入中断等原因导致的损坏行, 跳过不影响其它消息
+                logger.warning(f'outbox 第 {lineno} 行损坏, 已跳过: {e}')
+        if messages:
+            logger.info(f'outbox 中有 {len(messages)} 条未送达的通知, 将与本次通知一起重发')
+        return messages
+
+
+    def _save_outbox(self, messages: List[dict]) -> None:
+        if not messages:
+            self.outbox.unlink(missing_ok=True)
+            return
+        if len(messages) > OUTBOX_MAX:
+            logger.warning(f'outbox 中未送达的通知过多, 丢弃最早的 {len(messages) - OUTBOX_MAX} 条')
+            messages = messages[-OUTBOX_MAX:]
+        self.outbox.parent.mkdir(parents=True, exist_ok=True)
+        # 先写临时文件再替换, 写入中断时不会留下不完整的 outbox
+        tmp = self.outbox.with_name(f'{self.outbox.name}.{os.getpid()}.tmp')
+        tmp.write_text(''.join(json.dumps(m, ensure_ascii=False) + '\n' for m in messages), encoding='utf-8')
+        os.replace(tmp, self.outbox)
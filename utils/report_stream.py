@@ -0,0 +1,177 @@
+import html
+import json
+import sys
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, Optional, Union
+
+# 流式测试报告
+#
+# pytest-html 的 --self-contained-html 在内存中保留全部结果, 结束时一次性生成整个 HTML, 用例多时耗时和内存都随用例数增长;
+# 流式报告在每个用例结束时追加一行 JSON 到 .jsonl 文件, 需要查看时再逐行生成一个静态 HTML 页面（分页、按结果和关键字过滤）,
+# 写入和生成的耗时与内存都只与单个用例有关
+#
+# uv run python -m utils.report_stream reports/report_xxx.jsonl
+
+# 单个用例失败信息的最大长度, 超出部分截断
+MAX_LONGREPR = 10000
+
+
+@dataclass
+class ReportEntry:
+    """单个用例的执行结果"""
+    nodeid: str
+    outcome: str = 'passed'
+    duration: float = 0.0
+    title: Optional[str] = None
+    longrepr: Optional[str] = None
+    finished_at: float = 0.0
+
+
+class ReportWriter:
+    """逐个用例写入 JSON Lines 报告
+
+    pytest 每个用例依次产生 setup/call/teardown 三个报告, teardown 后写入一行, 只缓存正在执行的用例
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, 'a', encoding='utf-8', buffering=1)
+        self._pending: Dict[str, ReportEntry] = {}
+
+
+    def on_report(self, report) -> None:
+        """处理 pytest 的 TestReport"""
+        entry = self._pending.get(report.nodeid)
+        if entry is None:
+            entry = self._pending[report.nodeid] = ReportEntry(nodeid=report.nodeid)
+        entry.duration += report.duration
+        if report.failed:
+            entry.outcome = 'failed' if report.when == 'call' else 'error'
+            entry.longrepr = (entry.longrepr or '') + report.longreprtext[:MAX_LONGREPR]
+        elif report.skipped and entry.outcome == 'passed':
+            entry.outcome = 'skipped'
+            entry.longrepr = report.longreprtext[:MAX_LONGREPR]
+        for name, value in report.user_properties:
+            if name == 'case_title':
+                entry.title = value
+
+        if report.when == 'teardown':
+            self.write(self._pending.pop(report.nodeid))
+
+
+    def write(self, entry: ReportEntry) -> None:
+        entry.finished_at = entry.finished_at or time.time()
+        self._file.write(json.dumps(asdict(entry), ensure_ascii=False) + '\n')
+
+
+    def close(self) -> None:
+        # 被中断的用例（没有 teardown 报告）同样写入
+        for entry in self._pending.values():
+            self.write(entry)
+        self._pending.clear()
+        self._file.close()
+
+
+_HEAD = """<!DOCTYPE html>
+<html lang="zh-CN">
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+<style>
+body {{ font-family: sans-serif; margin: 20px; }}
+#toolbar > * {{ margin-right: 8px; }}
+table {{ border-collapse: collapse; width: 100%; margin-top: 12px; }}
+th, td {{ border: 1px solid #ddd; padding: 4px 8px; text-align: left; vertical-align: top; }}
+tr.passed td.outcome {{ color: #2e7d32; }}
+tr.failed td.outcome, tr.error td.outcome {{ color: #c62828; }}
+tr.skipped td.outcome {{ color: #999; }}
+pre {{ white-space: pre-wrap; margin: 4px 0 0; font-size: 12px; }}
+</style>
+</head>
+<body>
+<h2>{title}</h2>
+<div id="summary"></div>
+<div id="toolbar">
+<select id="outcome"><option value="">全部</option><option>passed</option><option>failed</option><option>error</option><option>skipped</option></select>
+<input id="keyword" placeholder="按 nodeid / 标题过滤">
+<button id="prev">上一页</button><span id="page"></span><button id="next">下一页</button>
+</div>
+<table><thead><tr><th>用例</th><th>标题</th><th>结果</th><th>耗时(s)</th></tr></thead><tbody id="rows"></tbody></table>
+<script id="data" type="application/x-ndjson">
+"""
+
+_TAIL = """</script>
+<script>
+const PAGE_SIZE = {page_size};
+const all = document.getElementById('data').textContent.split('\\n').filter(Boolean).map(JSON.parse);
+let filtered = all, page = 0;
+
+const counts = {{}};
+all.forEach(r => counts[r.outcome] = (counts[r.outcome] || 0) + 1);
+document.getElementById('summary').textContent =
+  `总数 ${{all.length}} | ` + Object.entries(counts).map(([k, v]) => `${{k}} ${{v}}`).join(' | ');
+
+function esc(s) {{
+  return String(s ?? '').replace(/[&<>"]/g, c => ({{'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;'}})[c]);
+}}
+
+function render() {{
+  const pages = Math.max(1, Math.ceil(filtered.length / PAGE_SIZE));
+  page = Math.min(page, pages - 1);
+  document.getElementById('page').textContent = ` ${{page + 1}} / ${{pages}} (${{filtered.length}}) `;
+  document.getElementById('rows').innerHTML = filtered.slice(page * PAGE_SIZE, (page + 1) * PAGE_SIZE).map(r =>
+    `<tr class="${{esc(r.outcome)}}"><td>${{esc(r.nodeid)}}${{r.longrepr ? `<pre>${{esc(r.longrepr)}}</pre>` : ''}}</td>` +
+    `<td>${{esc(r.title)}}</td><td class="outcome">${{esc(r.outcome)}}</td><td>${{r.duration.toFixed(3)}}</td></tr>`
+  ).join('');
+}}
+
+function applyFilter() {{
+  const outcome = document.getElementById('outcome').value;
+  const keyword = document.getElementById('keyword').value.toLowerCase();
+  filtered = all.filter(r => (!outcome || r.outcome === outcome) &&
+    (!keyword || r.nodeid.toLowerCase().includes(keyword) || (r.title || '').toLowerCase().includes(keyword)));
+  page = 0;
+  render();
+}}
+
+document.getElementById('outcome').onchange = applyFilter;
+document.getElementById('keyword').oninput = applyFilter;
+document.getElementById('prev').onclick = () => {{ page = Math.max(0, page - 1); render(); }};
+document.getElementById('next').onclick = () => {{ page += 1; render(); }};
+render();
+</script>
+</body>
+</html>
+"""
+
+
+def render_html(jsonl_path: Union[str, Path], html_path: Union[str, Path, None] = None, page_size: int = 100) -> Path:
+    """根据 JSON Lines 报告生成静态 HTML 页面, 逐行读写, 不在内存中保留全部结果
+
+    Args:
+        jsonl_path (Union[str, Path]): ReportWriter 写入的报告
+        html_path (Union[str, Path, None]): 输出路径, 默认与报告同名的 .html 文件
+        page_size (int): 每页显示的用例数
+
+    Returns:
+        Path: 生成的 HTML 文件
+    """
+    jsonl_path = Path(jsonl_path)
+    html_path = Path(html_path) if html_path else jsonl_path.with_suffix('.html')
+    with open(jsonl_path, encoding='utf-8') as src, open(html_path, 'w', encoding='utf-8') as dst:
+        dst.write(_HEAD.format(title=html.escape(jsonl_path.stem)))
+        for line in src:
+            line = line.strip()
+            if line:
+                # `<` 只会出现在 JSON 字符串中, 转义后不会提前结束 <script>
+                dst.write(line.replace('<', '\\u003c') + '\n')
+        dst.write(_TAIL.format(page_size=page_size))
+    return html_path
+
+
+if __name__ == '__main__':
+    for path in sys.argv[1:]:
+        print(render_html(path))